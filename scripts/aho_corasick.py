@@ -0,0 +1,107 @@
+from collections import deque
+
+# Multi-pattern string matching (Aho-Corasick).
+# Every pattern is compiled once into a single automaton; scanning a text is
+# then one pass over its characters that reports every occurrence of every
+# pattern, so the cost per field does not grow with the number of patterns.
+# Used for role labels (job_normalizer.py), skill aliases (skill_normalizer.py)
+# and place names (gazetteer.py).
+
+class Automaton:
+    def __init__(self, patterns=()):
+        # patterns: iterable of (pattern, value). Later duplicates of a
+        # pattern are ignored, like the first-wins dict scans they replace.
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()] # state -> ((length, order, value), ...)
+        self.size = 0
+        for pattern, value in patterns:
+            self.add(pattern, value)
+        self.build()
+
+    def add(self, pattern, value):
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+            state = nxt
+        if not self.out[state]:
+            self.out[state] = ((len(pattern), self.size, value),)
+            self.size += 1
+
+    def build(self):
+        # Breadth-first failure links; each state also reports the patterns of
+        # its failure chain (the suffixes of what it matched). The failure
+        # links are then folded into the transitions, so scanning is one or
+        # two dict lookups per character with no backtracking. The root's
+        # edges are left out of the folded tables and looked up last.
+        root = self.goto[0]
+        self.delta = [{} for _ in self.goto]
+        queue = deque(root.values())
+        while queue:
+            state = queue.popleft()
+            f = self.fail[state]
+            self.delta[state] = {**self.delta[f], **self.goto[state]}
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                self.fail[nxt] = self.delta[f].get(ch) or root.get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_matches(self, text):
+        # -> (start, end, order, value) for every occurrence, by end position
+        root, delta, out = self.goto[0], self.delta, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch) or root.get(ch, 0)
+            if out[state]:
+                for length, order, value in out[state]:
+                    yield i + 1 - length, i + 1, order, value
+
+    def longest(self, text, accept=None):
+        # Value of the longest match; ties go to the earliest in the text,
+        # then to the pattern added first. accept(text, start, end) can
+        # reject a match (e.g. one not on a token boundary).
+        best = None
+        for start, end, order, value in self.iter_matches(text):
+            if accept and not accept(text, start, end):
+                continue
+            key = (end - start, -start, -order)
+            if best is None or key > best[0]:
+                best = (key, value)
+        return best[1] if best else None
+
+    def leftmost_longest(self, text, accept=None):
+        # -> [(start, end, value)] for every non-overlapping match, left to
+        # right. Where matches overlap, the one starting first wins, then the
+        # longest: '東京都' is read as 東京都, not as 東 + 京都.
+        found = sorted((m for m in self.iter_matches(text) if not accept or accept(text, m[0], m[1])),
+                       key=lambda m: (m[0], m[0] - m[1], m[2]))
+        picked = []
+        last_end = 0
+        for start, end, order, value in found:
+            if start >= last_end:
+                picked.append((start, end, value))
+                last_end = end
+        return picked
+
+
+def _ascii_word(ch):
+    return ch.isascii() and ch.isalnum()
+
+def on_token_boundary(text, start, end):
+    # accept= rule for matches inside words: an ASCII pattern may not touch
+    # ASCII letters or digits ('ts' is not in 'tests', 'go' is not in
+    # 'google'), while kana/kanji next to it are a boundary, since Japanese
+    # does not separate words with spaces ('aws' in 'aws構築').
+    if _ascii_word(text[start]) and start > 0 and _ascii_word(text[start - 1]):
+        return False
+    if _ascii_word(text[end - 1]) and end < len(text) and _ascii_word(text[end]):
+        return False
+    return True
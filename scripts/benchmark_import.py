@@ -0,0 +1,459 @@
+import argparse
+import contextlib
+import csv
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+
+from normalize_cache import clear_cache
+from price_parser import parse_prices
+from job_normalizer import (
+    ROLE_SLUG_MAP, CSV_FILENAME, iter_csv_rows, read_csv_rows, build_roles_registry, normalize_row, price_column, dedupe_job_code,
+    location_row, role_row, skill_row, job_row, job_skill_rows,
+)
+
+# Import pipeline benchmarks on synthetic feeds.
+# Writes Tech@DB_ver1.2-shaped CSVs (9 columns, real role labels, skill
+# aliases and Japanese location strings) at each size and runs the pipeline
+# stages on them one by one, recording wall time and peak Python heap
+# (tracemalloc) per stage. Every run is appended to benchmarks/import.jsonl
+# and compared with the previous run of the same sizes, so a regression shows
+# up as a slower or fatter stage.
+#
+# Usage:
+#   python scripts/benchmark_import.py                      # 1k, 10k, 100k
+#   python scripts/benchmark_import.py --sizes 1000 --stages csv_read,normalize
+#   python scripts/benchmark_import.py --sizes 10000 --fail-on-regression
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(os.path.dirname(SCRIPTS_DIR), 'benchmarks', 'import.jsonl')
+DEFAULT_SIZES = (1000, 10000, 100000)
+REGRESSION_THRESHOLD = 0.2 # 20% slower or bigger than the previous run
+
+# --- Synthetic feed ---
+
+HEADER = ['ID', '案件名', '職種', '技術スキル', '金額', '勤務地', '案件概要', '開発環境', '募集条件']
+
+# Skill cells as they appear in partner feeds: canonical names, aliases,
+# versions in brackets, Japanese suffixes, and a long tail of free text
+SKILL_TERMS = [
+    'Java', 'Java(Spring Boot)', 'SpringBoot', 'PHP', 'Laravel', 'CakePHP', 'Python', 'Django', 'Flask',
+    'pandas', 'Ruby', 'Ruby on Rails', 'Go', 'Golang', 'Go言語', 'JavaScript', 'jQuery', 'Node.js',
+    'TypeScript', 'HTML', 'CSS', 'SCSS', 'SQL', 'MySQL', 'PostgreSQL', 'Oracle', 'SQL Server', 'C#', '.NET',
+    'Unity', 'C++', 'Swift', 'iOS', 'Kotlin', 'Android', 'React', 'React.js', 'Next.js', 'Vue.js', 'Nuxt',
+    'Angular', 'Flutter', 'AWS', 'AWS構築', 'EC2', 'Lambda', 'ECS', 'Azure', 'Active Directory', 'GCP',
+    'BigQuery', 'Firebase', 'Linux', 'RHEL', 'CentOS', 'シェルスクリプト', 'Windows Server', 'PowerShell',
+    'Docker', 'Kubernetes', 'k8s', 'Terraform', 'Ansible', 'CircleCI', 'Jenkins', 'GitHub', 'Git',
+    'Salesforce', 'Apex', 'SAP', 'ABAP', 'Slack', 'Jira', 'Tableau', 'VMware', 'vSphere', 'Nutanix', 'JP1',
+    'ServiceNow', 'Figma', 'Photoshop', 'Illustrator', 'Excel VBA', 'COBOL', 'RPA(UiPath)', 'Cisco',
+    'Fortigate', 'Zabbix', '要件定義', '基本設計', '詳細設計', 'テスト設計',
+]
+
+# Location cells: prefectures, wards, stations, remote markers and noise
+LOCATION_TERMS = [
+    '東京都渋谷区', '東京都港区（六本木）', '東京都千代田区 大手町', '品川駅', '新宿', '西葛西', '東京（リモート併用）',
+    '神奈川県横浜市', '川崎', '武蔵小杉', '千葉県千葉市美浜区（幕張）', '船橋', '埼玉県さいたま市（大宮）',
+    '大阪府大阪市北区 梅田', '難波', '愛知県名古屋市', '福岡県福岡市博多区', '北海道札幌市', '兵庫県神戸市',
+    '京都府京都市', 'フルリモート', 'リモート（出社なし）', '在宅', '基本リモート（月1出社：東京）', '客先常駐',
+]
+
+PRICE_TERMS = [
+    '{a}万円', '{a}万円/月', '〜{a}万円', '{a}~{b}万円', '{a}〜{b}万円', '{a},0000円', '月額{a}万円程度',
+    '{y}円', 'スキル見合い', '',
+]
+
+TITLE_SUFFIXES = ['案件', '募集', '（フルリモート可）', '／長期', '【急募】', '（週4日〜）']
+
+def synthetic_row(rng, i, job_code):
+    label = rng.choice(list(ROLE_SLUG_MAP))
+    skills = rng.sample(SKILL_TERMS, rng.randint(2, 8))
+    sep = rng.choice([', ', '、', '\n'])
+    a = rng.randint(40, 120)
+    price = rng.choice(PRICE_TERMS).format(a=a, b=a + rng.randint(5, 30), y=a * 10000)
+    location = rng.choice(LOCATION_TERMS)
+    remote = rng.random() < 0.3
+    return [
+        job_code,
+        f"{rng.choice(skills)}を用いた{label}{rng.choice(TITLE_SUFFIXES)}",
+        label if rng.random() < 0.85 else f"{label}/{rng.choice(list(ROLE_SLUG_MAP))}",
+        sep.join(skills),
+        price,
+        location,
+        f"大手企業向けシステムの開発案件です。\n{label}として{skills[0]}を用いた開発をご担当いただきます。\n案件番号 {i}",
+        ' / '.join(skills[:4]),
+        f"・{skills[0]}の実務経験3年以上\n・{'フルリモート' if remote else '週3日出社'}\n・{rng.randint(1, 5)}ヶ月以上の長期",
+    ]
+
+def generate_feed(path, n, seed=0):
+    # ~2% of rows reuse an earlier job code, to exercise job_code dedupe
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(n):
+            code = f"J{rng.randint(0, max(i - 1, 0)):06d}" if i and rng.random() < 0.02 else f"J{i:06d}"
+            writer.writerow(synthetic_row(rng, i, code))
+    return path
+
+# --- Stand-in server ---
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+@contextlib.contextmanager
+def standin_server():
+    # Separate process, so its heap and CPU stay out of the measurements
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, os.path.join(SCRIPTS_DIR, 'postgrest_standin.py'), '--port', str(port)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"{url}/rest/v1/roles?limit=1", timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait()
+
+# --- Stages ---
+# Each stage takes the shared state dict, adds its outputs to it and returns
+# the number of rows it handled.
+
+def stage_csv_read(state):
+    state['rows'] = read_csv_rows(state['csv_path'])
+    return len(state['rows'])
+
+def stage_normalize(state):
+    registry = build_roles_registry()
+    locations = {}
+    jobs = []
+    prices = price_column(state['rows'])
+    for i, row in enumerate(state['rows']):
+        job = normalize_row(i, row, registry, locations, prices[i])
+        if job is not None:
+            jobs.append(job)
+    state.update(roles_registry=registry, locations_registry=locations, jobs=jobs)
+    return len(state['rows'])
+
+def stage_normalize_warm(state):
+    # normalize again with the memos it filled: a repeat feed (--norm-cache)
+    return stage_normalize(state)
+
+def legacy_parse_price(price_raw):
+    # The per-row loop every importer used before price_parser.py, kept as
+    # the baseline for price_batch
+    min_p = 0
+    max_p = 0
+    price_digits = re.findall(r'(\d+)', price_raw.replace(',', ''))
+    if price_digits:
+        vals = [int(v) for v in price_digits]
+        vals = [v * 10000 if v < 2000 else v for v in vals]
+        if len(vals) >= 2:
+            min_p, max_p = vals[0], vals[1]
+        elif len(vals) == 1:
+            v = vals[0]
+            min_p, max_p = max(0, v - 50000), v + 50000
+    return min_p, max_p
+
+def stage_price_loop(state):
+    prices = [legacy_parse_price(row[4]) for row in state['rows'] if len(row) >= 9]
+    return len(prices)
+
+def stage_price_batch(state):
+    prices = parse_prices([row[4] for row in state['rows'] if len(row) >= 9])
+    return len(prices['price_min'])
+
+def stage_normalize_parallel(state):
+    # csv_read + normalize in worker processes (--workers); the parent's heap only
+    from parallel_ingest import parallel_normalize
+    rows, jobs, _ = parallel_normalize(state['csv_path'], state['workers'])
+    return rows
+
+def stage_dedupe(state):
+    seen = {}
+    for job in state['jobs']:
+        dedupe_job_code(job, seen)
+    return len(state['jobs'])
+
+def stage_payloads(state):
+    jobs = state['jobs']
+    skill_names = sorted({name for job in jobs for name in job['skills']})
+    skills = [skill_row(name) for name in skill_names]
+    state['payload'] = {
+        'roles': [role_row(info) for info in state['roles_registry'].values()],
+        'locations': [location_row(info) for info in state['locations_registry'].values()],
+        'skills': skills,
+        'jobs': [job_row(job) for job in jobs],
+        'job_skills': job_skill_rows(jobs, {row['name']: row['id'] for row in skills}),
+    }
+    return sum(len(rows) for rows in state['payload'].values())
+
+def standin_api(url, concurrency):
+    from supabase_client import SupabaseClient
+    client = SupabaseClient(url, 'local', pool_size=concurrency, bulk_write=True)
+    api_request = lambda endpoint, method='GET', data=None, params=None, headers=None: \
+        client.request(endpoint, method, data=data, params=params, headers=headers)
+    return client, api_request
+
+def stage_upload(state):
+    # Full upload through the shared client and scheduler, into a fresh stand-in
+    from upload_scheduler import schedule_catalog_upload
+    payload = state['payload']
+    with standin_server() as url:
+        client, api_request = standin_api(url, state['concurrency'])
+        scheduler = schedule_catalog_upload(api_request, payload['locations'], payload['roles'], payload['skills'],
+                                            payload['jobs'], payload['job_skills'], concurrency=state['concurrency'])
+        client.close()
+    if scheduler.failures():
+        raise RuntimeError(f"{len(scheduler.failures())} upload batches failed")
+    return sum(len(rows) for rows in payload.values())
+
+def stage_stream(state):
+    # The --stream generators end to end into a sink that only builds the
+    # request rows: read, normalize, dedupe and payloads in bounded memory
+    from job_pipeline import normalized_jobs, deduped_jobs, job_batches
+    registry = build_roles_registry()
+    jobs = deduped_jobs(normalized_jobs(iter_csv_rows(state['csv_path']), registry, {}))
+    rows = 0
+    for _, batch in job_batches(jobs):
+        skill_ids = {name: name for job in batch for name in job['skills']}
+        rows += len([job_row(job) for job in batch]) + len(job_skill_rows(batch, skill_ids))
+    return rows
+
+def stage_stream_upload(state):
+    # import_ver1_2.py --stream against a fresh stand-in
+    from job_pipeline import stream_catalog_upload
+    with standin_server() as url:
+        client, api_request = standin_api(url, state['concurrency'])
+        sink = stream_catalog_upload(api_request, state['csv_path'], concurrency=state['concurrency'])
+        client.close()
+    if sink.failed:
+        raise RuntimeError(f"{len(sink.failed)} stream batches failed")
+    return sink.sent['jobs'] + sink.sent['job_skills']
+
+def run_seed_script(state, module_name, argv=None):
+    # The seed generators read the CSV from, and write SQL under, the cwd
+    module = __import__(module_name)
+    workdir = state['seed_dir']
+    os.makedirs(os.path.join(workdir, 'supabase'), exist_ok=True)
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        if argv is None:
+            module.main()
+        else:
+            module.main(argv)
+    finally:
+        os.chdir(previous)
+    return len(state['rows'])
+
+def stage_seed_sql(state):
+    return run_seed_script(state, 'convert_csv_to_seed', [])
+
+def stage_split_seed_sql(state):
+    return run_seed_script(state, 'generate_split_seed')
+
+STAGES = {
+    'csv_read': stage_csv_read,
+    'normalize': stage_normalize,
+    'normalize_warm': stage_normalize_warm,
+    'normalize_parallel': stage_normalize_parallel,
+    'price_loop': stage_price_loop,
+    'price_batch': stage_price_batch,
+    'dedupe': stage_dedupe,
+    'payloads': stage_payloads,
+    'upload': stage_upload,
+    'stream': stage_stream,
+    'stream_upload': stage_stream_upload,
+    'seed_sql': stage_seed_sql,
+    'split_seed_sql': stage_split_seed_sql,
+}
+
+# Stages whose state a stage reads; run unmeasured when not selected
+REQUIRES = {
+    'normalize': 'csv_read',
+    'normalize_warm': 'normalize',
+    'price_loop': 'csv_read',
+    'price_batch': 'csv_read',
+    'dedupe': 'normalize',
+    'payloads': 'dedupe',
+    'upload': 'payloads',
+    'seed_sql': 'csv_read',
+    'split_seed_sql': 'csv_read',
+}
+
+# Stages that run on the normalization memos of the stage before them; every
+# other stage starts cold, as a fresh process would
+WARM_STAGES = {'normalize_warm'}
+
+# --- Runner ---
+
+def measure(fn, state, memory=True):
+    gc.collect()
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        rows = fn(state)
+    seconds = time.perf_counter() - started
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    result = {'seconds': round(seconds, 4), 'rows': rows}
+    if peak is not None:
+        result['peak_mb'] = round(peak / (1 << 20), 2)
+    if rows and seconds:
+        result['rows_per_sec'] = round(rows / seconds, 1)
+    return result
+
+def run_size(n, stages, workdir, seed=0, memory=True, concurrency=4, workers=4):
+    seed_dir = os.path.join(workdir, f"seed_{n}")
+    os.makedirs(seed_dir, exist_ok=True)
+    csv_path = os.path.join(seed_dir, CSV_FILENAME)
+    generate_feed(csv_path, n, seed)
+    state = {'csv_path': csv_path, 'seed_dir': seed_dir, 'concurrency': concurrency, 'workers': workers}
+    results = {}
+    for name, fn in STAGES.items():
+        if name not in WARM_STAGES:
+            clear_cache()
+        if name in stages:
+            results[name] = measure(fn, state, memory)
+            print(f"  {n:>7} rows  {name:<18} {format_result(results[name])}")
+        elif any(name in required_stages(s) for s in stages):
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                fn(state)
+    return {'csv_bytes': os.path.getsize(csv_path), 'stages': results}
+
+def required_stages(name):
+    required = []
+    while name in REQUIRES:
+        name = REQUIRES[name]
+        required.append(name)
+    return required
+
+def format_result(result):
+    text = f"{result['seconds']:>9.3f}s"
+    if 'peak_mb' in result:
+        text += f"  peak {result['peak_mb']:>8.1f} MB"
+    if 'rows_per_sec' in result:
+        text += f"  {result['rows_per_sec']:>10.0f} rows/s"
+    return text
+
+# --- History ---
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def compare(previous, current, threshold=REGRESSION_THRESHOLD):
+    # -> [(size, stage, metric, before, after)] for metrics that grew past threshold
+    regressions = []
+    for size, result in current['results'].items():
+        before_stages = previous['results'].get(size, {}).get('stages', {})
+        for stage, after in result['stages'].items():
+            before = before_stages.get(stage)
+            if not before:
+                continue
+            for metric in ('seconds', 'peak_mb'):
+                if before.get(metric) and after.get(metric) is not None \
+                        and after[metric] > before[metric] * (1 + threshold):
+                    regressions.append((size, stage, metric, before[metric], after[metric]))
+    return regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the job import pipeline on synthetic feeds.")
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help="Comma-separated feed sizes in rows")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma-separated stages ({', '.join(STAGES)})")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the synthetic feeds")
+    parser.add_argument('--concurrency', type=int, default=4, help="Upload stage: batches in flight")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="normalize_parallel stage: worker processes")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip tracemalloc (faster, time only; peak memory is not recorded)")
+    parser.add_argument('--results', default=RESULTS_PATH, help="JSON lines file the run is appended to")
+    parser.add_argument('--label', default=None, help="Free-form note stored with the run")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative increase reported as a regression")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Exit 1 if any stage regressed")
+    parser.add_argument('--keep', action='store_true', help="Keep the generated feeds and seed SQL")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"Error: unknown stages {unknown}; choose from {list(STAGES)}")
+        sys.exit(1)
+
+    run = {
+        'at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'label': args.label,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'memory': not args.no_memory,
+        'workers': args.workers,
+        'results': {},
+    }
+    workdir = tempfile.mkdtemp(prefix='import-bench-')
+    print(f"--- Import benchmark ({run['revision'] or 'no git'}), feeds in {workdir} ---")
+    try:
+        for n in sizes:
+            run['results'][str(n)] = run_size(n, stages, workdir, seed=args.seed, memory=not args.no_memory,
+                                             concurrency=args.concurrency, workers=args.workers)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # Compare with the last comparable run (same seed, memory setting)
+    history = [r for r in load_history(args.results) if r.get('seed') == run['seed'] and r.get('memory') == run['memory']]
+    regressions = compare(history[-1], run, args.threshold) if history else []
+    if history:
+        print(f"Compared with {history[-1]['revision']} ({history[-1]['at']}):")
+        for size, stage, metric, before, after in regressions:
+            print(f"  REGRESSION {size} rows {stage} {metric}: {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+        if not regressions:
+            print(f"  no stage more than {args.threshold * 100:.0f}% slower or larger")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+    with open(args.results, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run, ensure_ascii=False) + '\n')
+    print(f"Results appended to {args.results}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from job_normalizer import skill_row, job_row, job_skill_rows
+from job_sync import job_content_hash
+from master_sync import reconcile_masters, remap_job_masters
+from supabase_client import BATCH_BYTES
+from upload_scheduler import schedule_catalog_upload
+
+# Zero-downtime full reload (--staging).
+# Everything is bulk-loaded into the staging_* tables and then promoted to
+# the live tables by promote_catalog_staging() in a single transaction (see
+# supabase/migrations/20261019_catalog_staging_swap.sql). The live catalog is
+# never emptied: readers see the old catalog until the promote commits, and a
+# failed load or check leaves it untouched.
+# --rpc sends the same payload through a database function instead of the
+# staging tables' REST endpoints (see load_via_rpc below).
+
+STAGING_PREFIX = 'staging_'
+
+def staged_masters(role_rows, location_rows, skill_names, role_ids, loc_ids, skill_ids_map):
+    # Local master rows re-keyed to the live ids they resolved to
+    roles = []
+    for row in role_rows:
+        row = dict(row, id=role_ids[row['id']])
+        if row['parent_id']:
+            row['parent_id'] = role_ids.get(row['parent_id'], row['parent_id'])
+        roles.append(row)
+    locations = [dict(row, id=loc_ids[row['id']]) for row in location_rows]
+    skills = [skill_row(name, skill_ids_map[name]) for name in skill_names]
+    return roles, locations, skills
+
+def build_catalog_payload(api_request, role_rows, location_rows, jobs_data):
+    # -> {table: rows} for the staging tables, keyed to the live master ids
+    role_slug_by_id = {r['id']: r['slug'] for r in role_rows}
+    loc_slug_by_id = {r['id']: r['slug'] for r in location_rows}
+    for job in jobs_data:
+        # Stored so a later --sync run sees these jobs as unchanged
+        job['content_hash'] = job_content_hash(job, role_slug_by_id.get(job['role_id']),
+                                               loc_slug_by_id.get(job['location_id']))
+
+    # Resolve ids against the live masters without writing to them
+    skill_names = sorted({name for job in jobs_data for name in job['skills']})
+    role_ids, loc_ids, skill_ids_map = reconcile_masters(api_request, role_rows, location_rows, skill_names,
+                                                         insert=False)
+    remap_job_masters(jobs_data, role_ids, loc_ids)
+    roles, locations, skills = staged_masters(role_rows, location_rows, skill_names, role_ids, loc_ids, skill_ids_map)
+    return {
+        'roles': roles,
+        'locations': locations,
+        'skills': skills,
+        'jobs': [dict(job_row(job), content_hash=job['content_hash']) for job in jobs_data],
+        'job_skills': job_skill_rows(jobs_data, skill_ids_map),
+    }
+
+def payload_counts(payload):
+    return {table: len(rows) for table, rows in payload.items()}
+
+def load_via_staging(api_request, role_rows, location_rows, jobs_data, concurrency=4, prune_masters=False,
+                     batch_bytes=BATCH_BYTES):
+    print("--- Staging Load ---")
+    payload = build_catalog_payload(api_request, role_rows, location_rows, jobs_data)
+
+    api_request('rpc/reset_catalog_staging', 'POST', data={})
+    print(f"Staging {len(payload['jobs'])} jobs, {len(payload['job_skills'])} job_skills (concurrency {concurrency})...")
+    scheduler = schedule_catalog_upload(api_request, payload['locations'], payload['roles'], payload['skills'],
+                                        payload['jobs'], payload['job_skills'],
+                                        concurrency=concurrency, batch_bytes=batch_bytes, table_prefix=STAGING_PREFIX)
+    if scheduler.failures():
+        # Nothing live has changed; the next run resets staging anyway
+        raise RuntimeError(f"{len(scheduler.failures())} staging uploads failed, catalog not promoted")
+
+    print("Promoting staging to live...")
+    result = api_request('rpc/promote_catalog_staging', 'POST',
+                         data={'expected': payload_counts(payload), 'prune_masters': prune_masters})
+    print(f"  Promoted: {result}")
+    return result
+
+# --- Single-request import (--rpc) ---
+# import_catalog() stages and promotes the whole payload inside one request's
+# transaction (supabase/migrations/20261019_import_catalog_rpc.sql).
+# With chunk_size, jobs are sent in chunks to stage_catalog() first and one
+# final promote applies them; the live tables still change in one transaction.
+
+def chunk_payload(payload, chunk_size):
+    # Masters go with the first chunk; each chunk carries its jobs' relations
+    relations_by_job = {}
+    for rel in payload['job_skills']:
+        relations_by_job.setdefault(rel['job_id'], []).append(rel)
+    for i in range(0, len(payload['jobs']), chunk_size):
+        jobs = payload['jobs'][i:i + chunk_size]
+        chunk = {'jobs': jobs, 'job_skills': [rel for job in jobs for rel in relations_by_job.get(job['id'], [])]}
+        if i == 0:
+            chunk.update(roles=payload['roles'], locations=payload['locations'], skills=payload['skills'])
+        yield i, chunk
+
+def load_via_rpc(api_request, role_rows, location_rows, jobs_data, chunk_size=0, prune_masters=False):
+    print("--- RPC Import ---")
+    payload = build_catalog_payload(api_request, role_rows, location_rows, jobs_data)
+    counts = payload_counts(payload)
+
+    if not chunk_size or chunk_size >= len(payload['jobs']):
+        print(f"Importing {counts} in one transaction...")
+        result = api_request('rpc/import_catalog', 'POST', data={'payload': payload, 'prune_masters': prune_masters})
+    else:
+        api_request('rpc/reset_catalog_staging', 'POST', data={})
+        for i, chunk in chunk_payload(payload, chunk_size):
+            api_request('rpc/stage_catalog', 'POST', data={'payload': chunk})
+            print(f"  Staged jobs {i} - {i+len(chunk['jobs'])}")
+        print("Promoting staging to live...")
+        result = api_request('rpc/promote_catalog_staging', 'POST', data={'expected': counts, 'prune_masters': prune_masters})
+    print(f"  Imported: {result}")
+    return result
@@ -1,14 +1,21 @@
+import argparse
 import csv
-import uuid
 import os
 import datetime
 import re
 import sys
 
+import stable_ids
+from gazetteer import prefecture_location, resolve_location
+from normalize_cache import load_cache, save_cache
+from parallel_ingest import map_chunks
+from price_parser import parse_price, price_rows
+from skill_normalizer import normalize_skills
+
 # --- Helper Functions ---
 
-def generate_uuid():
-    return str(uuid.uuid4())
+def role_slug(name):
+    return re.sub(r'[^a-z0-9]', '-', name.lower()) or 'role'
 
 # --- Mappings & Constants for Heuristics ---
 
@@ -19,254 +26,98 @@ HEURISTIC_ROLES = {
     'pm': {'name': 'PM/Director', 'parent': 'General', 'keywords': ['pm', 'project manager', 'director', 'pmo', 'マネージャー', 'リーダー', 'ディレクター']},
 }
 
-HEURISTIC_LOCATIONS = {
-    'tokyo': ['東京', '渋谷', '新宿', '六本木', '品川', '丸の内', '大手町', '西葛西', '神谷町', '飯田橋', '東中野', '勝どき', '浜松町', '秋葉原', '大崎', '吉祥寺', '池袋', '虎ノ門', '赤坂', '銀座', '日本橋'],
-    'kanagawa': ['神奈川', '横浜', '川崎', '武蔵小杉', 'yrp野比', '溝の口'],
-    'chiba': ['千葉', '船橋', '柏', '幕張', '西船橋'],
-    'saitama': ['埼玉', '大宮', '浦和', '川口'],
-    'osaka': ['大阪', '梅田', '難波', '淀屋橋'],
-}
-
 SKILLS_CACHE = {} # name -> uuid
 
-def main():
-    # Use the real user file
-    csv_path = os.path.join(os.getcwd(), 'Tech@DB_ver1.2 - to FB.csv')
-    if not os.path.exists(csv_path):
-        print(f"Error: CSV file not found at {csv_path}")
-        sys.exit(1)
-        
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-    except Exception as e:
-        print(f"Error reading CSV: {e}")
-        sys.exit(1)
-
-    if not rows:
-        print("Error: CSV file is empty")
-        sys.exit(1)
-
-    # Header is skipped implicitly by logic or handled if needed, assuming user row 1 is data? 
-    # Actually usually row 1 is header. Let's pop it safely if it looks like a header.
-    # Simple heuristic: is the first column "ID" or "案件名"? check column 1 for title if needed
-    if rows and len(rows[0]) > 0:
-        first_col = rows[0][0]
-        second_col = rows[0][1] if len(rows[0]) > 1 else ""
-        if "ID" in first_col or "案件名" in first_col or "案件名" in second_col:
-            rows.pop(0)
-
-    jobs_data = []
-    all_skills = set()
-    roles_registry = {} # name -> {id, parent_id}
-    locations_registry = {} # name -> id (norm name like '東京')
-
-    # Header: ID, 案件名, 技術スキル, 金額, 勤務地, 案件概要, 開発環境, 募集条件
-    
-    # 1. Pre-populate default roles for hierarchy
+def build_seed_roles_registry():
+    # name -> {id, parent_id}; the heuristic roles under their parent categories
+    roles_registry = {}
     for key, info in HEURISTIC_ROLES.items():
         # Ensure parent exists
         p_name = info['parent']
         if p_name not in roles_registry:
-            roles_registry[p_name] = {'id': generate_uuid(), 'parent_id': None}
+            roles_registry[p_name] = {'id': stable_ids.role_id(role_slug(p_name)), 'parent_id': None}
         
         # Add specific role
         r_name = info['name']
         if r_name not in roles_registry:
-            roles_registry[r_name] = {'id': generate_uuid(), 'parent_id': roles_registry[p_name]['id']}
+            roles_registry[r_name] = {'id': stable_ids.role_id(role_slug(r_name)), 'parent_id': roles_registry[p_name]['id']}
+    return roles_registry
+
+def normalize_seed_row(i, row, roles_registry, locations_registry, price=None):
+    # Returns the job dict, or None if the row is skipped. i is the row's
+    # index in the feed (job code of rows without an ID column).
+    # New locations are registered into locations_registry as a side effect.
+    # price: the row's entry from seed_price_column(), when the caller batches.
+    if len(row) < 7:
+        return None
+    
+    # New Column Mapping
+    if len(row) >= 8:
+        # Has ID column
+        job_code_raw = row[0]
+        title_raw = row[1]
+        tech_skills_raw = row[2]
+        price_raw = row[3]
+        location_raw = row[4]
+        summary_raw = row[5] # 案件概要
+        env_raw = row[6]     # 開発環境
+        req_raw = row[7]     # 募集条件
+    else:
+        # No ID column (7 cols)
+        job_code_raw = f"JOB-{i+1:05d}"
+        title_raw = row[0]
+        tech_skills_raw = row[1]
+        price_raw = row[2]
+        location_raw = row[3]
+        summary_raw = row[4]
+        env_raw = row[5]
+        req_raw = row[6]
+    
+    # --- A. Smart Parsing: Role ---
+    combined_text = (title_raw + " " + tech_skills_raw + " " + summary_raw).lower()
+    role_id = roles_registry['Backend']['id'] # Default
+    found_role = False
+    for key, info in HEURISTIC_ROLES.items():
+        if found_role: break
+        for kw in info['keywords']:
+            if kw.lower() in combined_text:
+                role_id = roles_registry[info['name']]['id']
+                found_role = True
+                break
+
+    # --- B. Smart Parsing: Location ---
+    # The prefecture of the place named (gazetteer.py); Tokyo when none is
+    loc = resolve_location(location_raw) or prefecture_location('東京')
+    if loc['slug'] not in locations_registry:
+        locations_registry[loc['slug']] = {'id': stable_ids.location_id(loc['slug']), 'name': loc['name'],
+                                           'region': loc['region']}
+    loc_id = locations_registry[loc['slug']]['id']
+
+    # --- C. Smart Parsing: Work Style ---
+    work_style = 'onsite'
+    if 'リモート' in location_raw or 'リモート' in req_raw:
+        if 'フル' in location_raw or 'フル' in req_raw:
+            work_style = 'remote'
+        else:
+            work_style = 'hybrid'
 
-    print(f"Analyzing {len(rows)} records...")
+    # --- D. Smart Parsing: Price ---
+    # Monthly yen range from the shared batch parser (price_parser.py)
+    min_p, max_p, _, _ = price if price is not None else parse_price(price_raw)
 
-    for i, row in enumerate(rows):
-        if len(row) < 7: continue
-        
-        # New Column Mapping
-        if len(row) >= 8:
-            # Has ID column
-            job_code_raw = row[0]
-            title_raw = row[1]
-            tech_skills_raw = row[2]
-            price_raw = row[3]
-            location_raw = row[4]
-            summary_raw = row[5] # 案件概要
-            env_raw = row[6]     # 開発環境
-            req_raw = row[7]     # 募集条件
-        else:
-            # No ID column (7 cols)
-            job_code_raw = f"JOB-{i+1:05d}"
-            title_raw = row[0]
-            tech_skills_raw = row[1]
-            price_raw = row[2]
-            location_raw = row[3]
-            summary_raw = row[4]
-            env_raw = row[5]
-            req_raw = row[6]
-        
-        # --- A. Smart Parsing: Role ---
-        combined_text = (title_raw + " " + tech_skills_raw + " " + summary_raw).lower()
-        role_id = roles_registry['Backend']['id'] # Default
-        found_role = False
-        for key, info in HEURISTIC_ROLES.items():
-            if found_role: break
-            for kw in info['keywords']:
-                if kw.lower() in combined_text:
-                    role_id = roles_registry[info['name']]['id']
-                    found_role = True
-                    break
-
-        # --- B. Smart Parsing: Location ---
-        norm_loc = '東京'
-        # Parse from Location column first
-        if location_raw:
-             for loc_key, keywords in HEURISTIC_LOCATIONS.items():
-                for kw in keywords:
-                    if kw in location_raw:
-                        norm_loc = loc_key.capitalize()
-                        break
-        
-        if norm_loc not in locations_registry:
-            locations_registry[norm_loc] = generate_uuid()
-        loc_id = locations_registry[norm_loc]
-
-        # --- C. Smart Parsing: Work Style ---
-        work_style = 'onsite'
-        if 'リモート' in location_raw or 'リモート' in req_raw:
-            if 'フル' in location_raw or 'フル' in req_raw:
-                work_style = 'remote'
-            else:
-                work_style = 'hybrid'
-
-        # --- D. Smart Parsing: Price ---
-        min_p = 0
-        max_p = 0
-        
-        # Handle "70万円程度" -> 65-75 or 70-70?
-        # Normalize: find all numbers
-        price_digits = re.findall(r'(\d+)', price_raw.replace(',', ''))
-        if price_digits:
-            vals = [int(v) for v in price_digits]
-            # Normalize to yen (if < 2000 assume man-yen)
-            vals = [v * 10000 if v < 2000 else v for v in vals]
-            
-            if len(vals) >= 2:
-                min_p, max_p = vals[0], vals[1]
-            elif len(vals) == 1:
-                v = vals[0]
-                min_p = max(0, v - 50000)
-                max_p = v + 50000
-        
-        if min_p == 0: min_p = 0
-        if max_p == 0: max_p = 0
+    # --- E. Parsing: Title ---
+    title = title_raw.strip()
+    if not title: title = 'エンジニア案件' # Fallback
+    
+    # --- F. Skills Cleaning & Normalization ---
+    # Canonical names (must match JobFilter.tsx) from the shared alias table;
+    # a token without an alias is kept if shorter than 30 chars
+    skills = normalize_skills(tech_skills_raw, max_unmatched_len=30)
 
-        # --- E. Parsing: Title ---
-        title = title_raw.strip()
-        if not title: title = 'エンジニア案件' # Fallback
-        
-        # --- F. Skills Cleaning & Normalization ---
-        # Define Canonical Skills (must match JobFilter.tsx) and their aliases/keywords
-        # Format: 'Canonical Name': ['alias1', 'alias2', 'substring_match']
-        SKILL_NORMALIZATION_MAP = {
-            # Languages
-            'Java': ['java', 'jdk', 'jee', 'j2ee', 'spring boot', 'springboot'], # SpringBoot implies Java context usually
-            'PHP': ['php', 'laravel', 'cakephp', 'symfony'],
-            'Python': ['python', 'django', 'flask', 'pandas', 'numpy'],
-            'Ruby': ['ruby', 'rails', 'ruby on rails'],
-            'Go言語': ['go', 'golang', 'go言語'],
-            'JavaScript': ['javascript', 'js', 'es6', 'jquery', 'node.js', 'nodejs', 'express'],
-            'TypeScript': ['typescript', 'ts'],
-            'HTML5': ['html', 'html5'],
-            'CSS3': ['css', 'css3', 'sass', 'scss'],
-            'SQL': ['sql', 'mysql', 'postgresql', 'postgres', 'oracle', 'sql server', 'mssql'],
-            'C#': ['c#', '.net', 'csharp', 'unity'],
-            'C++': ['c++', 'cpp', 'vc++'],
-            'Swift': ['swift', 'ios'],
-            'Kotlin': ['kotlin', 'android'],
-            
-            # Frameworks / Libs
-            'React': ['react', 'react.js', 'reactjs', 'next.js', 'nextjs'], # Next implies React
-            'Vue.js': ['vue', 'vue.js', 'vuejs', 'nuxt', 'nuxtjs'],
-            'Angular': ['angular', 'angularjs'],
-            'Laravel': ['laravel'],
-            'Spring': ['spring', 'spring boot', 'springboot', 'spring mvc'],
-            'Django': ['django'],
-            'Flask': ['flask'],
-            'Ruby on Rails': ['rails', 'ruby on rails'],
-            'Flutter': ['flutter', 'dart'],
-            
-            # Infra & Cloud
-            'AWS': ['aws', 'amazon web services', 'ec2', 's3', 'rds', 'lambda', 'ecs', 'eks', 'cloudwatch', 'cloudfront', 'aurora', 'dynamodb', 'fargate'],
-            'Microsoft Azure': ['azure', 'aks', 'entra id', 'active directory'],
-            'Google Cloud Platform(GCP)': ['gcp', 'google cloud', 'bigquery', 'gke', 'firebase'],
-            'Linux': ['linux', 'rhel', 'centos', 'ubuntu', 'redhat', 'unix', 'shell', 'bash'],
-            'WindowsServer': ['windows', 'windows server', 'wsus', 'powershell', 'ad', 'active directory'],
-            'Docker': ['docker', 'container'],
-            'Kubernetes': ['kubernetes', 'k8s'],
-            'Terraform': ['terraform', 'iac'],
-            'Ansible': ['ansible'],
-            'CircleCI': ['circleci'],
-            'Jenkins': ['jenkins'],
-            'GitHub': ['github', 'git'],
-            
-            # Other / Tools
-            'Salesforce': ['salesforce', 'sfa', 'crm', 'apex'],
-            'SAP': ['sap', 'abap', 'erp'],
-            'Slack': ['slack'],
-            'Jira': ['jira'],
-            'Tableau': ['tableau'],
-            'VMware': ['vmware', 'vsphere', 'esxi', 'vcenter'],
-            'Nutanix': ['nutanix'],
-            'JP1': ['jp1'],
-            'ServiceNow': ['servicenow']
-        }
-
-        # Inverse Map for easier lookup: alias -> Canonical
-        ALIAS_TO_CANONICAL = {}
-        for canonical, aliases in SKILL_NORMALIZATION_MAP.items():
-            # Add exact lower case match of canonical itself
-            ALIAS_TO_CANONICAL[canonical.lower()] = canonical
-            for alias in aliases:
-                ALIAS_TO_CANONICAL[alias.lower()] = canonical
-
-        skills = []
-        raw_skills = [s.strip() for s in re.split('[,、\n]', tech_skills_raw) if s.strip()]
-        for s in raw_skills:
-            # 1. Basic clean
-            clean_s = re.sub(r'\(.*?\)|（.*?）', '', s).strip()
-            if not clean_s: continue
-            
-            # 2. Normalization Check
-            s_lower = clean_s.lower()
-            normalized_name = None
-            
-            # Direct match or Alias match
-            if s_lower in ALIAS_TO_CANONICAL:
-                normalized_name = ALIAS_TO_CANONICAL[s_lower]
-            else:
-                # Partial match check (e.g. "AWS構築" -> matches "aws")
-                # We check if any alias is contained INSIDE the skill string
-                for alias, canonical in ALIAS_TO_CANONICAL.items():
-                    # Simple heuristic: alias must be at least 2 chars to avoid noise like 'c' matching 'cut'
-                    if len(alias) >= 2 and alias in s_lower:
-                        normalized_name = canonical
-                        break
-            
-            # 3. Add to list
-            if normalized_name:
-                if normalized_name not in skills:
-                    skills.append(normalized_name)
-                    all_skills.add(normalized_name)
-            else:
-                # Keep original if no match found, but limit length
-                if len(clean_s) < 30:
-                    if clean_s not in skills:
-                        skills.append(clean_s)
-                        all_skills.add(clean_s)
-
-        # --- G. Construction with Enhanced Formatting ---
-        
-        # description_md includes Summary and Tech Stack
-        formatted_desc = f"""
+    # --- G. Construction with Enhanced Formatting ---
+    
+    # description_md includes Summary and Tech Stack
+    formatted_desc = f"""
 ## 【案件概要】
 {summary_raw}
 
@@ -274,27 +125,97 @@ def main():
 {env_raw}
 """
 
-        formatted_req = f"""
+    formatted_req = f"""
 ## 【募集要項・条件】
 {req_raw}
 """
 
-        jobs_data.append({
-            'id': generate_uuid(),
-            'job_code': job_code_raw.strip(),
-            'title': title.replace("'", "''"),
-            'role_id': role_id,
-            'location_id': loc_id,
-            'work_style': work_style,
-            'price_min': min_p,
-            'price_max': max_p,
-            'description_md': formatted_desc.replace("'", "''").strip(),
-            'requirements_md': formatted_req.replace("'", "''").strip(),
-            'skills': skills
-        })
+    return {
+        'id': stable_ids.job_id(job_code_raw),
+        'job_code': job_code_raw.strip(),
+        'title': title.replace("'", "''"),
+        'role_id': role_id,
+        'location_id': loc_id,
+        'work_style': work_style,
+        'price_min': min_p,
+        'price_max': max_p,
+        'description_md': formatted_desc.replace("'", "''").strip(),
+        'requirements_md': formatted_req.replace("'", "''").strip(),
+        'skills': skills
+    }
+
+def seed_price_column(rows):
+    # -> [(price_min, price_max, unit, confidence)] per row, the whole column
+    # parsed in one batch
+    return price_rows([row[3] if len(row) >= 8 else row[2] if len(row) >= 7 else '' for row in rows])
+
+def normalize_seed_chunk(rows):
+    # Worker side of --workers. Rows without an ID column get their job code
+    # from the feed index, known only after the merge: their positions are
+    # returned so the parent can renumber them.
+    roles_registry = build_seed_roles_registry()
+    locations_registry = {}
+    jobs = []
+    renumber = []
+    prices = seed_price_column(rows)
+    for i, row in enumerate(rows):
+        job = normalize_seed_row(i, row, roles_registry, locations_registry, prices[i])
+        if job is None:
+            continue
+        if len(row) < 8:
+            renumber.append((len(jobs), i))
+        jobs.append(job)
+    return {'rows': len(rows), 'jobs': jobs, 'locations': locations_registry, 'renumber': renumber}
+
+def parallel_normalize_seed(csv_path, workers):
+    # -> (row count, jobs_data, locations_registry), as the serial loop builds them
+    jobs_data = []
+    locations_registry = {}
+    total = 0
+    for offset, result in map_chunks(csv_path, normalize_seed_chunk, workers):
+        for pos, i in result['renumber']:
+            job = result['jobs'][pos]
+            job['job_code'] = f"JOB-{offset+i+1:05d}"
+            job['id'] = stable_ids.job_id(job['job_code'])
+        for slug, info in result['locations'].items():
+            locations_registry.setdefault(slug, info)
+        jobs_data.extend(result['jobs'])
+        total = offset + result['rows']
+    return total, jobs_data, locations_registry
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate supabase/seed.sql from the job CSV.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Parse and normalize the CSV in this many processes (1 = in this process)")
+    parser.add_argument('--norm-cache', default=None, metavar='PATH',
+                        help="Keep normalization results in this file between runs (dropped when the mappings change)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Use the real user file
+    csv_path = os.path.join(os.getcwd(), 'Tech@DB_ver1.2 - to FB.csv')
+    if not os.path.exists(csv_path):
+        print(f"Error: CSV file not found at {csv_path}")
+        sys.exit(1)
+    if args.norm_cache:
+        print(f"Loaded {load_cache(args.norm_cache)} cached normalizations from {args.norm_cache}")
+
+    if args.workers > 1:
+        print(f"Analyzing records in {args.workers} worker processes...")
+        row_count, jobs_data, locations_registry = parallel_normalize_seed(csv_path, args.workers)
+        if not row_count:
+            print("Error: CSV file is empty")
+            sys.exit(1)
+    else:
+        jobs_data, locations_registry = normalize_seed_rows(csv_path)
+    if args.norm_cache:
+        save_cache(args.norm_cache)
+    roles_registry = build_seed_roles_registry()
+    all_skills = {name for job in jobs_data for name in job['skills']}
 
     # --- Generate SQL ---
-    
+
     current_time = datetime.datetime.now().isoformat()
     sql_parts = []
     
@@ -314,16 +235,8 @@ def main():
     if locations_registry:
         sql_parts.append("-- Locations")
         loc_values = []
-        # Normalization map for output
-        LOC_NORM_MAP = {'Tokyo': '東京', 'Kanagawa': '神奈川', 'Chiba': '千葉', 'Saitama': '埼玉', 'Osaka': '大阪'}
-        
-        seen_ids = set()
-        for name, id in locations_registry.items():
-            disp_name = LOC_NORM_MAP.get(name, name)
-            slug = re.sub(r'[^a-z0-9]', '-', name.lower()) or 'loc' # keep slug consistent-ish
-            if id not in seen_ids:
-                loc_values.append(f"('{id}', '日本', '{disp_name}', '{slug}')")
-                seen_ids.add(id)
+        for slug, info in locations_registry.items():
+            loc_values.append(f"('{info['id']}', '{info['region']}', '{info['name']}', '{slug}')")
         sql_parts.append("INSERT INTO public.locations (id, region, name, slug) VALUES\n" + ",\n".join(loc_values) + ";\n")
 
     # Roles
@@ -331,7 +244,7 @@ def main():
         sql_parts.append("-- Roles")
         role_values = []
         for name, info in roles_registry.items():
-            slug = re.sub(r'[^a-z0-0]', '-', name.lower()) or 'role'
+            slug = role_slug(name)
             p_id = f"'{info['parent_id']}'" if info['parent_id'] else "NULL"
             role_values.append(f"('{info['id']}', {p_id}, '{name}', '{slug}', 0)")
         sql_parts.append("INSERT INTO public.roles (id, parent_id, name, slug, sort_order) VALUES\n" + ",\n".join(role_values) + ";\n")
@@ -340,11 +253,10 @@ def main():
     if all_skills:
         sql_parts.append("-- Skills")
         skill_values = []
-        for name in list(all_skills)[:500]: # Cap skills to 500 for seed safety
-            id = generate_uuid()
+        for name in sorted(all_skills)[:500]: # Cap skills to 500 for seed safety
+            id = stable_ids.skill_id(name)
             SKILLS_CACHE[name] = id
-            slug = re.sub(r'[^a-z0-9]', '-', name.lower()) or 'sk'
-            skill_values.append(f"('{id}', '{name.replace('''''' , '''''')}', '{slug}-{id[:4]}', 0)")
+            skill_values.append(f"('{id}', '{name.replace('''''' , '''''')}', '{stable_ids.skill_slug(name)}', 0)")
         sql_parts.append("INSERT INTO public.skills (id, name, slug, sort_order) VALUES\n" + ",\n".join(skill_values) + ";\n")
 
     # Jobs
@@ -386,5 +298,43 @@ def main():
     print(f"Generated {len(all_skills)} unique skills.")
     print(f"Seed file: {output_path}")
 
+def normalize_seed_rows(csv_path):
+    # -> (jobs_data, locations_registry), in this process
+    try:
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            rows = list(reader)
+    except Exception as e:
+        print(f"Error reading CSV: {e}")
+        sys.exit(1)
+
+    if not rows:
+        print("Error: CSV file is empty")
+        sys.exit(1)
+
+    # Header is skipped implicitly by logic or handled if needed, assuming user row 1 is data? 
+    # Actually usually row 1 is header. Let's pop it safely if it looks like a header.
+    # Simple heuristic: is the first column "ID" or "案件名"? check column 1 for title if needed
+    if rows and len(rows[0]) > 0:
+        first_col = rows[0][0]
+        second_col = rows[0][1] if len(rows[0]) > 1 else ""
+        if "ID" in first_col or "案件名" in first_col or "案件名" in second_col:
+            rows.pop(0)
+
+    jobs_data = []
+    roles_registry = build_seed_roles_registry()
+    locations_registry = {} # slug -> {id, name, region}
+
+    # Header: ID, 案件名, 技術スキル, 金額, 勤務地, 案件概要, 開発環境, 募集条件
+    
+    print(f"Analyzing {len(rows)} records...")
+
+    prices = seed_price_column(rows)
+    for i, row in enumerate(rows):
+        job = normalize_seed_row(i, row, roles_registry, locations_registry, prices[i])
+        if job is not None:
+            jobs_data.append(job)
+    return jobs_data, locations_registry
+
 if __name__ == "__main__":
     main()
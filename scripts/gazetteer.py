@@ -0,0 +1,194 @@
+import unicodedata
+
+from aho_corasick import Automaton, on_token_boundary
+from normalize_cache import Memo
+
+# Place-name gazetteer for the location column.
+# Prefecture -> city/ward -> station/district names, all compiled into one
+# automaton at import. A location field is scanned once and every place it
+# mentions is found, whatever the number of names. Each place resolves to its
+# prefecture and region, which is what the locations table holds: one row per
+# prefecture (name '東京', slug 'tokyo'), with the region in 'region'.
+# Used by the REST importers (job_normalizer.py, the direct importer) and by
+# the SQL seed generators.
+
+# Short name -> (full name, slug, region). Short names and slugs are the
+# locations rows already in the DB ('東京' / 'tokyo'), so ids stay the same.
+PREFECTURES = {
+    '北海道': ('北海道', 'hokkaido', '北海道'),
+    '青森': ('青森県', 'aomori', '東北'),
+    '岩手': ('岩手県', 'iwate', '東北'),
+    '宮城': ('宮城県', 'miyagi', '東北'),
+    '秋田': ('秋田県', 'akita', '東北'),
+    '山形': ('山形県', 'yamagata', '東北'),
+    '福島': ('福島県', 'fukushima', '東北'),
+    '茨城': ('茨城県', 'ibaraki', '関東'),
+    '栃木': ('栃木県', 'tochigi', '関東'),
+    '群馬': ('群馬県', 'gunma', '関東'),
+    '埼玉': ('埼玉県', 'saitama', '関東'),
+    '千葉': ('千葉県', 'chiba', '関東'),
+    '東京': ('東京都', 'tokyo', '関東'),
+    '神奈川': ('神奈川県', 'kanagawa', '関東'),
+    '新潟': ('新潟県', 'niigata', '中部'),
+    '富山': ('富山県', 'toyama', '中部'),
+    '石川': ('石川県', 'ishikawa', '中部'),
+    '福井': ('福井県', 'fukui', '中部'),
+    '山梨': ('山梨県', 'yamanashi', '中部'),
+    '長野': ('長野県', 'nagano', '中部'),
+    '岐阜': ('岐阜県', 'gifu', '中部'),
+    '静岡': ('静岡県', 'shizuoka', '中部'),
+    '愛知': ('愛知県', 'aichi', '中部'),
+    '三重': ('三重県', 'mie', '近畿'),
+    '滋賀': ('滋賀県', 'shiga', '近畿'),
+    '京都': ('京都府', 'kyoto', '近畿'),
+    '大阪': ('大阪府', 'osaka', '近畿'),
+    '兵庫': ('兵庫県', 'hyogo', '近畿'),
+    '奈良': ('奈良県', 'nara', '近畿'),
+    '和歌山': ('和歌山県', 'wakayama', '近畿'),
+    '鳥取': ('鳥取県', 'tottori', '中国'),
+    '島根': ('島根県', 'shimane', '中国'),
+    '岡山': ('岡山県', 'okayama', '中国'),
+    '広島': ('広島県', 'hiroshima', '中国'),
+    '山口': ('山口県', 'yamaguchi', '中国'),
+    '徳島': ('徳島県', 'tokushima', '四国'),
+    '香川': ('香川県', 'kagawa', '四国'),
+    '愛媛': ('愛媛県', 'ehime', '四国'),
+    '高知': ('高知県', 'kochi', '四国'),
+    '福岡': ('福岡県', 'fukuoka', '九州・沖縄'),
+    '佐賀': ('佐賀県', 'saga', '九州・沖縄'),
+    '長崎': ('長崎県', 'nagasaki', '九州・沖縄'),
+    '熊本': ('熊本県', 'kumamoto', '九州・沖縄'),
+    '大分': ('大分県', 'oita', '九州・沖縄'),
+    '宮崎': ('宮崎県', 'miyazaki', '九州・沖縄'),
+    '鹿児島': ('鹿児島県', 'kagoshima', '九州・沖縄'),
+    '沖縄': ('沖縄県', 'okinawa', '九州・沖縄'),
+}
+
+# Prefecture -> cities and wards (designated cities, prefectural capitals,
+# Tokyo's 23 wards and the other cities job postings name)
+CITIES = {
+    '北海道': ['札幌', '旭川', '函館', '小樽', '帯広', '釧路', '苫小牧', 'sapporo'],
+    '青森': ['青森市', '八戸', '弘前'],
+    '岩手': ['盛岡'],
+    '宮城': ['仙台', 'sendai'],
+    '秋田': ['秋田市'],
+    '山形': ['山形市'],
+    '福島': ['福島市', '郡山', 'いわき市'],
+    '茨城': ['水戸', 'つくば', '日立市', '土浦', 'ひたちなか'],
+    '栃木': ['宇都宮', '小山市'],
+    '群馬': ['前橋', '高崎', '太田市'],
+    '埼玉': ['さいたま市', '川口', '川越', '所沢', '越谷', '草加', '春日部', '熊谷', '和光市', '戸田市', '朝霞',
+             '上尾', '入間', '狭山'],
+    '千葉': ['千葉市', '船橋', '市川市', '松戸', '柏市', '浦安', '習志野', '市原', '成田', '流山', '八千代'],
+    '東京': ['千代田区', '中央区', '港区', '新宿区', '文京区', '台東区', '墨田区', '江東区', '品川区', '目黒区',
+             '大田区', '世田谷区', '渋谷区', '中野区', '杉並区', '豊島区', '北区', '荒川区', '板橋区', '練馬区',
+             '足立区', '葛飾区', '江戸川区', '八王子', '立川', '武蔵野市', '三鷹', '府中', '調布', '町田',
+             '小金井', '国分寺', '国立市', '多摩市', '日野市', '西東京'],
+    '神奈川': ['横浜', '川崎', '相模原', '横須賀', '藤沢', '鎌倉', '厚木', '海老名', '大和市', '平塚', '茅ヶ崎',
+               '茅ケ崎', '小田原', 'yokohama', 'kawasaki'],
+    '新潟': ['新潟市', '長岡'],
+    '富山': ['富山市'],
+    '石川': ['金沢'],
+    '福井': ['福井市'],
+    '山梨': ['甲府'],
+    '長野': ['長野市', '松本市'],
+    '岐阜': ['岐阜市', '大垣'],
+    '静岡': ['静岡市', '浜松', '沼津', '富士市'],
+    '愛知': ['名古屋', '豊田市', '豊橋', '岡崎', '刈谷', '一宮', '春日井', '安城', '小牧', 'nagoya'],
+    '三重': ['津市', '四日市', '鈴鹿'],
+    '滋賀': ['大津', '草津市'],
+    '京都': ['京都市', '宇治'],
+    '大阪': ['大阪市', '堺市', '東大阪', '豊中', '吹田', '高槻', '枚方', '茨木'],
+    '兵庫': ['神戸', '姫路', '尼崎', '西宮', '明石', '芦屋', 'kobe'],
+    '奈良': ['奈良市'],
+    '和歌山': ['和歌山市'],
+    '鳥取': ['鳥取市'],
+    '島根': ['松江'],
+    '岡山': ['岡山市', '倉敷'],
+    '広島': ['広島市', '福山市'],
+    '山口': ['下関', '山口市'],
+    '徳島': ['徳島市'],
+    '香川': ['高松'],
+    '愛媛': ['松山'],
+    '高知': ['高知市'],
+    '福岡': ['福岡市', '北九州', '久留米'],
+    '佐賀': ['佐賀市'],
+    '長崎': ['長崎市', '佐世保'],
+    '熊本': ['熊本市'],
+    '大分': ['大分市'],
+    '宮崎': ['宮崎市'],
+    '鹿児島': ['鹿児島市'],
+    '沖縄': ['那覇', '浦添', '沖縄市'],
+}
+
+# Prefecture -> stations and business districts. Names shared by two
+# prefectures (京橋, 本町, 元町 ...) are left out rather than guessed.
+STATIONS = {
+    '北海道': ['すすきの', '新札幌'],
+    '宮城': ['仙台駅', '泉中央'],
+    '埼玉': ['大宮', 'さいたま新都心', '浦和', '武蔵浦和', '南浦和', '西川口', '志木', '新座', '与野', '戸田公園',
+             '新越谷', '南越谷'],
+    '千葉': ['幕張', '海浜幕張', '幕張本郷', '西船橋', '津田沼', '新浦安', '舞浜', '本八幡', '柏の葉', '蘇我', '稲毛',
+             '検見川浜', '行徳', '南行徳', '妙典'],
+    '東京': ['渋谷', '新宿', '西新宿', '六本木', '品川', '丸の内', '大手町', '西葛西', '神谷町', '飯田橋', '東中野',
+             '勝どき', '浜松町', '秋葉原', '大崎', '吉祥寺', '池袋', '虎ノ門', '赤坂', '銀座', '日本橋', '田町',
+             '五反田', '目黒', '恵比寿', '中目黒', '代官山', '有楽町', '新橋', '汐留', '御茶ノ水', '神田', '水道橋',
+             '九段下', '市ケ谷', '市ヶ谷', '四ツ谷', '四谷', '代々木', '原宿', '表参道', '青山', '外苑前', '中野',
+             '高田馬場', '目白', '上野', '御徒町', '錦糸町', '豊洲', '天王洲', '大井町', '蒲田', '北千住', '竹橋',
+             '半蔵門', '永田町', '溜池山王', '茅場町', '人形町', '八丁堀', '築地', '月島', 'お台場', '白金', '麻布',
+             '広尾', '二子玉川', '三軒茶屋', '下北沢', '新木場', '門前仲町', '清澄白河', '後楽園', '巣鴨', '赤羽',
+             '日暮里', '浅草', '押上', '両国', '亀戸', '八重洲', '三田', '高輪', '初台', '笹塚', '中野坂上', '荻窪',
+             '高円寺', '阿佐ヶ谷', '武蔵小山', '大森', '羽田', '小伝馬町', '馬喰町', '浅草橋', '岩本町', '神保町',
+             '竹芝', '芝浦', '芝公園', '御成門', '内幸町', '霞ケ関', '霞が関', '赤坂見附', '乃木坂', '麻布十番',
+             '新宿御苑', '神楽坂', '早稲田', '新大久保', '王子', '田端', '駒込', '茗荷谷', '日比谷', '大門',
+             '東京駅'],
+    '神奈川': ['みなとみらい', '桜木町', '関内', '新横浜', '武蔵小杉', '溝の口', '溝ノ口', '新川崎', '鶴見', '戸塚',
+               '大船', '上大岡', 'センター北', 'センター南', '日吉', '綱島', '石川町', '本厚木', '辻堂', '登戸',
+               '新百合ヶ丘', '長津田', '橋本', 'yrp野比'],
+    '愛知': ['名駅', '金山総合駅'],
+    '京都': ['四条烏丸', '烏丸御池', '河原町', '京都駅'],
+    '大阪': ['梅田', '西梅田', '東梅田', '北新地', '難波', 'なんば', '淀屋橋', '堺筋本町', '心斎橋', '天王寺',
+             '新大阪', '北浜', '江坂', '西中島南方', '肥後橋', '中之島', '天満橋', '谷町四丁目', '南森町', '弁天町',
+             '上本町', '千里中央'],
+    '兵庫': ['三宮', '三ノ宮'],
+    '福岡': ['博多', '天神', '中洲', '小倉'],
+}
+
+def _location(pref, place, kind):
+    full_name, slug, region = PREFECTURES[pref]
+    return {'name': pref, 'slug': slug, 'region': region, 'place': place, 'kind': kind}
+
+def prefecture_location(pref):
+    # The location dict for a prefecture short name ('東京')
+    return _location(pref, pref, 'prefecture')
+
+def _entries():
+    # Prefectures first: a name listed twice keeps its first meaning
+    for pref, (full_name, slug, region) in PREFECTURES.items():
+        for name in (full_name, pref, slug):
+            yield name, _location(pref, name, 'prefecture')
+    for kind, table in (('city', CITIES), ('station', STATIONS)):
+        for pref, names in table.items():
+            for name in names:
+                yield name.lower(), _location(pref, name, kind)
+
+PLACE_MATCHER = Automaton(_entries())
+
+def resolve_places(text):
+    # -> a location dict for every place mentioned, left to right. Full-width
+    # letters fold to ASCII and romaji must be a whole word ('Tokyo').
+    key = unicodedata.normalize('NFKC', text).lower()
+    return [value for _, _, value in PLACE_MATCHER.leftmost_longest(key, on_token_boundary)]
+
+def _resolve_location(text):
+    # -> the job's location: the first prefecture named, else the prefecture
+    # of the first city/station ('東京都港区' -> 東京, '渋谷' -> 東京); None
+    # when no place is mentioned ('フルリモート')
+    places = resolve_places(text)
+    for place in places:
+        if place['kind'] == 'prefecture':
+            return place
+    return places[0] if places else None
+
+# Memoized: raw field -> location dict (normalize_cache.py); callers must not modify it
+resolve_location = Memo('locations', _resolve_location, (PREFECTURES, CITIES, STATIONS))
@@ -1,14 +1,18 @@
 import csv
-import uuid
 import os
 import datetime
 import re
 import sys
 
+import stable_ids
+from gazetteer import prefecture_location, resolve_location
+from price_parser import parse_prices
+from skill_normalizer import normalize_skills
+
 # --- Helper Functions ---
 
-def generate_uuid():
-    return str(uuid.uuid4())
+def role_slug(name):
+    return re.sub(r'[^a-z0-9]', '-', name.lower()) or 'role'
 
 # --- Mappings & Constants for Heuristics ---
 
@@ -19,14 +23,6 @@ HEURISTIC_ROLES = {
     'pm': {'name': 'PM/Director', 'parent': 'General', 'keywords': ['pm', 'project manager', 'director', 'pmo', 'マネージャー', 'リーダー', 'ディレクター']},
 }
 
-HEURISTIC_LOCATIONS = {
-    'tokyo': ['東京', '渋谷', '新宿', '六本木', '品川', '丸の内', '大手町', '西葛西', '神谷町', '飯田橋', '東中野', '勝どき', '浜松町', '秋葉原', '大崎', '吉祥寺', '池袋', '虎ノ門', '赤坂', '銀座', '日本橋'],
-    'kanagawa': ['神奈川', '横浜', '川崎', '武蔵小杉', 'yrp野比', '溝の口'],
-    'chiba': ['千葉', '船橋', '柏', '幕張', '西船橋'],
-    'saitama': ['埼玉', '大宮', '浦和', '川口'],
-    'osaka': ['大阪', '梅田', '難波', '淀屋橋'],
-}
-
 SKILLS_CACHE = {} # name -> uuid
 
 def main():
@@ -63,13 +59,16 @@ def main():
     for key, info in HEURISTIC_ROLES.items():
         p_name = info['parent']
         if p_name not in roles_registry:
-            roles_registry[p_name] = {'id': generate_uuid(), 'parent_id': None}
+            roles_registry[p_name] = {'id': stable_ids.role_id(role_slug(p_name)), 'parent_id': None}
         r_name = info['name']
         if r_name not in roles_registry:
-            roles_registry[r_name] = {'id': generate_uuid(), 'parent_id': roles_registry[p_name]['id']}
+            roles_registry[r_name] = {'id': stable_ids.role_id(role_slug(r_name)), 'parent_id': roles_registry[p_name]['id']}
 
     print(f"Analyzing {len(rows)} records...")
 
+    # The whole price column in one batch (price_parser.py)
+    prices = parse_prices([row[3] if len(row) >= 8 else row[2] if len(row) >= 7 else '' for row in rows])
+
     for i, row in enumerate(rows):
         if len(row) < 7: continue
         
@@ -103,17 +102,11 @@ def main():
                     found_role = True
                     break
 
-        norm_loc = '東京'
-        if location_raw:
-             for loc_key, keywords in HEURISTIC_LOCATIONS.items():
-                for kw in keywords:
-                    if kw in location_raw:
-                        norm_loc = loc_key.capitalize()
-                        break
-        
-        if norm_loc not in locations_registry:
-            locations_registry[norm_loc] = generate_uuid()
-        loc_id = locations_registry[norm_loc]
+        loc = resolve_location(location_raw) or prefecture_location('東京')
+        if loc['slug'] not in locations_registry:
+            locations_registry[loc['slug']] = {'id': stable_ids.location_id(loc['slug']), 'name': loc['name'],
+                                               'region': loc['region']}
+        loc_id = locations_registry[loc['slug']]['id']
 
         work_style = 'onsite'
         if 'リモート' in location_raw or 'リモート' in req_raw:
@@ -122,101 +115,13 @@ def main():
             else:
                 work_style = 'hybrid'
 
-        min_p = 0
-        max_p = 0
-        price_digits = re.findall(r'(\d+)', price_raw.replace(',', ''))
-        if price_digits:
-            vals = [int(v) for v in price_digits]
-            vals = [v * 10000 if v < 2000 else v for v in vals]
-            if len(vals) >= 2:
-                min_p, max_p = vals[0], vals[1]
-            elif len(vals) == 1:
-                v = vals[0]
-                min_p, max(0, v - 50000)
-                max_p = v + 50000
+        min_p, max_p = prices['price_min'][i], prices['price_max'][i]
         
         title = title_raw.strip()
         if not title: title = 'エンジニア案件'
         
-        SKILL_NORMALIZATION_MAP = {
-            'Java': ['java', 'jdk', 'jee', 'j2ee', 'spring boot', 'springboot'],
-            'PHP': ['php', 'laravel', 'cakephp', 'symfony'],
-            'Python': ['python', 'django', 'flask', 'pandas', 'numpy'],
-            'Ruby': ['ruby', 'rails', 'ruby on rails'],
-            'Go言語': ['go', 'golang', 'go言語'],
-            'JavaScript': ['javascript', 'js', 'es6', 'jquery', 'node.js', 'nodejs', 'express'],
-            'TypeScript': ['typescript', 'ts'],
-            'HTML5': ['html', 'html5'],
-            'CSS3': ['css', 'css3', 'sass', 'scss'],
-            'SQL': ['sql', 'mysql', 'postgresql', 'postgres', 'oracle', 'sql server', 'mssql'],
-            'C#': ['c#', '.net', 'csharp', 'unity'],
-            'C++': ['c++', 'cpp', 'vc++'],
-            'Swift': ['swift', 'ios'],
-            'Kotlin': ['kotlin', 'android'],
-            'React': ['react', 'react.js', 'reactjs', 'next.js', 'nextjs'],
-            'Vue.js': ['vue', 'vue.js', 'vuejs', 'nuxt', 'nuxtjs'],
-            'Angular': ['angular', 'angularjs'],
-            'Laravel': ['laravel'],
-            'Spring': ['spring', 'spring boot', 'springboot', 'spring mvc'],
-            'Django': ['django'],
-            'Flask': ['flask'],
-            'Ruby on Rails': ['rails', 'ruby on rails'],
-            'Flutter': ['flutter', 'dart'],
-            'AWS': ['aws', 'amazon web services', 'ec2', 's3', 'rds', 'lambda', 'ecs', 'eks', 'cloudwatch', 'cloudfront', 'aurora', 'dynamodb', 'fargate'],
-            'Microsoft Azure': ['azure', 'aks', 'entra id', 'active directory'],
-            'Google Cloud Platform(GCP)': ['gcp', 'google cloud', 'bigquery', 'gke', 'firebase'],
-            'Linux': ['linux', 'rhel', 'centos', 'ubuntu', 'redhat', 'unix', 'shell', 'bash'],
-            'WindowsServer': ['windows', 'windows server', 'wsus', 'powershell', 'ad', 'active directory'],
-            'Docker': ['docker', 'container'],
-            'Kubernetes': ['kubernetes', 'k8s'],
-            'Terraform': ['terraform', 'iac'],
-            'Ansible': ['ansible'],
-            'CircleCI': ['circleci'],
-            'Jenkins': ['jenkins'],
-            'GitHub': ['github', 'git'],
-            'Salesforce': ['salesforce', 'sfa', 'crm', 'apex'],
-            'SAP': ['sap', 'abap', 'erp'],
-            'Slack': ['slack'],
-            'Jira': ['jira'],
-            'Tableau': ['tableau'],
-            'VMware': ['vmware', 'vsphere', 'esxi', 'vcenter'],
-            'Nutanix': ['nutanix'],
-            'JP1': ['jp1'],
-            'ServiceNow': ['servicenow']
-        }
-
-        ALIAS_TO_CANONICAL = {}
-        for canonical, aliases in SKILL_NORMALIZATION_MAP.items():
-            ALIAS_TO_CANONICAL[canonical.lower()] = canonical
-            for alias in aliases:
-                ALIAS_TO_CANONICAL[alias.lower()] = canonical
-
-        skills = []
-        raw_skills = [s.strip() for s in re.split('[,、\n]', tech_skills_raw) if s.strip()]
-        for s in raw_skills:
-            clean_s = re.sub(r'\(.*?\)|（.*?）', '', s).strip()
-            if not clean_s: continue
-            
-            s_lower = clean_s.lower()
-            normalized_name = None
-            
-            if s_lower in ALIAS_TO_CANONICAL:
-                normalized_name = ALIAS_TO_CANONICAL[s_lower]
-            else:
-                for alias, canonical in ALIAS_TO_CANONICAL.items():
-                    if len(alias) >= 2 and alias in s_lower:
-                        normalized_name = canonical
-                        break
-            
-            if normalized_name:
-                if normalized_name not in skills:
-                    skills.append(normalized_name)
-                    all_skills.add(normalized_name)
-            else:
-                if len(clean_s) < 30:
-                    if clean_s not in skills:
-                        skills.append(clean_s)
-                        all_skills.add(clean_s)
+        skills = normalize_skills(tech_skills_raw, max_unmatched_len=30)
+        all_skills.update(skills)
 
         formatted_desc = f"""
 ## 【案件概要】
@@ -231,7 +136,7 @@ def main():
 """
 
         jobs_data.append({
-            'id': generate_uuid(),
+            'id': stable_ids.job_id(job_code_raw),
             'job_code': job_code_raw.strip(),
             'title': title.replace("'", "''"),
             'role_id': role_id,
@@ -266,21 +171,15 @@ def main():
     if locations_registry:
         chunk1.append("-- Locations")
         loc_values = []
-        LOC_NORM_MAP = {'Tokyo': '東京', 'Kanagawa': '神奈川', 'Chiba': '千葉', 'Saitama': '埼玉', 'Osaka': '大阪'}
-        seen_ids = set()
-        for name, id in locations_registry.items():
-            disp_name = LOC_NORM_MAP.get(name, name)
-            slug = re.sub(r'[^a-z0-9]', '-', name.lower()) or 'loc'
-            if id not in seen_ids:
-                loc_values.append(f"('{id}', '日本', '{disp_name}', '{slug}')")
-                seen_ids.add(id)
+        for slug, info in locations_registry.items():
+            loc_values.append(f"('{info['id']}', '{info['region']}', '{info['name']}', '{slug}')")
         chunk1.append("INSERT INTO public.locations (id, region, name, slug) VALUES\n" + ",\n".join(loc_values) + ";\n")
 
     if roles_registry:
         chunk1.append("-- Roles")
         role_values = []
         for name, info in roles_registry.items():
-            slug = re.sub(r'[^a-z0-0]', '-', name.lower()) or 'role'
+            slug = role_slug(name)
             p_id = f"'{info['parent_id']}'" if info['parent_id'] else "NULL"
             role_values.append(f"('{info['id']}', {p_id}, '{name}', '{slug}', 0)")
         chunk1.append("INSERT INTO public.roles (id, parent_id, name, slug, sort_order) VALUES\n" + ",\n".join(role_values) + ";\n")
@@ -288,11 +187,10 @@ def main():
     if all_skills:
         chunk1.append("-- Skills")
         skill_values = []
-        for name in list(all_skills)[:500]:
-            id = generate_uuid()
+        for name in sorted(all_skills)[:500]:
+            id = stable_ids.skill_id(name)
             SKILLS_CACHE[name] = id
-            slug = re.sub(r'[^a-z0-9]', '-', name.lower()) or 'sk'
-            skill_values.append(f"('{id}', '{name.replace('''''' , '''''')}', '{slug}-{id[:4]}', 0)")
+            skill_values.append(f"('{id}', '{name.replace('''''' , '''''')}', '{stable_ids.skill_slug(name)}', 0)")
         chunk1.append("INSERT INTO public.skills (id, name, slug, sort_order) VALUES\n" + ",\n".join(skill_values) + ";\n")
     
     chunk1.append("COMMIT;")
@@ -0,0 +1,169 @@
+import datetime
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+from supabase_client import byte_batches
+
+# Checkpoint journal for resumable full reloads (--resume).
+# Append-only JSON lines next to the import logs: a 'start' record (run id,
+# hash of the CSV, --batch-bytes), the ids assigned to jobs and skills, a
+# 'plan' record per table with every batch's offset, size and first/last
+# key, and a 'done' record for every batch as soon as it has committed. A
+# --resume run replays the journal, keeps the recorded ids, cuts its batches
+# at the recorded offsets and skips every batch that is already in. It is
+# refused when the batch size or the recorded batches no longer match, as
+# a batch name would then stand for other rows. A batch can commit and the
+# process die before its 'done' record is written, so a resumed run sends
+# the remaining batches as ignore-duplicates inserts (upload_scheduler.py).
+
+DEFAULT_JOURNAL = 'import_journal.jsonl'
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ImportJournal:
+    def __init__(self, path, run_id, feed_hash, batch_bytes=None):
+        self.path = path
+        self.run_id = run_id
+        self.feed_hash = feed_hash
+        self.batch_bytes = batch_bytes
+        self.ids = {} # kind -> {natural key: id}
+        self.plans = {} # table -> [[start, count, first key, last key]]
+        self.done = set()
+        self.completed = False
+        self.resumed = False # loaded by --resume: batches not marked done may still have committed
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, path, feed_hash, batch_bytes=None):
+        run_id = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+        journal = cls(path, run_id, feed_hash, batch_bytes)
+        # A new run replaces the previous journal
+        open(path, 'w', encoding='utf-8').close()
+        journal._append({'event': 'start', 'run_id': run_id, 'feed_hash': feed_hash, 'batch_bytes': batch_bytes,
+                         'at': datetime.datetime.now().isoformat()})
+        return journal
+
+    @classmethod
+    def load(cls, path):
+        journal = None
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break # torn last line from a crash
+                event = rec.get('event')
+                if event == 'start':
+                    journal = cls(path, rec['run_id'], rec['feed_hash'], rec.get('batch_bytes'))
+                elif journal is None:
+                    continue
+                elif event == 'ids':
+                    journal.ids.setdefault(rec['kind'], {}).update(rec['ids'])
+                elif event == 'plan':
+                    journal.plans[rec['table']] = rec['batches']
+                elif event == 'done':
+                    journal.done.add(rec['task'])
+                elif event == 'complete':
+                    journal.completed = True
+        if journal is not None:
+            journal.resumed = True
+        return journal
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def assign_ids(self, kind, ids):
+        # ids: natural key -> id. Keys already journaled keep their recorded
+        # id; the rest are recorded now. Returns the merged mapping.
+        recorded = self.ids.setdefault(kind, {})
+        merged = {key: recorded.get(key, value) for key, value in ids.items()}
+        new = {key: value for key, value in merged.items() if key not in recorded}
+        if new:
+            recorded.update(new)
+            self._append({'event': 'ids', 'kind': kind, 'ids': new})
+        return merged
+
+    def batches(self, table, rows, batch_bytes, key):
+        # -> [(start, rows)] as byte_batches cuts them. The first run records
+        # the cut; a resumed run reuses it, so 'job batch 120' is the same
+        # rows in both. Raises ValueError when the rows no longer fit it.
+        plan = self.plans.get(table)
+        if plan is None:
+            batches = list(byte_batches(rows, batch_bytes))
+            self.plans[table] = [[start, len(batch), key(batch[0]), key(batch[-1])] for start, batch in batches]
+            self._append({'event': 'plan', 'table': table, 'batches': self.plans[table]})
+            return batches
+        batches = [(start, rows[start:start + count]) for start, count, _, _ in plan]
+        for (start, count, first, last), (_, batch) in zip(plan, batches):
+            if len(batch) != count or key(batch[0]) != first or key(batch[-1]) != last:
+                raise ValueError(f"{table} batch {start} of run {self.run_id} no longer holds the same rows; "
+                                 f"run a full import instead of --resume")
+        if sum(count for _, count, _, _ in plan) != len(rows):
+            raise ValueError(f"{table}: {len(rows)} rows, run {self.run_id} journaled "
+                             f"{sum(count for _, count, _, _ in plan)}; run a full import instead of --resume")
+        return batches
+
+    def is_done(self, task):
+        return task in self.done
+
+    def mark_done(self, task):
+        self.done.add(task)
+        self._append({'event': 'done', 'task': task})
+
+    def complete(self):
+        self.completed = True
+        self._append({'event': 'complete', 'at': datetime.datetime.now().isoformat()})
+
+
+def open_journal(path, feed_hash, resume=False, batch_bytes=None):
+    # Raises ValueError when there is nothing valid to resume
+    if not resume:
+        journal = ImportJournal.start(path, feed_hash, batch_bytes)
+        print(f"Import run {journal.run_id} (journal: {path})")
+        return journal
+    if not os.path.exists(path):
+        raise ValueError(f"no journal at {path} to resume")
+    journal = ImportJournal.load(path)
+    if journal is None:
+        raise ValueError(f"journal {path} has no start record")
+    if journal.completed:
+        raise ValueError(f"run {journal.run_id} already completed, nothing to resume")
+    if journal.feed_hash != feed_hash:
+        raise ValueError(f"CSV changed since run {journal.run_id}; run a full import instead of --resume")
+    if journal.batch_bytes != batch_bytes:
+        raise ValueError(f"run {journal.run_id} used --batch-bytes {journal.batch_bytes}; "
+                         f"resume with the same value")
+    print(f"Resuming run {journal.run_id}: {len(journal.done)} steps already committed")
+    return journal
+
+def assign_run_ids(journal, jobs_data, skill_ids_map):
+    # Jobs keep the id recorded for their job_code, skills for their name.
+    # Only the feed's skills are journaled: skill_ids_map also holds every
+    # other skill already in the remote table.
+    job_ids = journal.assign_ids('jobs', {job['job_code']: job['id'] for job in jobs_data})
+    for job in jobs_data:
+        job['id'] = job_ids[job['job_code']]
+    feed_skills = {name for job in jobs_data for name in job['skills']}
+    return journal.assign_ids('skills', {name: skill_ids_map[name] for name in feed_skills})
+
+def finish_run(journal, scheduler):
+    failed = scheduler.failures()
+    if failed:
+        print(f"Run {journal.run_id} incomplete: {len(failed)} batches not committed. "
+              f"Re-run with --resume to continue from the first failed batch.")
+    else:
+        journal.complete()
@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import os
+import sys
+import threading
+
+import stable_ids
+from supabase_client import BATCH_BYTES, load_env, AsyncSupabaseClient, fetch_all_async, post_split_async
+from job_pipeline import normalized_jobs, deduped_jobs, job_batches
+from normalize_cache import load_cache, save_cache, cache_stats
+from run_metrics import DEFAULT_METRICS, RunMetrics
+from job_normalizer import (
+    default_csv_path, iter_csv_rows, build_roles_registry,
+    location_row, role_row, skill_row, job_row, job_skill_rows,
+)
+
+# asyncio engine for the Ver 1.2 import.
+# Same parsing/normalization as import_ver1_2.py, but the CSV is streamed and
+# each batch of jobs is uploaded as soon as it is normalized, so parsing and
+# network I/O overlap instead of running one after the other. Parsing runs on
+# a worker thread; the event loop only picks up finished batches.
+#
+# Masters are reconciled like the sync importers do: existing roles,
+# locations and skills keep their ids and only new ones are inserted.
+# Ordering is kept per batch: a job batch waits for the new locations it
+# references; its job_skills wait for that job batch and for any new skills.
+
+# --- Configuration & Env Loading ---
+
+ENV = load_env()
+SUPABASE_URL = ENV.get('NEXT_PUBLIC_SUPABASE_URL')
+SERVICE_KEY = ENV.get('SUPABASE_SERVICE_ROLE_KEY')
+
+if not SUPABASE_URL or not SERVICE_KEY:
+    print("Error: Missing Supabase URL or Service Role Key in .env.local")
+    sys.exit(1)
+
+# PostgREST DELETE needs a filter; this one matches every row
+MATCH_ALL = 'neq.00000000-0000-0000-0000-000000000000'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import the job CSV into Supabase with the asyncio engine.")
+    parser.add_argument('--max-in-flight', type=int, default=8,
+                        help="Max concurrent HTTP requests (the limit starts lower and rises while responses stay fast)")
+    parser.add_argument('--batch-size', type=int, default=50, help="Max jobs per batch")
+    parser.add_argument('--batch-bytes', type=int, default=BATCH_BYTES,
+                        help="Target JSON payload size per jobs batch; rejected batches are split in half")
+    parser.add_argument('--bulk', action='store_true',
+                        help="Bulk-write mode: compact UTF-8 JSON, Prefer: return=minimal")
+    parser.add_argument('--gzip', action='store_true',
+                        help="--bulk: gzip request bodies (only for endpoints that decompress them; stock PostgREST does not)")
+    parser.add_argument('--csv', default=None, help="CSV path (default: ./Tech@DB_ver1.2 - to FB.csv)")
+    parser.add_argument('--reset-masters', action='store_true',
+                        help="Also delete roles/skills/locations instead of reusing their ids")
+    parser.add_argument('--metrics', default=DEFAULT_METRICS, help="Where to write the JSON run summary")
+    parser.add_argument('--insecure', action='store_true',
+                        help="Skip TLS certificate verification (self-signed dev endpoints only)")
+    parser.add_argument('--norm-cache', default=None, metavar='PATH',
+                        help="Keep normalization results in this file between runs (dropped when the mappings change)")
+    return parser.parse_args()
+
+
+class AsyncImporter:
+    def __init__(self, client, batch_size=50, max_pending_batches=16, reset_masters=False, batch_bytes=BATCH_BYTES):
+        self.client = client
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        # Backpressure: parsing pauses when this many batches are unsent
+        self.pending_batches = asyncio.Semaphore(max_pending_batches)
+        self.tasks = []
+        self.failed = []
+
+        self.reset_masters = reset_masters
+
+        self.roles_registry_by_slug = build_roles_registry()
+        self.role_ids = {} # local role id -> remote id
+        self.locations_registry = {}
+        self.remote_locations = {} # slug -> remote id
+        self.location_ids = {} # local location id -> remote id
+        self.location_tasks = {} # local location id -> upload task (new locations only)
+        self.remote_skills = {} # name -> remote id
+        self.skill_ids_map = {}
+        self.skill_tasks = {} # skill id -> upload task (new skills only)
+
+    def spawn(self, label, deps, table, payload):
+        async def run():
+            try:
+                if deps:
+                    await asyncio.gather(*deps)
+            except Exception:
+                self.failed.append(f"{label} (dependency failed)")
+                raise
+            try:
+                await post_split_async(self.client.request, table, payload)
+            except Exception as e:
+                print(f" Failed {label}: {e}")
+                self.failed.append(label)
+                raise
+            print(f"  Inserted {label}")
+
+        task = asyncio.create_task(run())
+        self.tasks.append(task)
+        return task
+
+    async def delete_existing(self):
+        print("Deleting existing data...")
+        try:
+            await self.client.request('job_skills', 'DELETE', params={'job_id': MATCH_ALL})
+            await self.client.request('jobs', 'DELETE', params={'id': MATCH_ALL})
+            if self.reset_masters:
+                await self.client.request('skills', 'DELETE', params={'id': MATCH_ALL})
+                await self.client.request('roles', 'DELETE', params={'id': MATCH_ALL})
+                await self.client.request('locations', 'DELETE', params={'id': MATCH_ALL})
+            print("Truncate complete.")
+        except Exception as e:
+            print(f"Warning during delete: {e}")
+
+    async def reconcile_masters(self):
+        print("Reconciling masters...")
+        remote_roles = {r['slug']: r['id'] for r in await fetch_all_async(self.client.request, 'roles', 'id,slug')}
+        missing = []
+        for info in self.roles_registry_by_slug.values():
+            if info['slug'] in remote_roles:
+                self.role_ids[info['id']] = remote_roles[info['slug']]
+            else:
+                self.role_ids[info['id']] = info['id']
+                missing.append(role_row(info))
+        # Parents before children
+        for group in ([r for r in missing if not r['parent_id']], [r for r in missing if r['parent_id']]):
+            for row in group:
+                if row['parent_id']:
+                    row['parent_id'] = self.role_ids.get(row['parent_id'], row['parent_id'])
+            if group:
+                await self.client.request('roles', 'POST', data=group)
+        print(f"  roles: {len(self.roles_registry_by_slug) - len(missing)} reused, {len(missing)} inserted")
+
+        self.remote_locations = {r['slug']: r['id'] for r in await fetch_all_async(self.client.request, 'locations', 'id,slug')}
+        self.remote_skills = {r['name']: r['id'] for r in await fetch_all_async(self.client.request, 'skills', 'id,name')}
+
+    def flush(self, batch, batch_start, locations):
+        # Locations first seen in this batch; only unknown slugs are inserted
+        loc_deps = set()
+        for job in batch:
+            loc_id = job['location_id']
+            if loc_id not in self.location_ids:
+                info = locations[loc_id]
+                if info['slug'] in self.remote_locations:
+                    self.location_ids[loc_id] = self.remote_locations[info['slug']]
+                else:
+                    self.location_ids[loc_id] = loc_id
+                    self.remote_locations[info['slug']] = loc_id
+                    self.location_tasks[loc_id] = self.spawn(f"location {info['name']}", [], 'locations', [location_row(info)])
+            if loc_id in self.location_tasks:
+                loc_deps.add(self.location_tasks[loc_id])
+
+        # Skills first seen in this batch; new ones go up as one request
+        new_skills = []
+        for job in batch:
+            for name in job['skills']:
+                if name in self.skill_ids_map:
+                    continue
+                if name in self.remote_skills:
+                    self.skill_ids_map[name] = self.remote_skills[name]
+                else:
+                    sid = stable_ids.skill_id(name)
+                    self.skill_ids_map[name] = sid
+                    new_skills.append(skill_row(name, sid))
+        if new_skills:
+            skill_task = self.spawn(f"{len(new_skills)} skills (batch {batch_start})", [], 'skills', new_skills)
+            for sk in new_skills:
+                self.skill_tasks[sk['id']] = skill_task
+
+        job_rows = []
+        for job in batch:
+            row = job_row(job)
+            row['role_id'] = self.role_ids.get(row['role_id'], row['role_id'])
+            row['location_id'] = self.location_ids[row['location_id']]
+            job_rows.append(row)
+        job_task = self.spawn(f"jobs batch {batch_start} - {batch_start+len(batch)}", list(loc_deps), 'jobs', job_rows)
+
+        relations = job_skill_rows(batch, self.skill_ids_map)
+        if relations:
+            skill_deps = {self.skill_tasks[r['skill_id']] for r in relations if r['skill_id'] in self.skill_tasks}
+            self.spawn(f"job_skills batch {batch_start} ({len(relations)})",
+                       [job_task] + list(skill_deps), 'job_skills', relations)
+        return job_task
+
+    async def run(self, csv_path, metrics):
+        metrics.phase('delete')
+        await self.delete_existing()
+        metrics.phase('masters')
+        await self.reconcile_masters()
+
+        # Parsing and uploads overlap from here on
+        metrics.phase('stream')
+
+        # A couple of batches may wait here; the pending_batches semaphore
+        # does the real throttling
+        queue = asyncio.Queue(maxsize=2)
+        threading.Thread(target=self._produce_batches, args=(csv_path, asyncio.get_running_loop(), queue),
+                         daemon=True).start()
+        total = 0
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            batch_start, batch, locations = item
+            await self._flush_with_backpressure(batch, batch_start, locations)
+            total += len(batch)
+
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        metrics.rows(total)
+        return total
+
+    def _produce_batches(self, csv_path, loop, queue):
+        # Worker thread: CSV parsing and normalization, the same generator
+        # stages as the threaded --stream mode (job_pipeline.py). Only this
+        # thread touches locations_registry while it runs, so each batch
+        # carries the registry entries of the locations its jobs reference.
+        # Ends with None, or with the exception that stopped it.
+        def put(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        try:
+            jobs = deduped_jobs(normalized_jobs(iter_csv_rows(csv_path), self.roles_registry_by_slug,
+                                                self.locations_registry))
+            by_id, indexed = {}, 0
+            for batch_start, batch in job_batches(jobs, self.batch_bytes, self.batch_size):
+                if indexed != len(self.locations_registry):
+                    by_id = {info['id']: info for info in self.locations_registry.values()}
+                    indexed = len(self.locations_registry)
+                put((batch_start, batch, {job['location_id']: by_id[job['location_id']] for job in batch}))
+        except Exception as e:
+            put(e)
+        else:
+            put(None)
+
+    async def _flush_with_backpressure(self, batch, batch_start, locations):
+        await self.pending_batches.acquire()
+        job_task = self.flush(batch, batch_start, locations)
+        job_task.add_done_callback(lambda _: self.pending_batches.release())
+        # Let in-flight uploads make progress between batches
+        await asyncio.sleep(0)
+
+
+async def main_async(args):
+    csv_path = args.csv or default_csv_path()
+    if not os.path.exists(csv_path):
+        print(f"Error: CSV file not found at {csv_path}")
+        sys.exit(1)
+
+    client = AsyncSupabaseClient(SUPABASE_URL, SERVICE_KEY, max_in_flight=args.max_in_flight,
+                                 verify_ssl=not args.insecure, bulk_write=args.bulk, gzip_requests=args.gzip)
+    importer = AsyncImporter(client, batch_size=args.batch_size, max_pending_batches=args.max_in_flight * 2,
+                             reset_masters=args.reset_masters, batch_bytes=args.batch_bytes)
+    metrics = RunMetrics('import_ver1_2_async', mode='full')
+    if args.norm_cache:
+        print(f"Loaded {load_cache(args.norm_cache)} cached normalizations from {args.norm_cache}")
+    status = 'failed'
+    try:
+        total = await importer.run(csv_path, metrics)
+        status = 'failed' if importer.failed else 'ok'
+    finally:
+        await client.close()
+        if args.norm_cache:
+            save_cache(args.norm_cache)
+        metrics.count('failed_batches', len(importer.failed))
+        metrics.count('norm_cache', cache_stats())
+        metrics.write(args.metrics, client.stats, status=status)
+
+    print(f"Processed {total} jobs, {len(importer.skill_ids_map)} skills, {len(importer.locations_registry)} locations.")
+    if importer.failed:
+        print(f"Failed/skipped {len(importer.failed)} uploads:")
+        for label in importer.failed:
+            print(f"  {label}")
+    client.stats.report()
+    if importer.failed:
+        print("--- Import Incomplete ---")
+        sys.exit(1)
+
+def main():
+    args = parse_args()
+    print("--- Starting Supabase Import (Ver 1.2, asyncio) ---")
+    asyncio.run(main_async(args))
+    print("--- Import Complete ---")
+
+if __name__ == "__main__":
+    main()
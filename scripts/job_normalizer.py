@@ -0,0 +1,227 @@
+import csv
+import datetime
+import os
+
+import stable_ids
+from gazetteer import resolve_location
+from mapping_rules import RULES
+from normalize_cache import Memo
+from price_parser import parse_price, price_rows
+from skill_normalizer import normalize_skills
+
+# Parsing & normalization for the Tech@DB_ver1.2 job feed.
+# Shared by import_ver1_2.py (sync) and import_ver1_2_async.py (asyncio)
+# so both entry points produce identical rows.
+
+CSV_FILENAME = 'Tech@DB_ver1.2 - to FB.csv'
+DEFAULT_ROLE_SLUG = 'system-engineer'
+
+# --- Mappings Definitions (Sync with JobFilter.tsx) ---
+# Compiled from mapping_definitions.md (mapping_rules.py)
+
+ROLE_SLUG_MAP = RULES['role_slug_map'] # role labels and their aliases -> slug
+CATEGORY_MAP = RULES['category_map']
+
+# All role labels in one automaton, compiled with the bundle
+ROLE_MATCHER = RULES['role_matcher']
+
+# --- CSV ---
+
+def default_csv_path():
+    return os.path.join(os.getcwd(), CSV_FILENAME)
+
+def is_header_row(row):
+    if not row:
+        return False
+    first_col = row[0]
+    second_col = row[1] if len(row) > 1 else ""
+    return "ID" in first_col or "案件名" in first_col or "案件名" in second_col
+
+def iter_csv_rows(csv_path):
+    # Yields data rows one at a time, header dropped
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is not None and not is_header_row(first):
+            yield first
+        yield from reader
+
+def read_csv_rows(csv_path):
+    return list(iter_csv_rows(csv_path))
+
+# --- Registries ---
+
+def build_roles_registry():
+    # slug -> {id, name, slug, parent_id}; categories are root roles
+    roles_registry_by_slug = {}
+    category_ids = {}
+    for cat in CATEGORY_MAP.keys():
+        cat_id = stable_ids.role_id(cat.lower())
+        category_ids[cat] = cat_id
+        roles_registry_by_slug[cat.lower()] = {'id': cat_id, 'parent_id': None, 'name': cat, 'slug': cat.lower()}
+
+    for label, slug in ROLE_SLUG_MAP.items():
+        if slug in roles_registry_by_slug:
+            continue # Already registered this slug, skip duplicates
+
+        # Find parent
+        parent_id = category_ids['Engineer'] # Default
+        for cat, slugs in CATEGORY_MAP.items():
+            if slug in slugs:
+                parent_id = category_ids[cat]
+                break
+
+        roles_registry_by_slug[slug] = {
+            'id': stable_ids.role_id(slug),
+            'name': label, # Use the first label encountered as the canonical name
+            'slug': slug,
+            'parent_id': parent_id
+        }
+    return roles_registry_by_slug
+
+# --- Field Normalization ---
+
+def match_role_slug(role_raw, title_raw):
+    # 1. Exact match label
+    if role_raw and role_raw in ROLE_SLUG_MAP:
+        return ROLE_SLUG_MAP[role_raw]
+
+    # 2. Fuzzy match label, then 3. title: the longest label found wins, so
+    # 'Webディレクター' beats 'ディレクター' regardless of map order.
+    # Role fields repeat and are memoized; titles are mostly unique.
+    if role_raw:
+        slug = match_role_field(role_raw)
+        if slug:
+            return slug
+    if title_raw:
+        slug = ROLE_MATCHER.longest(title_raw)
+        if slug:
+            return slug
+
+    return DEFAULT_ROLE_SLUG
+
+def match_location(location_raw):
+    # -> (normalized name, slug, region): the prefecture of the place named
+    loc = resolve_location(location_raw)
+    if loc is None:
+        return 'その他', 'other', '日本'
+    return loc['name'], loc['slug'], loc['region']
+
+# Memoized: raw role field -> slug or None (normalize_cache.py)
+match_role_field = Memo('role_fields', ROLE_MATCHER.longest, (ROLE_SLUG_MAP,))
+
+def parse_work_style(location_raw, req_raw):
+    work_style = 'onsite' # Default
+    if 'リモート' in location_raw or 'リモート' in req_raw or '在宅' in location_raw:
+        if 'フル' in location_raw or 'フル' in req_raw:
+            work_style = 'remote'
+        else:
+            work_style = 'hybrid'
+    return work_style
+
+def price_column(rows):
+    # -> [(price_min, price_max, unit, confidence)] per row; the whole price
+    # column is parsed in one batch (price_parser.py)
+    return price_rows([row[4] if len(row) >= 9 else '' for row in rows])
+
+def split_skills(tech_skills_raw):
+    # Canonical names from the shared alias table (as the seed generators
+    # produce them); a token without an alias is kept as written
+    return normalize_skills(tech_skills_raw)
+
+def normalize_row(i, row, roles_registry_by_slug, locations_registry, price=None):
+    # Returns the job dict, or None if the row is skipped.
+    # New locations are registered into locations_registry as a side effect.
+    # price: the row's entry from price_column(), when the caller batches.
+    if len(row) < 7:
+        return None
+
+    if len(row) >= 9:
+        job_code_raw = row[0]
+        title_raw = row[1]
+        role_raw = row[2]
+        tech_skills_raw = row[3]
+        price_raw = row[4]
+        location_raw = row[5]
+        summary_raw = row[6]
+        env_raw = row[7]
+        req_raw = row[8]
+    else:
+        print(f"Row {i} has unexpected length {len(row)}, skipping.")
+        return None
+
+    # Role Mapping
+    target_slug = match_role_slug(role_raw, title_raw)
+    if target_slug in roles_registry_by_slug:
+        role_id = roles_registry_by_slug[target_slug]['id']
+    else:
+        role_id = roles_registry_by_slug[DEFAULT_ROLE_SLUG]['id']
+
+    # Location Mapping
+    norm_loc_name, loc_slug, loc_region = match_location(location_raw)
+    if norm_loc_name not in locations_registry:
+        locations_registry[norm_loc_name] = {'id': stable_ids.location_id(loc_slug), 'name': norm_loc_name, 'slug': loc_slug,
+                                             'region': loc_region}
+    loc_id = locations_registry[norm_loc_name]['id']
+
+    min_p, max_p, price_unit, price_confidence = price if price is not None else parse_price(price_raw)
+
+    return {
+        'id': stable_ids.job_id(job_code_raw),
+        'job_code': job_code_raw.strip(),
+        'title': title_raw.strip() or 'エンジニア案件',
+        'role_id': role_id,
+        'location_id': loc_id,
+        'work_style': parse_work_style(location_raw, req_raw),
+        'price_min': min_p,
+        'price_max': max_p,
+        'price_unit': price_unit, # not a column; for the run summary
+        'price_confidence': price_confidence,
+        'description_md': f"## 【案件概要】\n{summary_raw}\n\n### 【開発環境】\n{env_raw}",
+        'requirements_md': f"## 【募集要項・条件】\n{req_raw}",
+        'skills': split_skills(tech_skills_raw),
+        'status': 'published',
+        'is_active': True,
+        'published_at': datetime.datetime.now().isoformat()
+    }
+
+def dedupe_job_code(job, seen_codes):
+    # Keep duplicates but rename them CODE-2, CODE-3, ... in feed order
+    code = job['job_code']
+    if code in seen_codes:
+        seen_codes[code] += 1
+        job['job_code'] = f"{code}-{seen_codes[code]}"
+        job['id'] = stable_ids.job_id(job['job_code'])
+    else:
+        seen_codes[code] = 1
+    return job
+
+# --- Payloads ---
+
+JOB_COLUMNS = (
+    'id', 'job_code', 'title', 'role_id', 'location_id', 'work_style', 'price_min', 'price_max',
+    'description_md', 'requirements_md', 'status', 'is_active', 'published_at',
+)
+
+def location_row(info):
+    return {'id': info['id'], 'region': info['region'], 'name': info['name'], 'slug': info['slug']}
+
+def role_row(info):
+    return {'id': info['id'], 'parent_id': info['parent_id'], 'name': info['name'], 'slug': info['slug'], 'sort_order': 0}
+
+def skill_row(name, sid=None):
+    return {'id': sid or stable_ids.skill_id(name), 'name': name, 'slug': stable_ids.skill_slug(name), 'sort_order': 0}
+
+def job_row(job):
+    return {col: job[col] for col in JOB_COLUMNS}
+
+def job_skill_rows(jobs, skill_ids_map):
+    seen = set()
+    rows = []
+    for job in jobs:
+        for sk_name in job['skills']:
+            sid = skill_ids_map.get(sk_name)
+            if sid and (job['id'], sid) not in seen:
+                seen.add((job['id'], sid))
+                rows.append({'job_id': job['id'], 'skill_id': sid})
+    return rows
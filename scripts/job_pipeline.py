@@ -0,0 +1,164 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import stable_ids
+from job_normalizer import (
+    iter_csv_rows, build_roles_registry, normalize_row, price_column, dedupe_job_code,
+    location_row, role_row, skill_row, job_row, job_skill_rows,
+)
+from master_sync import resolve_master_ids
+from supabase_client import BATCH_BYTES, MAX_BATCH_ROWS, byte_batches, fetch_all, post_split
+
+# Streaming full reload (--stream).
+# read -> normalize -> dedupe -> batch -> sink, chained as generators: each
+# stage pulls one item at a time from the one before it, so the feed is never
+# held in memory, only the batches in flight. The sink has a fixed number of
+# slots; when all of them are taken, put() blocks and the generators stop
+# reading (backpressure). Peak memory follows batch size x slots, not feed
+# size. What does grow with the feed is the job_code set used by dedupe and
+# the skill/location id maps.
+
+PRICE_BLOCK_ROWS = 1000 # normalize pulls rows in blocks of this many, one price batch each
+
+# --- Stages ---
+
+def normalized_jobs(rows, roles_registry_by_slug, locations_registry, block_rows=PRICE_BLOCK_ROWS):
+    # Rows are pulled a block at a time, so each block's price column is
+    # parsed in one batch
+    rows = iter(rows)
+    i = 0
+    while True:
+        block = list(itertools.islice(rows, block_rows))
+        if not block:
+            return
+        prices = price_column(block)
+        for k, row in enumerate(block):
+            job = normalize_row(i + k, row, roles_registry_by_slug, locations_registry, prices[k])
+            if job is not None:
+                yield job
+        i += len(block)
+
+def deduped_jobs(jobs, seen_codes=None):
+    seen_codes = {} if seen_codes is None else seen_codes
+    for job in jobs:
+        yield dedupe_job_code(job, seen_codes)
+
+def job_batches(jobs, max_bytes=BATCH_BYTES, max_rows=MAX_BATCH_ROWS):
+    # -> (start, jobs). byte_batches measures the whole job dict, a little
+    # more than its jobs row, so the jobs request stays within max_bytes.
+    return byte_batches(jobs, max_bytes, max_rows)
+
+# --- Sink ---
+
+class StreamingUploader:
+    # Per batch, masters seen for the first time are inserted inline, before
+    # the batch is queued. They are few and mostly show up in the first
+    # batches, and this way every later batch finds them committed. The
+    # batch's jobs and then its job_skills go out on the worker pool.
+    def __init__(self, api_request, roles_registry_by_slug, locations_registry, concurrency=4, max_pending=None,
+                 batch_bytes=BATCH_BYTES):
+        self.api_request = api_request
+        self.roles_registry_by_slug = roles_registry_by_slug
+        self.locations_registry = locations_registry
+        self.batch_bytes = batch_bytes
+        self.executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        # Queued + running batches
+        self.slots = threading.BoundedSemaphore(max_pending or max(1, concurrency) * 2)
+        self._lock = threading.Lock()
+        self.failed = []
+        self.sent = {'jobs': 0, 'job_skills': 0}
+
+        self.role_ids = {}
+        self.remote_locations = {} # slug -> remote id
+        self.location_ids = {} # local location id -> remote id
+        self.skill_ids_map = {} # name -> remote id
+
+    def start(self):
+        print("Reconciling masters...")
+        role_rows = [role_row(info) for info in self.roles_registry_by_slug.values()]
+        self.role_ids = resolve_master_ids(self.api_request, 'roles', role_rows)
+        self.remote_locations = {r['slug']: r['id'] for r in fetch_all(self.api_request, 'locations', 'id,slug')}
+        self.skill_ids_map = {r['name']: r['id'] for r in fetch_all(self.api_request, 'skills', 'id,name')}
+        print(f"  {len(self.remote_locations)} locations, {len(self.skill_ids_map)} skills already remote")
+
+    def _new_masters(self, batch):
+        new_locations = []
+        for job in batch:
+            loc_id = job['location_id']
+            if loc_id in self.location_ids:
+                continue
+            info = next(v for v in self.locations_registry.values() if v['id'] == loc_id)
+            remote_id = self.remote_locations.get(info['slug'])
+            if remote_id is None:
+                remote_id = self.remote_locations[info['slug']] = loc_id
+                new_locations.append(location_row(info))
+            self.location_ids[loc_id] = remote_id
+
+        new_skills = []
+        for job in batch:
+            for name in job['skills']:
+                if name not in self.skill_ids_map:
+                    self.skill_ids_map[name] = stable_ids.skill_id(name)
+                    new_skills.append(skill_row(name, self.skill_ids_map[name]))
+        return new_locations, new_skills
+
+    def put(self, start, batch):
+        new_locations, new_skills = self._new_masters(batch)
+        if new_locations:
+            post_split(self.api_request, 'locations', new_locations)
+            print(f"  Inserted {len(new_locations)} new locations")
+        for _, rows in byte_batches(new_skills, self.batch_bytes):
+            post_split(self.api_request, 'skills', rows)
+            print(f"  Inserted {len(rows)} new skills")
+
+        job_rows = []
+        for job in batch:
+            row = job_row(job)
+            row['role_id'] = self.role_ids.get(row['role_id'], row['role_id'])
+            row['location_id'] = self.location_ids[row['location_id']]
+            job_rows.append(row)
+        relations = job_skill_rows(batch, self.skill_ids_map)
+
+        # Blocks while every slot is taken: this is the backpressure
+        self.slots.acquire()
+        future = self.executor.submit(self._send, start, job_rows, relations)
+        future.add_done_callback(lambda _: self.slots.release())
+
+    def _send(self, start, job_rows, relations):
+        label = f"jobs batch {start} - {start + len(job_rows)}"
+        try:
+            post_split(self.api_request, 'jobs', job_rows)
+            for _, rows in byte_batches(relations, self.batch_bytes):
+                post_split(self.api_request, 'job_skills', rows)
+        except Exception as e:
+            print(f" Failed {label}: {e}")
+            with self._lock:
+                self.failed.append(label)
+            return
+        with self._lock:
+            self.sent['jobs'] += len(job_rows)
+            self.sent['job_skills'] += len(relations)
+        print(f"  Inserted {label} ({len(relations)} job_skills)")
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        return self.sent
+
+
+def stream_catalog_upload(api_request, csv_path, concurrency=4, batch_bytes=BATCH_BYTES, max_rows=MAX_BATCH_ROWS):
+    # The whole pipeline; returns the sink (sent counts, failed batches)
+    roles_registry_by_slug = build_roles_registry()
+    locations_registry = {}
+    sink = StreamingUploader(api_request, roles_registry_by_slug, locations_registry, concurrency=concurrency,
+                             batch_bytes=batch_bytes)
+    sink.start()
+    jobs = deduped_jobs(normalized_jobs(iter_csv_rows(csv_path), roles_registry_by_slug, locations_registry))
+    try:
+        for start, batch in job_batches(jobs, batch_bytes, max_rows):
+            sink.put(start, batch)
+    finally:
+        sink.close()
+    print(f"  Streamed {sink.sent['jobs']} jobs, {sink.sent['job_skills']} job_skills, "
+          f"{len(sink.skill_ids_map)} skills, {len(locations_registry)} locations")
+    return sink
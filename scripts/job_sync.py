@@ -0,0 +1,143 @@
+import hashlib
+import json
+
+from job_normalizer import JOB_COLUMNS
+from supabase_client import BATCH_BYTES, chunked, in_filter, fetch_all, byte_batches, post_split
+from master_sync import reconcile_masters
+
+# Incremental sync for the job importers (--sync).
+# Instead of DELETE-everything-then-reinsert, each normalized job is hashed
+# by content and compared with the hash stored on the remote row
+# (jobs.content_hash, see supabase/migrations/20261018_jobs_content_hash.sql).
+# Only new and changed jobs are upserted; codes missing from the feed are
+# deactivated (or deleted with --missing delete). job_skills are synced as a
+# per-job set difference, so only added/removed pairs go over the wire.
+
+FILTER_CHUNK = 100
+
+def job_content_hash(job, role_slug, location_slug):
+    # Hash natural keys rather than ids, so the value is stable across runs
+    # that assign fresh UUIDs. published_at is deliberately excluded.
+    content = {
+        'job_code': job['job_code'],
+        'title': job['title'],
+        'role': role_slug,
+        'location': location_slug,
+        'work_style': job['work_style'],
+        'price_min': job['price_min'],
+        'price_max': job['price_max'],
+        'description_md': job['description_md'],
+        'requirements_md': job['requirements_md'],
+        'status': job['status'],
+        'skills': sorted(job['skills']),
+    }
+    encoded = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+# --- Relations ---
+
+def fetch_remote_job_skills(api_request, job_ids, fetch_all_remote=False):
+    remote = {}
+    if fetch_all_remote:
+        rows = fetch_all(api_request, 'job_skills', 'job_id,skill_id')
+    else:
+        rows = []
+        for ids in chunked(list(job_ids), FILTER_CHUNK):
+            rows.extend(fetch_all(api_request, 'job_skills', 'job_id,skill_id', params={'job_id': in_filter(ids)}))
+    for r in rows:
+        remote.setdefault(r['job_id'], set()).add(r['skill_id'])
+    return remote
+
+def sync_job_skills(api_request, desired, check_ids, fetch_all_remote=False, batch_bytes=BATCH_BYTES):
+    # desired: job_id -> set(skill_id). Only jobs in check_ids can have
+    # remote pairs worth comparing; any other job in desired is new.
+    # Sends one bulk insert stream for added pairs and one filtered DELETE
+    # per job that lost skills.
+    remote = fetch_remote_job_skills(api_request, check_ids, fetch_all_remote) if check_ids else {}
+
+    to_insert = []
+    to_delete = {}
+    for job_id, skill_ids in desired.items():
+        have = remote.get(job_id, set())
+        for sid in sorted(skill_ids - have):
+            to_insert.append({'job_id': job_id, 'skill_id': sid})
+        gone = have - skill_ids
+        if gone:
+            to_delete[job_id] = sorted(gone)
+
+    for _, batch in byte_batches(to_insert, batch_bytes):
+        post_split(api_request, 'job_skills', batch)
+    for job_id, skill_ids in to_delete.items():
+        api_request('job_skills', 'DELETE', params={'job_id': f"eq.{job_id}", 'skill_id': in_filter(skill_ids)})
+    return len(to_insert), sum(len(v) for v in to_delete.values())
+
+# --- Jobs ---
+
+def sync_catalog(api_request, role_rows, location_rows, jobs_data, missing='deactivate', verify_relations=False,
+                 batch_bytes=BATCH_BYTES):
+    print("--- Incremental Sync ---")
+    role_slug_by_id = {r['id']: r['slug'] for r in role_rows}
+    loc_slug_by_id = {r['id']: r['slug'] for r in location_rows}
+
+    # A. Masters: reuse remote ids, insert only unknown slugs/names
+    all_skills = sorted({name for job in jobs_data for name in job['skills']})
+    role_ids, loc_ids, skill_ids_map = reconcile_masters(api_request, role_rows, location_rows, all_skills)
+
+    # B. Compare hashes with the remote catalog
+    remote_jobs = {r['job_code']: r for r in fetch_all(api_request, 'jobs', 'id,job_code,content_hash,is_active')
+                   if r.get('job_code')}
+
+    upserts = []
+    new_count = 0
+    changed_ids = []
+    for job in jobs_data:
+        h = job_content_hash(job, role_slug_by_id.get(job['role_id']), loc_slug_by_id.get(job['location_id']))
+        remote = remote_jobs.get(job['job_code'])
+        if remote and remote.get('content_hash') == h and remote.get('is_active'):
+            job['id'] = remote['id']
+            continue
+        if remote:
+            job['id'] = remote['id']
+            changed_ids.append(remote['id'])
+        else:
+            new_count += 1
+        row = {col: job[col] for col in JOB_COLUMNS}
+        row['role_id'] = role_ids.get(job['role_id'], job['role_id'])
+        row['location_id'] = loc_ids.get(job['location_id'], job['location_id'])
+        row['content_hash'] = h
+        upserts.append((job, row))
+
+    feed_codes = {job['job_code'] for job in jobs_data}
+    gone = [code for code, r in remote_jobs.items() if code not in feed_codes and (missing == 'delete' or r.get('is_active'))]
+
+    print(f"  {len(jobs_data)} jobs in feed: {new_count} new, {len(changed_ids)} changed, "
+          f"{len(jobs_data) - len(upserts)} unchanged, {len(gone)} missing from feed")
+
+    # C. Upsert new + changed jobs
+    upsert_headers = {'Prefer': 'resolution=merge-duplicates,return=minimal'}
+    for _, batch in byte_batches([row for _, row in upserts], batch_bytes):
+        post_split(api_request, 'jobs', batch, params={'on_conflict': 'job_code'}, headers=upsert_headers)
+
+    # D. Relations: per-job set difference against the remote pairs
+    # Only changed jobs can have remote pairs; --verify-relations also
+    # repairs drift on unchanged jobs by diffing the whole table.
+    if verify_relations:
+        relation_jobs = jobs_data
+        check_ids = [job['id'] for job in jobs_data]
+    else:
+        relation_jobs = [job for job, _ in upserts]
+        check_ids = changed_ids
+    desired = {job['id']: {skill_ids_map[name] for name in job['skills']} for job in relation_jobs}
+    added, removed = sync_job_skills(api_request, desired, check_ids, fetch_all_remote=verify_relations,
+                                     batch_bytes=batch_bytes)
+
+    # E. Codes no longer in the feed
+    for codes in chunked(gone, FILTER_CHUNK):
+        if missing == 'delete':
+            api_request('jobs', 'DELETE', params={'job_code': in_filter(codes)})
+        else:
+            api_request('jobs', 'PATCH', data={'is_active': False}, params={'job_code': in_filter(codes)})
+
+    print(f"  Upserted {len(upserts)} jobs; job_skills +{added} -{removed}; "
+          f"{'deleted' if missing == 'delete' else 'deactivated'} {len(gone)}")
+    return {'new': new_count, 'changed': len(changed_ids), 'unchanged': len(jobs_data) - len(upserts), 'missing': len(gone)}
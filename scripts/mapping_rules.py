@@ -0,0 +1,177 @@
+import glob
+import hashlib
+import os
+import pickle
+import re
+
+from aho_corasick import Automaton
+
+# Rule bundle compiled from mapping_definitions.md.
+# The role, category and skill-alias tables (curated, and the reviewed
+# near-duplicates from skill_clusters.py) live in that file only; this
+# module parses it and builds everything the importers match with (the
+# dicts and the automatons) in one go. The result is pickled to
+# scripts/__pycache__/mapping_rules.<hash>.pickle, named by a hash of the
+# definitions file and RULES_FORMAT, and loaded from there at the next
+# start. Editing the definitions changes the hash, so the next start
+# compiles again and replaces the old bundle. Bump RULES_FORMAT when the
+# bundle's layout or the matchers it pickles change.
+#
+# Usage:
+#   python scripts/mapping_rules.py     # compile now and print a summary
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFINITIONS_PATH = os.path.join(os.path.dirname(SCRIPTS_DIR), 'mapping_definitions.md')
+CACHE_DIR = os.path.join(SCRIPTS_DIR, '__pycache__')
+RULES_FORMAT = 2
+
+# Top-level headings are recognised by the English name in brackets;
+# other '# ' lines are comments
+SECTION_RE = re.compile(r'^# .*\((Role Definitions|Role Aliases|Skill Definitions|Skill Aliases|Reviewed Skill Aliases)\)\s*$')
+CATEGORY_RE = re.compile(r'^## .*\((\w+)\)\s*$')
+ROLE_RE = re.compile(r'^- (.+) \(([a-z0-9-]+)\)\s*$')
+SKILL_ALIAS_RE = re.compile(r'^- ([^:]+):(.*)$')
+
+# --- Parsing ---
+
+def parse_definitions(text):
+    # -> {'roles': {label: slug}, 'role_aliases': {label: slug},
+    #     'categories': {category: [slug]}, 'skill_names': [name],
+    #     'skill_aliases': {canonical: [alias]}, 'reviewed_skill_aliases': {canonical: [alias]}}
+    rules = {'roles': {}, 'role_aliases': {}, 'categories': {}, 'skill_names': [], 'skill_aliases': {},
+             'reviewed_skill_aliases': {}}
+    section = None
+    category = None
+    for n, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        m = SECTION_RE.match(line)
+        if m:
+            section, category = m[1], None
+            continue
+        if not line.startswith(('-', '##')) or line == '---':
+            continue
+        if line.startswith('##'):
+            m = CATEGORY_RE.match(line)
+            category = m[1] if m else None
+            if section == 'Role Definitions' and not category:
+                raise ValueError(f"line {n}: role category heading needs a key, e.g. '## エンジニア (Engineer)'")
+            continue
+        if section == 'Role Definitions':
+            m = ROLE_RE.match(line)
+            if not m or category is None:
+                raise ValueError(f"line {n}: expected '- 職種名 (slug)' under a category: {line}")
+            rules['roles'].setdefault(m[1], m[2])
+            rules['categories'].setdefault(category, []).append(m[2])
+        elif section == 'Role Aliases':
+            m = ROLE_RE.match(line)
+            if not m:
+                raise ValueError(f"line {n}: expected '- 別名 (slug)': {line}")
+            rules['role_aliases'].setdefault(m[1], m[2])
+        elif section == 'Skill Definitions':
+            rules['skill_names'].append(line[1:].strip())
+        elif section in ('Skill Aliases', 'Reviewed Skill Aliases'):
+            m = SKILL_ALIAS_RE.match(line)
+            if not m:
+                raise ValueError(f"line {n}: expected '- 統一名: 別名, 別名': {line}")
+            aliases = [a.strip() for a in m[2].split(',') if a.strip()]
+            table = rules['skill_aliases' if section == 'Skill Aliases' else 'reviewed_skill_aliases']
+            table[m[1].strip()] = aliases
+    known = set(rules['roles'].values())
+    for label, slug in rules['role_aliases'].items():
+        if slug not in known:
+            raise ValueError(f"role alias {label!r} points to unknown slug {slug!r}")
+    return rules
+
+# --- Compiling ---
+
+def compile_rules(text):
+    parsed = parse_definitions(text)
+    # Aliases after the roles: the first label of a slug names the role
+    role_slug_map = {**parsed['roles'], **{k: v for k, v in parsed['role_aliases'].items() if k not in parsed['roles']}}
+
+    # alias -> canonical; an alias listed under two canonicals goes to the later one
+    alias_to_canonical = {}
+    for canonical, aliases in parsed['skill_aliases'].items():
+        alias_to_canonical[canonical.lower()] = canonical
+        for alias in aliases:
+            alias_to_canonical[alias.lower()] = canonical
+    # Only the curated aliases are matched inside longer tokens
+    matched_aliases = list(alias_to_canonical.items())
+    # Reviewed aliases (skill_clusters.py) are whole-token matches and never
+    # override a curated one
+    for canonical, aliases in parsed['reviewed_skill_aliases'].items():
+        for alias in aliases:
+            alias_to_canonical.setdefault(alias.lower(), canonical)
+
+    return {
+        'role_labels': parsed['roles'],
+        'role_slug_map': role_slug_map,
+        'category_map': parsed['categories'],
+        'skill_names': parsed['skill_names'],
+        'skill_normalization_map': parsed['skill_aliases'],
+        'reviewed_skill_aliases': parsed['reviewed_skill_aliases'],
+        'alias_to_canonical': alias_to_canonical,
+        'role_matcher': Automaton(role_slug_map.items()),
+        'role_matcher_lower': Automaton((label.lower(), slug) for label, slug in role_slug_map.items()),
+        # Aliases must be at least 2 chars to avoid noise like 'c' matching 'cut'
+        'alias_matcher': Automaton((alias, canonical) for alias, canonical in matched_aliases if len(alias) >= 2),
+    }
+
+def rules_hash(source):
+    return hashlib.sha256(f"{RULES_FORMAT}\0".encode('utf-8') + source).hexdigest()[:16]
+
+def bundle_path(digest):
+    return os.path.join(CACHE_DIR, f"mapping_rules.{digest}.pickle")
+
+def load_rules(path=DEFINITIONS_PATH, use_cache=True):
+    # -> the rule bundle; from the cached pickle when the definitions are unchanged
+    with open(path, 'rb') as f:
+        source = f.read()
+    digest = rules_hash(source)
+    cached = bundle_path(digest)
+    if use_cache:
+        try:
+            with open(cached, 'rb') as f:
+                bundle = pickle.load(f)
+            if bundle.get('hash') == digest:
+                return bundle
+        except Exception:
+            pass # missing or unreadable (or pickled from other code): compile again
+    try:
+        bundle = compile_rules(source.decode('utf-8'))
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}") from None
+    bundle['hash'] = digest
+    save_rules(bundle)
+    return bundle
+
+def save_rules(bundle):
+    # Written next to the .pyc files; a read-only tree just compiles every time
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = bundle_path(bundle['hash'])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        for old in glob.glob(os.path.join(CACHE_DIR, 'mapping_rules.*.pickle')):
+            if old != path:
+                os.remove(old)
+    except OSError as e:
+        print(f"Warning: could not cache mapping rules: {e}")
+
+# The bundle every matcher comes from
+RULES = load_rules()
+
+def main():
+    rules = load_rules(use_cache=False)
+    print(f"Compiled {DEFINITIONS_PATH} ({rules['hash']})")
+    print(f"  {len(rules['role_labels'])} roles in {len(rules['category_map'])} categories, "
+          f"{len(rules['role_slug_map']) - len(rules['role_labels'])} role aliases")
+    reviewed = sum(len(aliases) for aliases in rules['reviewed_skill_aliases'].values())
+    print(f"  {len(rules['skill_normalization_map'])} skills, {len(rules['alias_to_canonical'])} skill aliases "
+          f"({reviewed} reviewed)")
+    print(f"  Bundle: {bundle_path(rules['hash'])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import stable_ids
+from job_normalizer import skill_row
+from supabase_client import fetch_all, byte_batches, post_split
+
+# Master data reconciliation for roles, locations and skills.
+# The current masters are fetched once (paginated) and keyed by slug (skills
+# by name). Existing ids are reused, and only rows that are genuinely new are
+# inserted, so foreign keys stay stable across imports.
+
+def resolve_master_ids(api_request, table, local_rows, key='slug', insert=True):
+    # Returns local id -> remote id, inserting rows whose key is not remote yet.
+    # Rows with a parent_id (roles) are inserted after their parents.
+    # insert=False only resolves ids (new rows keep their local id).
+    remote = {r[key]: r['id'] for r in fetch_all(api_request, table, f"id,{key}")}
+    id_map = {}
+    missing = []
+    for row in local_rows:
+        if row[key] in remote:
+            id_map[row['id']] = remote[row[key]]
+        else:
+            id_map[row['id']] = row['id']
+            missing.append(row)
+
+    if not insert:
+        print(f"  {table}: {len(local_rows) - len(missing)} existing, {len(missing)} new")
+        return id_map
+
+    roots = [r for r in missing if not r.get('parent_id')]
+    children = [r for r in missing if r.get('parent_id')]
+    for group in (roots, children):
+        if not group:
+            continue
+        payload = []
+        for row in group:
+            row = dict(row)
+            if row.get('parent_id'):
+                row['parent_id'] = id_map.get(row['parent_id'], row['parent_id'])
+            payload.append(row)
+        api_request(table, 'POST', data=payload)
+    print(f"  {table}: {len(local_rows) - len(missing)} reused, {len(missing)} inserted")
+    return id_map
+
+def resolve_skill_ids(api_request, skill_names, insert=True):
+    # Matched by name: rows created before stable slugs have random suffixes
+    remote = {r['name']: r['id'] for r in fetch_all(api_request, 'skills', 'id,name')}
+    new_rows = []
+    for name in skill_names:
+        if name not in remote:
+            sid = stable_ids.skill_id(name)
+            remote[name] = sid
+            new_rows.append(skill_row(name, sid))
+    if not insert:
+        print(f"  skills: {len(skill_names) - len(new_rows)} existing, {len(new_rows)} new")
+        return remote
+    for _, batch in byte_batches(new_rows):
+        post_split(api_request, 'skills', batch)
+    print(f"  skills: {len(skill_names) - len(new_rows)} reused, {len(new_rows)} inserted")
+    return remote
+
+def reconcile_masters(api_request, role_rows, location_rows, skill_names, insert=True):
+    # -> (role id map, location id map, skill name -> id)
+    print("Reconciling masters...")
+    role_ids = resolve_master_ids(api_request, 'roles', role_rows, insert=insert)
+    loc_ids = resolve_master_ids(api_request, 'locations', location_rows, insert=insert)
+    skill_ids_map = resolve_skill_ids(api_request, skill_names, insert=insert)
+    return role_ids, loc_ids, skill_ids_map
+
+def remap_job_masters(jobs_data, role_ids, loc_ids):
+    # Point locally built jobs at the reconciled (remote) master ids
+    for job in jobs_data:
+        job['role_id'] = role_ids.get(job['role_id'], job['role_id'])
+        job['location_id'] = loc_ids.get(job['location_id'], job['location_id'])
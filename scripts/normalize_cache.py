@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+# Memoized field normalization (--norm-cache).
+# The same raw strings ('AWS', 'Java(Spring)', '東京都港区 ※一部リモート')
+# repeat across rows and across daily runs. Each normalizer is wrapped in a
+# Memo: raw string -> result, in memory with LRU eviction, and optionally
+# loaded from / saved to a JSON file between runs.
+# Every Memo is versioned by a hash of the mapping tables it reads. When a
+# table changes, the saved entries no longer match and are dropped on load.
+# Bump CACHE_FORMAT when the matching rules themselves change.
+# Worker processes (--workers) start with the entries loaded so far; what they
+# add is not sent back to the parent.
+
+DEFAULT_NORM_CACHE = 'normalize_cache.json'
+DEFAULT_MAXSIZE = 50000
+CACHE_FORMAT = 1
+
+MEMOS = {} # name -> Memo
+_MISSING = object()
+
+def tables_hash(*tables):
+    # Order matters (ties resolve to the first entry), so items are hashed as listed
+    payload = json.dumps([CACHE_FORMAT] + [list(t.items()) for t in tables], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class Memo:
+    def __init__(self, name, fn, tables, maxsize=DEFAULT_MAXSIZE):
+        self.name = name
+        self.fn = fn
+        self.version = tables_hash(*tables)
+        self.maxsize = maxsize
+        self.entries = OrderedDict() # raw -> result, least recently used first
+        self.hits = 0
+        self.misses = 0
+        MEMOS[name] = self
+
+    def __call__(self, raw):
+        value = self.entries.get(raw, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            self.entries.move_to_end(raw)
+            return value
+        self.misses += 1
+        value = self.fn(raw)
+        self._store(raw, value)
+        return value
+
+    def _store(self, raw, value):
+        self.entries[raw] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries)}
+
+
+def load_cache(path):
+    # -> number of entries loaded; a missing or unreadable file is an empty cache
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except ValueError as e:
+        print(f"Warning: ignoring unreadable normalization cache {path}: {e}")
+        return 0
+    if data.get('format') != CACHE_FORMAT:
+        return 0
+    loaded = 0
+    for name, saved in data.get('caches', {}).items():
+        memo = MEMOS.get(name)
+        if memo is None or saved.get('version') != memo.version:
+            continue # tables changed since it was saved
+        for raw, value in saved['entries']:
+            # JSON has no tuples; normalizers that return pairs get them back
+            memo._store(raw, tuple(value) if isinstance(value, list) else value)
+            loaded += 1
+    return loaded
+
+def save_cache(path):
+    # Most recently used entries last, so a reload keeps the LRU order
+    data = {'format': CACHE_FORMAT, 'caches': {
+        name: {'version': memo.version, 'entries': list(memo.entries.items())}
+        for name, memo in MEMOS.items()
+    }}
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def clear_cache():
+    for memo in MEMOS.values():
+        memo.entries.clear()
+        memo.hits = memo.misses = 0
+
+def cache_stats():
+    # name -> {hits, misses, size}, for the run summary
+    return {name: memo.stats() for name, memo in MEMOS.items()}
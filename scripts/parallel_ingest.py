@@ -0,0 +1,118 @@
+import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from job_normalizer import is_header_row, build_roles_registry, normalize_row, price_column
+
+# Parallel CSV ingestion (--workers N).
+# The CSV is memory-mapped and cut into byte ranges that end on record
+# boundaries: a newline outside quotes. Quote parity is tracked from the start
+# of the file, so quoted multi-line fields are never split. Each range is
+# parsed and normalized in a worker process. Results come back in file order
+# and are merged in that order: row indexes are offset by the rows in earlier
+# chunks, and registries keep first-seen order. job_code dedupe runs after the
+# merge, so the output matches a serial run.
+
+CHUNKS_PER_WORKER = 4
+QUOTE_BLOCK = 1 << 20 # bytes per slice when counting quotes; the map is never copied whole
+
+def count_quotes(mm, start, end):
+    # Quotes in mm[start:end], a block at a time
+    return sum(mm[pos:min(end, pos + QUOTE_BLOCK)].count(b'"') for pos in range(start, end, QUOTE_BLOCK))
+
+def record_boundaries(csv_path, parts):
+    # -> [(start, end)] byte ranges, each holding whole records
+    size = os.path.getsize(csv_path)
+    if size == 0:
+        return []
+    bounds = [0]
+    if parts > 1:
+        with open(csv_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            quotes = 0 # quotes in mm[:pos]; odd = inside a quoted field at pos
+            for k in range(1, parts):
+                target = size * k // parts
+                if target <= pos:
+                    continue
+                quotes += count_quotes(mm, pos, target)
+                pos = target
+                while True:
+                    nl = mm.find(b'\n', pos)
+                    if nl == -1:
+                        quotes += count_quotes(mm, pos, size)
+                        pos = size
+                        break
+                    quotes += count_quotes(mm, pos, nl)
+                    pos = nl + 1
+                    if quotes % 2 == 0:
+                        break
+                if pos >= size:
+                    break
+                bounds.append(pos)
+            # An odd total means stray quotes inside unquoted fields; parity
+            # was wrong, so such a file is read as one chunk
+            if (quotes + count_quotes(mm, pos, size)) % 2:
+                bounds = [0]
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+def read_chunk_rows(csv_path, start, end):
+    # Parsed like iter_csv_rows (same newline handling), header dropped
+    with open(csv_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[start:end].decode('utf-8')
+    rows = list(csv.reader(io.StringIO(text, newline=None)))
+    if start == 0 and rows and is_header_row(rows[0]):
+        rows.pop(0)
+    return rows
+
+def _run_chunk(task):
+    chunk_fn, csv_path, start, end = task
+    return chunk_fn(read_chunk_rows(csv_path, start, end))
+
+def map_chunks(csv_path, chunk_fn, workers):
+    # -> [(row offset, result)] in file order. chunk_fn(rows) runs in a worker
+    # (a module-level function) and must return a dict with 'rows': the
+    # number of rows it was given.
+    ranges = record_boundaries(csv_path, workers * CHUNKS_PER_WORKER)
+    tasks = [(chunk_fn, csv_path, start, end) for start, end in ranges]
+    results = []
+    offset = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(_run_chunk, tasks):
+            results.append((offset, result))
+            offset += result['rows']
+    return results
+
+# --- Tech@DB_ver1.2 feed ---
+
+def normalize_chunk(rows):
+    # Worker side of parallel_normalize: jobs with their chunk-local row index
+    roles_registry_by_slug = build_roles_registry()
+    locations_registry = {}
+    jobs = []
+    bad_rows = []
+    prices = price_column(rows)
+    for i, row in enumerate(rows):
+        if 7 <= len(row) < 9:
+            bad_rows.append((i, len(row))) # reported by the parent with the global index
+            continue
+        job = normalize_row(i, row, roles_registry_by_slug, locations_registry, prices[i])
+        if job is not None:
+            jobs.append(job)
+    return {'rows': len(rows), 'jobs': jobs, 'locations': locations_registry, 'bad_rows': bad_rows}
+
+def parallel_normalize(csv_path, workers):
+    # -> (row count, jobs_data, locations_registry), as the serial loop builds them
+    jobs_data = []
+    locations_registry = {}
+    total = 0
+    for offset, result in map_chunks(csv_path, normalize_chunk, workers):
+        for i, length in result['bad_rows']:
+            print(f"Row {offset + i} has unexpected length {length}, skipping.")
+        for name, info in result['locations'].items():
+            locations_registry.setdefault(name, info)
+        jobs_data.extend(result['jobs'])
+        total = offset + result['rows']
+    return total, jobs_data, locations_registry
@@ -0,0 +1,645 @@
+import argparse
+import gzip
+import http.server
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+
+# Offline stand-in for the Supabase REST API (PostgREST), backed by SQLite.
+# Speaks the subset the import scripts use, so imports can be run, tested
+# and benchmarked without a Supabase project:
+#
+#   GET     select / limit / offset / order + eq, neq, gt(e), lt(e), in, is (and not.)
+#   POST    bulk insert; on_conflict + Prefer resolution=merge-duplicates|ignore-duplicates
+#   PATCH / DELETE with the same filters
+#   Prefer  return=minimal|representation, gzip response bodies
+#   gzip request bodies only with --accept-gzip: stock PostgREST does not
+#   decompress them, so by default they are refused (415) like a bad body
+#   RPC     reset_catalog_staging, stage_catalog, promote_catalog_staging, import_catalog
+#
+# Each request runs in one SQLite transaction with foreign keys on, so batch
+# ordering bugs fail here the same way they fail against Postgres.
+# Latency and errors can be injected (--latency-ms, --error-rate, ...).
+#
+# Usage:
+#   python scripts/postgrest_standin.py --port 54321 --db /tmp/standin.db
+#   NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_SERVICE_ROLE_KEY=local \
+#       python scripts/import_ver1_2.py
+
+# --- Schema (supabase/schema.sql + migrations, in SQLite types) ---
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roles (
+    id TEXT PRIMARY KEY, parent_id TEXT REFERENCES roles(id), name TEXT NOT NULL, slug TEXT NOT NULL UNIQUE,
+    sort_order INTEGER DEFAULT 0, is_active BOOLEAN DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS skills (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, slug TEXT NOT NULL UNIQUE, synonyms JSON DEFAULT '[]',
+    sort_order INTEGER DEFAULT 0, is_active BOOLEAN DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS locations (
+    id TEXT PRIMARY KEY, region TEXT NOT NULL, name TEXT NOT NULL, slug TEXT NOT NULL UNIQUE,
+    is_active BOOLEAN DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, job_code TEXT UNIQUE, title TEXT NOT NULL, role_id TEXT REFERENCES roles(id),
+    work_style TEXT CHECK (work_style IN ('remote','hybrid','onsite')), price_min INTEGER, price_max INTEGER,
+    location_id TEXT REFERENCES locations(id), duration_months INTEGER, start_date TEXT, interview_steps INTEGER,
+    description_md TEXT, requirements_md TEXT, nice_to_have_md TEXT, is_active BOOLEAN DEFAULT 1,
+    status TEXT CHECK (status IN ('draft','published')) DEFAULT 'draft', published_at TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP, updated_at TEXT DEFAULT CURRENT_TIMESTAMP, content_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS job_skills (
+    job_id TEXT REFERENCES jobs(id) ON DELETE CASCADE, skill_id TEXT REFERENCES skills(id),
+    PRIMARY KEY (job_id, skill_id)
+);
+CREATE TABLE IF NOT EXISTS job_badges (
+    id TEXT PRIMARY KEY, job_id TEXT REFERENCES jobs(id) ON DELETE CASCADE, badge_type TEXT, label TEXT,
+    sort_order INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS articles (
+    id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))), slug TEXT NOT NULL UNIQUE, title TEXT NOT NULL,
+    description TEXT, content TEXT, thumbnail_url TEXT, category TEXT, tags JSON, faq JSON DEFAULT '[]',
+    status TEXT DEFAULT 'draft' CHECK (status IN ('draft','published','archived')), published_at TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP, updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS staging_roles (
+    id TEXT PRIMARY KEY, parent_id TEXT, name TEXT NOT NULL, slug TEXT NOT NULL, sort_order INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS staging_locations (
+    id TEXT PRIMARY KEY, region TEXT NOT NULL, name TEXT NOT NULL, slug TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS staging_skills (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, slug TEXT NOT NULL, sort_order INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS staging_jobs (
+    id TEXT PRIMARY KEY, job_code TEXT, title TEXT NOT NULL, role_id TEXT, location_id TEXT, work_style TEXT,
+    price_min INTEGER, price_max INTEGER, description_md TEXT, requirements_md TEXT, status TEXT,
+    is_active BOOLEAN DEFAULT 1, published_at TEXT, content_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS staging_job_skills (
+    job_id TEXT NOT NULL, skill_id TEXT NOT NULL, PRIMARY KEY (job_id, skill_id)
+);
+"""
+
+STAGING_TABLES = ('roles', 'locations', 'skills', 'jobs', 'job_skills')
+
+# Query parameters that are not column filters
+RESERVED_PARAMS = ('select', 'limit', 'offset', 'order', 'on_conflict', 'columns')
+
+OPERATORS = {'eq': '=', 'neq': '<>', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+
+class PostgrestError(Exception):
+    # Rendered as PostgREST's JSON error body
+    def __init__(self, status, code, message, details=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.details = details
+
+    def body(self):
+        return {'code': self.code, 'message': self.message, 'details': self.details, 'hint': None}
+
+
+def sqlite_error(e):
+    # Map SQLite constraint errors onto the Postgres SQLSTATEs PostgREST returns
+    msg = str(e)
+    if 'UNIQUE' in msg or 'PRIMARY KEY' in msg:
+        return PostgrestError(409, '23505', f"duplicate key value violates unique constraint ({msg})")
+    if 'FOREIGN KEY' in msg:
+        return PostgrestError(409, '23503', f"insert or update violates foreign key constraint ({msg})")
+    if 'NOT NULL' in msg:
+        return PostgrestError(400, '23502', f"null value violates not-null constraint ({msg})")
+    if 'CHECK' in msg:
+        return PostgrestError(400, '23514', f"new row violates check constraint ({msg})")
+    return PostgrestError(400, 'PGRST100', msg)
+
+
+# --- Store ---
+
+class Store:
+    def __init__(self, path=':memory:', max_rows=1000):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.execute('PRAGMA journal_mode = WAL' if path != ':memory:' else 'PRAGMA journal_mode = MEMORY')
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.max_rows = max_rows
+        self.columns = {}
+        for (table,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"):
+            self.columns[table] = {r['name']: (r['type'] or '').upper() for r in self.conn.execute(f'PRAGMA table_info("{table}")')}
+
+    def transaction(self, fn, *args):
+        # One request = one transaction, like PostgREST
+        with self.lock:
+            self.conn.execute('BEGIN')
+            try:
+                result = fn(*args)
+            except sqlite3.Error as e:
+                self.conn.execute('ROLLBACK')
+                raise sqlite_error(e)
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            return result
+
+    # --- Values ---
+
+    def _cols(self, table):
+        if table not in self.columns:
+            raise PostgrestError(404, 'PGRST205', f"Could not find the table 'public.{table}' in the schema cache")
+        return self.columns[table]
+
+    def _check_column(self, table, col):
+        if col not in self._cols(table):
+            raise PostgrestError(400, '42703', f"column {table}.{col} does not exist")
+
+    def to_db(self, table, col, value):
+        kind = self.columns[table].get(col, '')
+        if value is None:
+            return None
+        if kind == 'JSON':
+            return json.dumps(value, ensure_ascii=False)
+        if kind == 'BOOLEAN':
+            return 1 if value else 0
+        return value
+
+    def from_db(self, table, row):
+        out = {}
+        for col, value in dict(row).items():
+            kind = self.columns[table].get(col, '')
+            if value is not None and kind == 'JSON':
+                value = json.loads(value)
+            elif value is not None and kind == 'BOOLEAN':
+                value = bool(value)
+            out[col] = value
+        return out
+
+    def filter_value(self, table, col, raw):
+        kind = self.columns[table].get(col, '')
+        if kind == 'BOOLEAN':
+            return 1 if raw == 'true' else 0
+        if kind == 'INTEGER':
+            try:
+                return int(raw)
+            except ValueError:
+                return raw
+        return raw
+
+    # --- Filters ---
+
+    def where(self, table, filters):
+        clauses = []
+        args = []
+        for col, expr in filters:
+            self._check_column(table, col)
+            negate = expr.startswith('not.')
+            if negate:
+                expr = expr[4:]
+            op, _, raw = expr.partition('.')
+            if op in OPERATORS:
+                clause = f'"{col}" {OPERATORS[op]} ?'
+                args.append(self.filter_value(table, col, raw))
+            elif op == 'in':
+                values = parse_in_list(raw)
+                if not values:
+                    clause = '0'
+                else:
+                    clause = f'"{col}" IN ({",".join("?" * len(values))})'
+                    args.extend(self.filter_value(table, col, v) for v in values)
+            elif op == 'is':
+                if raw == 'null':
+                    clause = f'"{col}" IS NULL'
+                elif raw in ('true', 'false'):
+                    clause = f'"{col}" IS ?'
+                    args.append(1 if raw == 'true' else 0)
+                else:
+                    raise PostgrestError(400, 'PGRST100', f"unsupported is. value: {raw}")
+            else:
+                raise PostgrestError(400, 'PGRST100', f"unsupported operator: {op}")
+            clauses.append(f'NOT ({clause})' if negate else clause)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', args
+
+    # --- Verbs ---
+
+    def select(self, table, select, filters, limit, offset, order):
+        cols = self._select_columns(table, select)
+        where, args = self.where(table, filters)
+        sql = f'SELECT {cols} FROM "{table}"{where}'
+        if order:
+            terms = []
+            for term in order.split(','):
+                col, _, direction = term.partition('.')
+                self._check_column(table, col)
+                terms.append(f'"{col}" {"DESC" if direction.startswith("desc") else "ASC"}')
+            sql += ' ORDER BY ' + ', '.join(terms)
+        # Like PostgREST's db-max-rows: un-ranged reads are capped
+        limit = min(limit, self.max_rows) if limit is not None else self.max_rows
+        sql += f' LIMIT {int(limit)} OFFSET {int(offset or 0)}'
+        return [self.from_db(table, r) for r in self.conn.execute(sql, args)]
+
+    def _select_columns(self, table, select):
+        if not select or select == '*':
+            self._cols(table)
+            return '*'
+        cols = [c.strip() for c in select.split(',') if c.strip()]
+        for col in cols:
+            self._check_column(table, col)
+        return ', '.join(f'"{c}"' for c in cols)
+
+    def insert(self, table, rows, on_conflict=None, resolution=None, returning=False):
+        cols_known = self._cols(table)
+        out = []
+        # Rows with the same keys share one statement (executemany)
+        groups = {}
+        for row in rows:
+            if not isinstance(row, dict):
+                raise PostgrestError(400, 'PGRST102', "All object keys must match")
+            for col in row:
+                if col not in cols_known:
+                    raise PostgrestError(400, 'PGRST204', f"Could not find the '{col}' column of '{table}' in the schema cache")
+            groups.setdefault(tuple(row), []).append(row)
+        for cols, group in groups.items():
+            sql = self._insert_sql(table, cols, on_conflict, resolution, returning)
+            values = [[self.to_db(table, c, row[c]) for c in cols] for row in group]
+            if returning:
+                for args in values:
+                    out.extend(self.from_db(table, r) for r in self.conn.execute(sql, args).fetchall())
+            else:
+                self.conn.executemany(sql, values)
+        return out
+
+    def _insert_sql(self, table, cols, on_conflict, resolution, returning):
+        names = ', '.join(f'"{c}"' for c in cols)
+        sql = f'INSERT INTO "{table}" ({names}) VALUES ({", ".join("?" * len(cols))})'
+        if resolution:
+            target = on_conflict or self._primary_key(table)
+            updates = [c for c in cols if c not in target.split(',')]
+            if resolution == 'merge-duplicates' and updates:
+                sql += f' ON CONFLICT ({target}) DO UPDATE SET ' + ', '.join(f'"{c}" = excluded."{c}"' for c in updates)
+            else:
+                sql += f' ON CONFLICT ({target}) DO NOTHING'
+        if returning:
+            sql += ' RETURNING *'
+        return sql
+
+    def _primary_key(self, table):
+        pk = [r['name'] for r in self.conn.execute(f'PRAGMA table_info("{table}")') if r['pk']]
+        return ','.join(pk)
+
+    def update(self, table, values, filters, returning=False):
+        for col in values:
+            self._check_column(table, col)
+        where, args = self.where(table, filters)
+        sets = ', '.join(f'"{c}" = ?' for c in values)
+        sql = f'UPDATE "{table}" SET {sets}{where}' + (' RETURNING *' if returning else '')
+        cur = self.conn.execute(sql, [self.to_db(table, c, v) for c, v in values.items()] + args)
+        return [self.from_db(table, r) for r in cur.fetchall()] if returning else []
+
+    def delete(self, table, filters, returning=False):
+        where, args = self.where(table, filters)
+        if not where:
+            # PostgREST (with pg-safeupdate, as on Supabase) refuses unfiltered deletes
+            raise PostgrestError(400, '21000', "DELETE requires a WHERE clause")
+        sql = f'DELETE FROM "{table}"{where}' + (' RETURNING *' if returning else '')
+        cur = self.conn.execute(sql, args)
+        return [self.from_db(table, r) for r in cur.fetchall()] if returning else []
+
+    # --- RPC (supabase/migrations/20261019_*.sql) ---
+
+    def rpc(self, name, args):
+        fn = getattr(self, f'rpc_{name}', None)
+        if fn is None:
+            raise PostgrestError(404, 'PGRST202', f"Could not find the function public.{name} in the schema cache")
+        return fn(**args)
+
+    def rpc_reset_catalog_staging(self):
+        for table in STAGING_TABLES:
+            self.conn.execute(f'DELETE FROM staging_{table}')
+        return None
+
+    def rpc_stage_catalog(self, payload):
+        staged = {}
+        for table in STAGING_TABLES:
+            before = self.conn.total_changes
+            self.insert(f'staging_{table}', payload.get(table) or [], resolution='ignore-duplicates')
+            staged[table] = self.conn.total_changes - before
+        return staged
+
+    def rpc_import_catalog(self, payload, prune_masters=False):
+        expected = {table: len(payload.get(table) or []) for table in STAGING_TABLES}
+        self.rpc_reset_catalog_staging()
+        self.rpc_stage_catalog(payload)
+        return self.rpc_promote_catalog_staging(expected, prune_masters)
+
+    def rpc_promote_catalog_staging(self, expected, prune_masters=False):
+        q = lambda sql: self.conn.execute(sql).fetchone()[0]
+        actual = {table: q(f'SELECT count(*) FROM staging_{table}') for table in STAGING_TABLES}
+        if actual['jobs'] == 0:
+            raise PostgrestError(400, 'P0001', 'staging_jobs is empty, refusing to promote')
+        if actual != expected:
+            raise PostgrestError(400, 'P0001', f"staging row counts {actual} do not match expected {expected}")
+
+        bad = q("""SELECT count(*) FROM staging_roles r WHERE r.parent_id IS NOT NULL
+                   AND r.parent_id NOT IN (SELECT id FROM staging_roles) AND r.parent_id NOT IN (SELECT id FROM roles)""")
+        if bad:
+            raise PostgrestError(400, 'P0001', f"{bad} staged roles reference an unknown parent_id")
+        bad = q("""SELECT count(*) FROM staging_jobs j WHERE
+                   (j.role_id IS NOT NULL AND j.role_id NOT IN (SELECT id FROM staging_roles)
+                    AND j.role_id NOT IN (SELECT id FROM roles))
+                   OR (j.location_id IS NOT NULL AND j.location_id NOT IN (SELECT id FROM staging_locations)
+                    AND j.location_id NOT IN (SELECT id FROM locations))""")
+        if bad:
+            raise PostgrestError(400, 'P0001', f"{bad} staged jobs reference an unknown role_id/location_id")
+        bad = q("""SELECT count(*) FROM staging_job_skills js WHERE js.job_id NOT IN (SELECT id FROM staging_jobs)
+                   OR (js.skill_id NOT IN (SELECT id FROM staging_skills) AND js.skill_id NOT IN (SELECT id FROM skills))""")
+        if bad:
+            raise PostgrestError(400, 'P0001', f"{bad} staged job_skills reference an unknown job_id/skill_id")
+
+        ex = self.conn.execute
+        ex("""INSERT INTO roles (id, parent_id, name, slug, sort_order)
+              SELECT id, parent_id, name, slug, sort_order FROM staging_roles WHERE true ON CONFLICT (id) DO NOTHING""")
+        ex("""INSERT INTO locations (id, region, name, slug)
+              SELECT id, region, name, slug FROM staging_locations WHERE true ON CONFLICT (id) DO NOTHING""")
+        ex("""INSERT INTO skills (id, name, slug, sort_order)
+              SELECT id, name, slug, sort_order FROM staging_skills WHERE true ON CONFLICT (id) DO NOTHING""")
+        deleted_jobs = ex('DELETE FROM jobs WHERE id NOT IN (SELECT id FROM staging_jobs)').rowcount
+        job_cols = [c for c in self.columns['staging_jobs'] if c != 'id']
+        ex(f"""INSERT INTO jobs (id, {", ".join(job_cols)})
+               SELECT id, {", ".join(job_cols)} FROM staging_jobs WHERE true
+               ON CONFLICT (id) DO UPDATE SET {", ".join(f"{c} = excluded.{c}" for c in job_cols)},
+               updated_at = CURRENT_TIMESTAMP""")
+        ex("""DELETE FROM job_skills WHERE NOT EXISTS (SELECT 1 FROM staging_job_skills s
+              WHERE s.job_id = job_skills.job_id AND s.skill_id = job_skills.skill_id)""")
+        ex("""INSERT INTO job_skills (job_id, skill_id) SELECT job_id, skill_id FROM staging_job_skills WHERE true
+              ON CONFLICT DO NOTHING""")
+        if prune_masters:
+            ex("""DELETE FROM skills WHERE id NOT IN (SELECT id FROM staging_skills)
+                  AND id NOT IN (SELECT skill_id FROM job_skills)""")
+            ex("""DELETE FROM locations WHERE id NOT IN (SELECT id FROM staging_locations)
+                  AND id NOT IN (SELECT location_id FROM jobs WHERE location_id IS NOT NULL)""")
+            ex("""DELETE FROM roles WHERE id NOT IN (SELECT id FROM staging_roles)
+                  AND id NOT IN (SELECT role_id FROM jobs WHERE role_id IS NOT NULL)
+                  AND id NOT IN (SELECT parent_id FROM roles WHERE parent_id IS NOT NULL)""")
+        self.rpc_reset_catalog_staging()
+        return dict(actual, deleted_jobs=deleted_jobs)
+
+
+def parse_in_list(raw):
+    # ("a","b,c",d) -> ['a', 'b,c', 'd']
+    inner = raw[1:-1] if raw.startswith('(') and raw.endswith(')') else raw
+    values = []
+    for quoted, bare in re.findall(r'"((?:[^"\\]|\\.)*)"|([^,]+)', inner):
+        values.append(re.sub(r'\\(.)', r'\1', quoted) if quoted or not bare else bare.strip())
+    return values
+
+
+# --- HTTP ---
+
+class Faults:
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, error_statuses=(503,), retry_after=None,
+                 max_body_bytes=0, max_write_rows=0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.retry_after = retry_after
+        self.max_body_bytes = max_body_bytes
+        self.max_write_rows = max_write_rows
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def delay(self):
+        if self.latency_ms or self.jitter_ms:
+            with self.lock:
+                jitter = self.random.uniform(0, self.jitter_ms)
+            time.sleep((self.latency_ms + jitter) / 1000)
+
+    def injected_status(self):
+        if not self.error_rate:
+            return None
+        with self.lock:
+            if self.random.random() < self.error_rate:
+                return self.random.choice(self.error_statuses)
+        return None
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    store = None
+    faults = None
+    verbose = False
+    accept_gzip = False
+    counters = {'requests': 0, 'injected': 0}
+    counters_lock = threading.Lock()
+
+    # --- plumbing ---
+
+    def _count(self, key):
+        # Per server (make_server gives each its own dict); requests are
+        # handled on several threads at once
+        with self.counters_lock:
+            self.counters[key] += 1
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        if self.headers.get('Content-Encoding', '').lower() == 'gzip' and raw:
+            if not self.accept_gzip:
+                raise PostgrestError(415, 'PGRST102', "Content-Encoding gzip is not supported for request bodies")
+            raw = gzip.decompress(raw)
+        return raw
+
+    def _reply(self, status, payload=None, extra_headers=None):
+        body = b''
+        if payload is not None:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = dict(extra_headers or {})
+        if body and len(body) >= 1024 and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        self.send_response(status)
+        if payload is not None:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _prefer(self):
+        prefs = {}
+        for part in self.headers.get('Prefer', '').split(','):
+            key, _, value = part.strip().partition('=')
+            if key:
+                prefs[key] = value
+        return prefs
+
+    def _route(self):
+        parts = urllib.parse.urlsplit(self.path)
+        path = parts.path
+        if not path.startswith('/rest/v1/'):
+            raise PostgrestError(404, 'PGRST000', f"unknown path {path}")
+        target = path[len('/rest/v1/'):]
+        params = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        return target, params
+
+    def _handle(self, method):
+        self._count('requests')
+        started = time.perf_counter()
+        status = 500
+        try:
+            raw = self._read_body()
+            self.faults.delay()
+            injected = self.faults.injected_status()
+            if injected:
+                self._count('injected')
+                headers = {}
+                if injected in (429, 503) and self.faults.retry_after is not None:
+                    headers['Retry-After'] = str(self.faults.retry_after)
+                status = injected
+                return self._reply(injected, {'code': str(injected), 'message': 'injected fault'}, headers)
+            if self.faults.max_body_bytes and len(raw) > self.faults.max_body_bytes:
+                status = 413
+                return self._reply(413, {'message': 'Payload Too Large'})
+            data = json.loads(raw) if raw else None
+            status, payload = self._dispatch(method, data)
+            self._reply(status, payload)
+        except PostgrestError as e:
+            status = e.status
+            self._reply(e.status, e.body())
+        except (ValueError, TypeError) as e:
+            status = 400
+            self._reply(400, {'code': 'PGRST102', 'message': f"invalid request: {e}"})
+        finally:
+            if self.verbose:
+                print(f"{method} {self.path[:120]} -> {status} ({(time.perf_counter() - started) * 1000:.1f}ms)",
+                      flush=True)
+
+    def _dispatch(self, method, data):
+        target, params = self._route()
+        prefer = self._prefer()
+        returning = prefer.get('return') == 'representation'
+        store = self.store
+
+        if target.startswith('rpc/'):
+            if method not in ('POST', 'GET'):
+                raise PostgrestError(405, 'PGRST101', 'RPC supports GET and POST')
+            args = data if method == 'POST' else dict(params)
+            result = store.transaction(store.rpc, target[4:], args or {})
+            return (200, result) if result is not None else (204, None)
+
+        table = target
+        filters = [(k, v) for k, v in params if k not in RESERVED_PARAMS]
+        query = dict(params)
+
+        if method == 'GET':
+            limit = int(query['limit']) if 'limit' in query else None
+            rows = store.transaction(store.select, table, query.get('select'), filters, limit,
+                                     int(query.get('offset', 0)), query.get('order'))
+            return 200, rows
+
+        if method == 'POST':
+            rows = data if isinstance(data, list) else [data]
+            if self.faults.max_write_rows and len(rows) > self.faults.max_write_rows:
+                # What a statement_timeout looks like through PostgREST
+                raise PostgrestError(500, '57014', 'canceling statement due to statement timeout')
+            result = store.transaction(store.insert, table, rows, query.get('on_conflict'),
+                                       prefer.get('resolution'), returning)
+            return 201, (result if returning else None)
+
+        if method == 'PATCH':
+            result = store.transaction(store.update, table, data or {}, filters, returning)
+            return (200, result) if returning else (204, None)
+
+        if method == 'DELETE':
+            result = store.transaction(store.delete, table, filters, returning)
+            return (200, result) if returning else (204, None)
+
+        raise PostgrestError(405, 'PGRST101', f"unsupported method {method}")
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def log_message(self, *args):
+        pass
+
+
+def make_server(host='127.0.0.1', port=54321, db=':memory:', max_rows=1000, faults=None, verbose=False,
+                accept_gzip=False):
+    # Also used by the benchmarks to run the stand-in in-process
+    handler = type('StandinHandler', (Handler,), {
+        'store': Store(db, max_rows=max_rows),
+        'faults': faults or Faults(),
+        'verbose': verbose,
+        'accept_gzip': accept_gzip,
+        'counters': {'requests': 0, 'injected': 0},
+        'counters_lock': threading.Lock(),
+    })
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local PostgREST stand-in (SQLite) for offline import runs.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--db', default=':memory:', help="SQLite file (default: in-memory)")
+    parser.add_argument('--reset', action='store_true', help="Delete the --db file before starting")
+    parser.add_argument('--max-rows', type=int, default=1000, help="Cap on rows per GET, like db-max-rows")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Added latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Extra random latency, 0..N ms")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument('--error-status', default='503', help="Comma-separated statuses to inject (e.g. 429,503)")
+    parser.add_argument('--retry-after', type=float, default=None, help="Retry-After seconds on injected 429/503")
+    parser.add_argument('--max-body-bytes', type=int, default=0, help="Answer 413 above this request size")
+    parser.add_argument('--max-write-rows', type=int, default=0,
+                        help="Answer a statement-timeout error (57014) for inserts larger than this")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for injected latency/errors")
+    parser.add_argument('--accept-gzip', action='store_true',
+                        help="Decompress gzip request bodies, like a gateway in front of PostgREST would")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.reset and args.db != ':memory:' and os.path.exists(args.db):
+        os.remove(args.db)
+    faults = Faults(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                    error_statuses=tuple(int(s) for s in args.error_status.split(',') if s.strip()),
+                    retry_after=args.retry_after, max_body_bytes=args.max_body_bytes,
+                    max_write_rows=args.max_write_rows, seed=args.seed)
+    server = make_server(args.host, args.port, args.db, args.max_rows, faults, args.verbose, args.accept_gzip)
+    print(f"PostgREST stand-in on http://{args.host}:{args.port} (db: {args.db})")
+    print(f"  NEXT_PUBLIC_SUPABASE_URL=http://{args.host}:{args.port} SUPABASE_SERVICE_ROLE_KEY=local")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        counters = server.RequestHandlerClass.counters
+        print(f"Served {counters['requests']} requests ({counters['injected']} injected faults)")
+        server.server_close()
+
+if __name__ == "__main__":
+    sys.exit(main())
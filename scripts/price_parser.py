@@ -0,0 +1,166 @@
+import re
+import unicodedata
+
+try:
+    import numpy as np
+except ImportError: # optional; the list path below gives the same numbers
+    np = None
+
+from normalize_cache import Memo
+
+# Batch price parsing for the job feeds.
+# A price column repeats a handful of forms ('60~70万円', '〜90万',
+# '時給3000円', '80万円'), so it is parsed as a whole: every distinct string
+# is read once (memoized, --norm-cache), then the bounds of all the distinct
+# strings are computed in one pass of array arithmetic and gathered back to
+# the rows. NumPy does the arithmetic when installed; without it the same
+# steps run over lists.
+# Shared by job_normalizer.py, import_to_supabase_direct.py and the seed
+# generators, so every importer stores the same price_min / price_max.
+#
+# price_min / price_max are yen per month, as the site shows and filters
+# them. unit is what the feed quoted ('month', 'hour', 'day', '' for no
+# price); hourly and daily rates are converted at HOURS_PER_MONTH /
+# DAYS_PER_MONTH. confidence says how much of the range was stated:
+#   high    both bounds given, monthly ('60~70万円')
+#   medium  one value or one bound, the other side estimated ('80万円', '〜90万')
+#   low     converted from an hourly or daily rate
+#   none    no price ('スキル見合い', ''); price_min = price_max = 0
+
+MAN_YEN_BELOW = 2000 # a monthly number under this is in 万円 ('60' in '60~70万円')
+SINGLE_BAND = 50000 # '80万円' -> 75-85万
+BOUND_BAND = 100000 # '〜90万' -> 80-90万, '60万〜' -> 60-70万
+HOURS_PER_MONTH = 160
+DAYS_PER_MONTH = 20
+
+UNIT_MARKERS = {
+    'hour': ('時給', '時間単価', '/h', '/時'),
+    'day': ('日給', '日額', '日当', '/日'),
+}
+UNIT_FACTORS = {'month': 1, 'hour': HOURS_PER_MONTH, 'day': DAYS_PER_MONTH, '': 0}
+UPPER_MARKERS = ('以下', 'まで', '上限')
+LOWER_MARKERS = ('以上', 'から', '下限')
+
+PRICE_FIELDS = ('price_min', 'price_max', 'unit', 'confidence')
+
+# Shapes of a price string
+NONE, SINGLE, RANGE, UPPER, LOWER = range(5)
+CONFIDENCE_LABELS = ('none', 'low', 'medium', 'high')
+
+_SEP = r'(?:[~〜\-−–—ー]|から)'
+_NUMBER = r'(\d+(?:\.\d+)?)\s*(万)?'
+NUMBER_RE = re.compile(_NUMBER)
+# Two numbers joined by a separator; '円' and '/月' may follow the first
+RANGE_RE = re.compile(_NUMBER + r'\s*円?\s*(?:/月)?\s*' + _SEP + r'\s*' + _NUMBER)
+SEP_BEFORE_RE = re.compile(_SEP + r'\s*$')
+SEP_AFTER_RE = re.compile(r'^\s*円?\s*(?:/月)?\s*' + _SEP)
+
+# --- Reading one string ---
+
+def _yen(number, man, unit):
+    value = float(number)
+    if man or (unit == 'month' and value < MAN_YEN_BELOW):
+        value *= 10000
+    return value
+
+def _read_price(price_raw):
+    # -> (a, b, shape, unit); a and b in yen per unit, b only for ranges
+    text = unicodedata.normalize('NFKC', price_raw).replace(',', '').lower()
+    first = NUMBER_RE.search(text)
+    if not first:
+        return (0.0, 0.0, NONE, '')
+    unit = 'month'
+    for name, markers in UNIT_MARKERS.items():
+        if any(m in text for m in markers):
+            unit = name
+            break
+    # A range only counts from the first number: '70万円（140-180h）' is 70万
+    m = RANGE_RE.match(text, first.start())
+    if m:
+        a, b = _yen(m[1], m[2], unit), _yen(m[3], m[4], unit)
+        return (min(a, b), max(a, b), RANGE, unit)
+    a = _yen(first[1], first[2], unit)
+    before, after = text[:first.start()], text[first.end():]
+    if SEP_BEFORE_RE.search(before) or any(m in text for m in UPPER_MARKERS):
+        return (a, a, UPPER, unit)
+    if SEP_AFTER_RE.match(after) or any(m in text for m in LOWER_MARKERS):
+        return (a, a, LOWER, unit)
+    return (a, a, SINGLE, unit)
+
+read_price = Memo('prices', _read_price, (UNIT_MARKERS, {'man_yen_below': MAN_YEN_BELOW}))
+
+# --- Bounds over arrays ---
+
+def _bounds_numpy(a, b, shape, factor):
+    factor = np.asarray(factor)
+    a = np.asarray(a) * factor
+    b = np.asarray(b) * factor
+    shape = np.asarray(shape)
+    lo = np.select([shape == RANGE, shape == SINGLE, shape == UPPER, shape == LOWER],
+                   [a, a - SINGLE_BAND, a - BOUND_BAND, a], 0.0)
+    hi = np.select([shape == RANGE, shape == SINGLE, shape == UPPER, shape == LOWER],
+                   [b, a + SINGLE_BAND, a, a + BOUND_BAND], 0.0)
+    lo = np.rint(np.maximum(lo, 0)).astype(np.int64)
+    hi = np.rint(hi).astype(np.int64)
+    confidence = np.where(shape == NONE, 0, np.where(factor != 1, 1, np.where(shape == RANGE, 3, 2)))
+    return lo.tolist(), hi.tolist(), confidence.tolist()
+
+def _bounds_lists(a, b, shape, factor):
+    lo, hi, confidence = [], [], []
+    for a_, b_, s, f in zip(a, b, shape, factor):
+        a_, b_ = a_ * f, b_ * f
+        if s == RANGE:
+            low, high = a_, b_
+        elif s == SINGLE:
+            low, high = a_ - SINGLE_BAND, a_ + SINGLE_BAND
+        elif s == UPPER:
+            low, high = a_ - BOUND_BAND, a_
+        elif s == LOWER:
+            low, high = a_, a_ + BOUND_BAND
+        else:
+            low = high = 0.0
+        lo.append(int(round(max(low, 0))))
+        hi.append(int(round(high)))
+        confidence.append(0 if s == NONE else 1 if f != 1 else 3 if s == RANGE else 2)
+    return lo, hi, confidence
+
+# --- Column API ---
+
+def parse_prices(column):
+    # column: the raw price strings, one per row.
+    # -> {'price_min': [...], 'price_max': [...], 'unit': [...], 'confidence': [...]}
+    # as plain lists of ints / strings, ready for JSON payloads and SQL.
+    codes = {}
+    index = [codes.setdefault(raw, len(codes)) for raw in column]
+    parsed = [read_price(raw) for raw in codes]
+    a = [p[0] for p in parsed]
+    b = [p[1] for p in parsed]
+    shape = [p[2] for p in parsed]
+    units = [p[3] for p in parsed]
+    factor = [UNIT_FACTORS[u] for u in units]
+    bounds = _bounds_numpy if np is not None else _bounds_lists
+    lo, hi, confidence = bounds(a, b, shape, factor)
+    labels = [CONFIDENCE_LABELS[c] for c in confidence]
+    if np is not None:
+        take = np.asarray(index, dtype=np.intp)
+        return {
+            'price_min': np.asarray(lo, dtype=np.int64)[take].tolist(),
+            'price_max': np.asarray(hi, dtype=np.int64)[take].tolist(),
+            'unit': np.asarray(units, dtype=object)[take].tolist(),
+            'confidence': np.asarray(labels, dtype=object)[take].tolist(),
+        }
+    return {
+        'price_min': [lo[k] for k in index],
+        'price_max': [hi[k] for k in index],
+        'unit': [units[k] for k in index],
+        'confidence': [labels[k] for k in index],
+    }
+
+def price_rows(column):
+    # -> [(price_min, price_max, unit, confidence)], one tuple per row
+    prices = parse_prices(column)
+    return list(zip(*(prices[k] for k in PRICE_FIELDS)))
+
+def parse_price(price_raw):
+    # One value: -> (price_min, price_max, unit, confidence)
+    return price_rows([price_raw])[0]
@@ -1,25 +1,8 @@
 import csv
 import os
-import json
-import urllib.request
-import urllib.error
-import ssl
 import sys
 
-def load_env():
-    env = {}
-    try:
-        if os.path.exists('.env.local'):
-             with open('.env.local', 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#'): continue
-                    if '=' in line:
-                        key, val = line.split('=', 1)
-                        env[key.strip()] = val.strip().strip("'").strip('"')
-    except Exception:
-        pass
-    return env
+from supabase_client import load_env, get_client, APIError, byte_batches, post_split
 
 ENV = load_env()
 SUPABASE_URL = ENV.get('NEXT_PUBLIC_SUPABASE_URL')
@@ -33,13 +16,8 @@ if not SUPABASE_URL or not SERVICE_KEY:
 if SUPABASE_URL.endswith('/'):
     SUPABASE_URL = SUPABASE_URL[:-1]
 
-API_BASE = f"{SUPABASE_URL}/rest/v1"
-HEADERS = {
-    "apikey": SERVICE_KEY,
-    "Authorization": f"Bearer {SERVICE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "resolution=merge-duplicates" 
-}
+# Shared keep-alive pool (same client module as the job importers)
+CLIENT = get_client(SUPABASE_URL, SERVICE_KEY, prefer="resolution=merge-duplicates")
 
 def parse_faq(faq_string):
     if not faq_string: return None
@@ -94,29 +72,16 @@ def main():
         print("No data found in CSV.")
         return
 
-    # Batch insert/upsert
-    batch_size = 50
+    # Batch insert/upsert, batches sized by payload bytes (articles are long)
     print(f"Upserting {len(payload)} articles...")
     
-    for i in range(0, len(payload), batch_size):
-        batch = payload[i:i+batch_size]
-        
+    for i, batch in byte_batches(payload):
         # Upsert based on slug conflict
-        url = f"{API_BASE}/articles?on_conflict=slug"
-        req_body = json.dumps(batch).encode('utf-8')
-        
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-
-        req = urllib.request.Request(url, data=req_body, headers=HEADERS, method="POST")
-        
         try:
-            with urllib.request.urlopen(req, context=ctx) as res:
-                print(f"  Batch {i} - {i+len(batch)}: {res.status} OK")
-        except urllib.error.HTTPError as e:
-            msg = e.read().decode('utf-8')
-            print(f"  Error upserting batch {i}: {e.code} - {msg}")
+            post_split(CLIENT.request, 'articles', batch, params={'on_conflict': 'slug'})
+            print(f"  Batch {i} - {i+len(batch)}: OK")
+        except APIError as e:
+            print(f"  Error upserting batch {i}: {e.code} - {e.body}")
 
 if __name__ == "__main__":
     main()
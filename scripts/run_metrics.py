@@ -0,0 +1,76 @@
+import datetime
+import json
+import time
+
+# Per-run instrumentation for the importers.
+# Wall time per phase (CSV read, normalize, dedupe, delete, masters, upload
+# ...) plus the client's per-table request stats (latency percentiles, bytes,
+# rows/sec, retries), written as one JSON summary at the end of every run,
+# including failed ones.
+
+DEFAULT_METRICS = 'import_metrics.json'
+
+def import_mode(args):
+    # The importers' mutually exclusive run modes, for the summary
+    for mode in ('sync', 'staging', 'rpc', 'stream', 'resume'):
+        if getattr(args, mode, False):
+            return mode
+    return 'full'
+
+class RunMetrics:
+    def __init__(self, script, mode=None):
+        self.script = script
+        self.mode = mode
+        self.started_at = datetime.datetime.now().isoformat()
+        self._t0 = time.perf_counter()
+        self.phases = []
+        self._current = None
+        self.counts = {}
+
+    def phase(self, name, rows=None):
+        # Phases run back to back: starting one ends the previous
+        self.end_phase()
+        self._current = {'name': name, 'seconds': None, 'rows': rows, '_start': time.perf_counter()}
+        self.phases.append(self._current)
+
+    def rows(self, n):
+        # Rows handled by the current phase, for rows/sec
+        if self._current:
+            self._current['rows'] = n
+
+    def end_phase(self):
+        rec = self._current
+        if rec is None:
+            return
+        rec['seconds'] = round(time.perf_counter() - rec.pop('_start'), 3)
+        self._current = None
+        print(f"  [{rec['name']}] {rec['seconds']:.2f}s")
+
+    def count(self, key, value):
+        self.counts[key] = value
+
+    def summary(self, stats=None, status='ok'):
+        self.end_phase()
+        phases = []
+        for rec in self.phases:
+            rec = dict(rec)
+            if rec['rows'] and rec['seconds']:
+                rec['rows_per_sec'] = round(rec['rows'] / rec['seconds'], 1)
+            phases.append(rec)
+        return {
+            'script': self.script,
+            'mode': self.mode,
+            'status': status,
+            'started_at': self.started_at,
+            'wall_seconds': round(time.perf_counter() - self._t0, 3),
+            'phases': phases,
+            'counts': self.counts,
+            'tables': stats.summary() if stats else {},
+        }
+
+    def write(self, path, stats=None, status='ok'):
+        summary = self.summary(stats, status)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"Run metrics ({status}, {summary['wall_seconds']:.2f}s) written to {path}")
+        return summary
@@ -0,0 +1,282 @@
+import argparse
+import csv
+import os
+import random
+import re
+import sys
+import zlib
+from collections import Counter, defaultdict
+
+from job_normalizer import default_csv_path, iter_csv_rows
+from mapping_rules import DEFINITIONS_PATH, RULES, parse_definitions
+from skill_normalizer import ALIAS_TO_CANONICAL, SKILL_SEPARATORS, match_key, normalize_token
+
+# Near-duplicate skill spellings -> reviewed alias table.
+# Tokens the alias table does not know ('Java8', 'Vue3', 'Nuxt 3') are kept
+# as written and each one becomes a skill of its own. This tool collects
+# them from feed CSVs and clusters them by character n-gram similarity:
+#   1. each spelling is reduced to a key (NFKC, lower, no spaces or
+#      punctuation) and cut into n-grams, with ^ $ marking the ends
+#   2. MinHash signatures of the n-gram sets are split into LSH bands;
+#      spellings sharing a band bucket are candidate pairs, so they are
+#      never compared all against all
+#   3. candidates are kept at an exact Jaccard similarity >= --threshold
+# The canonical names of SKILL_NORMALIZATION_MAP and their aliases, and the
+# skill names listed in mapping_definitions.md, are the seeds: a spelling
+# close to a seed goes to that canonical. The others are
+# grouped among themselves under their most frequent spelling.
+# The proposals go to a TSV for review. --apply merges the approved rows
+# into the "Reviewed Skill Aliases" section of mapping_definitions.md,
+# where every importer picks them up as exact aliases (mapping_rules.py).
+#
+# Usage:
+#   python scripts/skill_clusters.py                     # feed CSV in cwd -> skill_alias_review.tsv
+#   python scripts/skill_clusters.py a.csv b.csv --threshold 0.6
+#   python scripts/skill_clusters.py --apply skill_alias_review.tsv
+
+DEFAULT_REVIEW = 'skill_alias_review.tsv'
+DEFAULT_THRESHOLD = 0.5
+AUTO_APPROVE = 0.6 # seed matches at least this close are pre-approved in the TSV
+NGRAM = 2
+NUM_PERM = 64
+BANDS = 32 # 32 bands x 2 rows: a pair at 0.5 Jaccard shares a bucket with p > 0.9999
+MERSENNE = (1 << 61) - 1
+
+REVIEW_COLUMNS = ['approve', 'alias', 'canonical', 'similarity', 'rows']
+REVIEWED_HEADING = '# スキル表記ゆれ・確認済み (Reviewed Skill Aliases)'
+REVIEWED_NOTE = [
+    '# scripts/skill_clusters.py で見つけた表記ゆれのうち、確認済みのものです。',
+    '# 値全体が一致した場合のみ統一名に寄せます（部分一致はしません）。',
+]
+
+KEY_PUNCT = re.compile(r'[\s\-_./・]+')
+
+# --- Similarity ---
+
+def shingle_key(s):
+    return KEY_PUNCT.sub('', match_key(s))
+
+def shingles(key, n=NGRAM):
+    padded = f"^{key}$"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+def minhash_params(num_perm=NUM_PERM, seed=1):
+    rng = random.Random(seed)
+    return [(rng.randrange(1, MERSENNE), rng.randrange(0, MERSENNE)) for _ in range(num_perm)]
+
+def minhash(grams, params):
+    hashes = [zlib.crc32(g.encode('utf-8')) for g in grams]
+    return [min((a * h + b) % MERSENNE for h in hashes) for a, b in params]
+
+def lsh_candidates(signatures, bands=BANDS):
+    # signatures: key -> signature. -> set of (key, key) pairs sharing a band
+    rows = len(next(iter(signatures.values()), [])) // bands
+    pairs = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for key, sig in signatures.items():
+            buckets[tuple(sig[band * rows:(band + 1) * rows])].append(key)
+        for keys in buckets.values():
+            for i, a in enumerate(keys):
+                for b in keys[i + 1:]:
+                    pairs.add((a, b) if a < b else (b, a))
+    return pairs
+
+# --- Clustering ---
+
+def collect_unknown_skills(csv_paths):
+    # -> (match key -> rows it appears in, match key -> Counter of spellings)
+    # for the tokens with no canonical name
+    counts = Counter()
+    spellings = defaultdict(Counter)
+    for path in csv_paths:
+        for row in iter_csv_rows(path):
+            if len(row) < 7:
+                continue
+            tech_skills_raw = row[3] if len(row) >= 9 else row[1]
+            seen = set()
+            for s in SKILL_SEPARATORS.split(tech_skills_raw):
+                clean_s, name = normalize_token(s.strip())
+                if not clean_s or name is not None:
+                    continue
+                key = match_key(clean_s)
+                spellings[key][clean_s] += 1
+                if key not in seen:
+                    seen.add(key)
+                    counts[key] += 1
+    return counts, spellings
+
+def seed_keys():
+    # shingle key -> canonical: the skill names of mapping_definitions.md
+    # as written there, then every canonical name and alias (an alias under
+    # two canonicals resolves as in ALIAS_TO_CANONICAL)
+    seeds = {}
+    for name in RULES['skill_names']:
+        key = shingle_key(name)
+        if key:
+            seeds[key] = name
+    for alias, canonical in ALIAS_TO_CANONICAL.items():
+        key = shingle_key(alias)
+        if key:
+            seeds[key] = canonical
+    return seeds
+
+def cluster_skills(counts, spellings, threshold=DEFAULT_THRESHOLD, ngram=NGRAM):
+    # As collected above. -> [(alias, canonical, similarity, rows, seeded)];
+    # canonical is a match key for new groups
+    seeds = seed_keys()
+    grams = {}
+    members = defaultdict(list) # shingle key -> match keys
+    for key in counts:
+        sk = shingle_key(key)
+        if sk:
+            members[sk].append(key)
+            grams.setdefault(sk, shingles(sk, ngram))
+    for sk in seeds:
+        grams.setdefault(sk, shingles(sk, ngram))
+
+    params = minhash_params()
+    signatures = {sk: minhash(g, params) for sk, g in grams.items()}
+    edges = defaultdict(list) # shingle key -> [(similarity, other)]
+    for a, b in lsh_candidates(signatures):
+        sim = jaccard(grams[a], grams[b])
+        if sim >= threshold:
+            edges[a].append((sim, b))
+            edges[b].append((sim, a))
+
+    proposals = []
+    unseeded = []
+    for sk, keys in members.items():
+        # Closest seed; an identical key (same spelling up to case/punctuation) wins outright
+        best = (1.0, sk) if sk in seeds else max(((sim, other) for sim, other in edges[sk] if other in seeds), default=None)
+        if best:
+            for key in keys:
+                proposals.append((key, seeds[best[1]], round(best[0], 3), counts[key], True))
+        else:
+            unseeded.append(sk)
+
+    # Spellings with no seed nearby: connected groups, named after the most used spelling
+    parent = {sk: sk for sk in unseeded}
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    for sk in unseeded:
+        for sim, other in edges[sk]:
+            if other in parent:
+                parent[find(sk)] = find(other)
+    groups = defaultdict(list)
+    for sk in unseeded:
+        groups[find(sk)].extend(members[sk])
+    for keys in groups.values():
+        # One key written several ways ('Figma', 'figma') is a group too
+        if len(keys) < 2 and len(spellings[keys[0]]) < 2:
+            continue
+        # The most used spelling itself is listed too, so all of its
+        # case/width variants take that spelling
+        rep = max(keys, key=lambda k: (counts[k], -len(k), k))
+        rep_grams = shingles(shingle_key(rep), ngram)
+        for key in keys:
+            sim = jaccard(shingles(shingle_key(key), ngram), rep_grams)
+            proposals.append((key, rep, round(sim, 3), counts[key], False))
+    return sorted(proposals, key=lambda p: (p[1].lower(), -p[3], p[0]))
+
+# --- Review table ---
+
+def write_review(path, proposals, spellings):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='\t')
+        writer.writerow(REVIEW_COLUMNS)
+        for alias, canonical, sim, rows, seeded in proposals:
+            approve = 'y' if seeded and sim >= AUTO_APPROVE else ''
+            # A new group is named by its most used spelling, as written
+            name = canonical if seeded else spellings[canonical].most_common(1)[0][0]
+            writer.writerow([approve, alias, name, sim, rows])
+
+def read_review(path):
+    # -> {canonical: [alias]} for the approved rows
+    approved = defaultdict(list)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for rec in csv.DictReader(f, delimiter='\t'):
+            if rec['approve'].strip().lower() in ('y', 'yes', 'x', '1'):
+                approved[rec['canonical'].strip()].append(match_key(rec['alias'].strip()))
+    return approved
+
+def apply_review(review_path, definitions_path=DEFINITIONS_PATH):
+    # Merges approved rows into the Reviewed Skill Aliases section -> aliases added
+    with open(definitions_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    reviewed = parse_definitions(text)['reviewed_skill_aliases']
+    known = {alias for aliases in reviewed.values() for alias in aliases}
+    added = 0
+    for canonical, aliases in read_review(review_path).items():
+        for alias in aliases:
+            if alias in known or ',' in alias or ':' in canonical:
+                continue # already reviewed, or not representable in the table
+            reviewed.setdefault(canonical, []).append(alias)
+            known.add(alias)
+            added += 1
+
+    lines = [REVIEWED_HEADING] + REVIEWED_NOTE + ['']
+    for canonical in sorted(reviewed, key=str.lower):
+        lines.append(f"- {canonical}: {', '.join(sorted(reviewed[canonical]))}")
+    section = '\n'.join(lines) + '\n'
+    start = text.find(REVIEWED_HEADING)
+    if start == -1:
+        text = text.rstrip('\n') + '\n\n---\n\n' + section
+    else:
+        # The section runs to the next top-level separator or the end of the file
+        end = text.find('\n---', start)
+        text = text[:start] + section + (text[end:] if end != -1 else '')
+    tmp = definitions_path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, definitions_path)
+    return added
+
+# --- Main ---
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Propose aliases for near-duplicate skill spellings.")
+    parser.add_argument('csv', nargs='*', help="Feed CSVs to scan (default: the Tech@DB feed in the current directory)")
+    parser.add_argument('--out', default=DEFAULT_REVIEW, help=f"Review table to write (default {DEFAULT_REVIEW})")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum n-gram Jaccard similarity (default {DEFAULT_THRESHOLD})")
+    parser.add_argument('--ngram', type=int, default=NGRAM, help=f"Character n-gram size (default {NGRAM})")
+    parser.add_argument('--apply', metavar='TSV', default=None,
+                        help="Add the approved rows of a review table to mapping_definitions.md")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.apply:
+        added = apply_review(args.apply)
+        print(f"Added {added} reviewed aliases to {DEFINITIONS_PATH}")
+        return
+
+    csv_paths = args.csv or [default_csv_path()]
+    missing = [p for p in csv_paths if not os.path.exists(p)]
+    if missing:
+        print(f"Error: CSV file not found at {missing[0]}")
+        sys.exit(1)
+
+    counts, spellings = collect_unknown_skills(csv_paths)
+    proposals = cluster_skills(counts, spellings, args.threshold, args.ngram)
+    write_review(args.out, proposals, spellings)
+
+    seeded = sum(1 for p in proposals if p[4])
+    new_groups = len({p[1] for p in proposals if not p[4]})
+    after = len(counts) - len(proposals) + new_groups
+    print(f"{len(counts)} skill spellings without a canonical name")
+    print(f"  {seeded} close to an existing canonical, {len(proposals) - seeded} in {new_groups} new groups")
+    print(f"  {len(counts)} -> {after} such skills if every proposal is approved")
+    print(f"Review table: {args.out} (mark approve = y, then --apply)")
+
+if __name__ == "__main__":
+    main()
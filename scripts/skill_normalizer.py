@@ -0,0 +1,65 @@
+import re
+import unicodedata
+
+from aho_corasick import on_token_boundary
+from mapping_rules import RULES
+from normalize_cache import Memo
+
+# Skill-name normalization shared by the SQL seed generators and the REST
+# importers, so every path maps a feed's skill tokens to the same names.
+# The alias table is compiled once, with the rule bundle: exact aliases go in
+# a dict, and all of them go into one automaton that finds aliases inside a
+# longer token ("AWS構築" -> AWS) in a single pass. A match inside a token only counts on
+# a token boundary: an ASCII alias may not touch ASCII letters or digits
+# ('ts' is not in 'tests', 'go' is not in 'google'), while kana/kanji next to
+# it are a boundary, since Japanese does not separate words with spaces.
+
+# Canonical skills (must match JobFilter.tsx) and their aliases, compiled
+# from mapping_definitions.md (mapping_rules.py):
+#   SKILL_NORMALIZATION_MAP  'Canonical Name' -> ['alias1', 'alias2', ...]
+#   ALIAS_TO_CANONICAL       lowercased alias or canonical -> canonical, plus
+#                            the reviewed whole-token aliases (skill_clusters.py)
+#   ALIAS_MATCHER            automaton over the curated aliases of 2+ chars
+SKILL_NORMALIZATION_MAP = RULES['skill_normalization_map']
+ALIAS_TO_CANONICAL = RULES['alias_to_canonical']
+ALIAS_MATCHER = RULES['alias_matcher']
+
+SKILL_SEPARATORS = re.compile('[,、\n]')
+PAREN_NOTES = re.compile(r'\(.*?\)|（.*?）')
+
+def match_key(s):
+    # Full-width letters/digits fold to ASCII ('ＡＷＳ' -> 'aws')
+    return unicodedata.normalize('NFKC', s).lower()
+
+def canonical_skill(clean_s):
+    # -> canonical name, or None. Exact alias first, then the longest alias
+    # on a token boundary inside the token.
+    key = match_key(clean_s)
+    if key in ALIAS_TO_CANONICAL:
+        return ALIAS_TO_CANONICAL[key]
+    return ALIAS_MATCHER.longest(key, on_token_boundary)
+
+def _normalize_token(s):
+    # -> (cleaned token, canonical name or None); parenthesised notes are dropped
+    clean_s = PAREN_NOTES.sub('', s).strip()
+    return clean_s, (canonical_skill(clean_s) if clean_s else None)
+
+# Raw token -> (cleaned token, canonical), memoized
+normalize_token = Memo('skill_tokens', _normalize_token, (ALIAS_TO_CANONICAL,))
+
+def normalize_skills(tech_skills_raw, max_unmatched_len=None):
+    # -> skill names, unique, in order; tokens are comma / 、 / newline
+    # separated. A token without an alias is kept as written, unless it is
+    # max_unmatched_len chars or longer.
+    skills = []
+    for s in SKILL_SEPARATORS.split(tech_skills_raw):
+        clean_s, name = normalize_token(s.strip())
+        if not clean_s:
+            continue
+        if name is None:
+            if max_unmatched_len is not None and len(clean_s) >= max_unmatched_len:
+                continue
+            name = clean_s
+        if name not in skills:
+            skills.append(name)
+    return skills
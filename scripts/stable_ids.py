@@ -0,0 +1,39 @@
+import hashlib
+import re
+import uuid
+
+# Deterministic identifiers derived from natural keys.
+# The same job_code / skill name / role slug / location slug always maps to
+# the same UUIDv5, so re-imports update rows in place instead of minting new
+# primary keys, and ids/slugs cached downstream stay valid.
+#
+# Used by the REST importers and by the SQL seed generators alike, so a seed
+# and an API import of the same feed produce identical keys.
+
+# Never change this: every stored id is derived from it
+NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'https://freelancebox/import-ids')
+
+def _uuid(kind, key):
+    return str(uuid.uuid5(NAMESPACE, f"{kind}:{key}"))
+
+def job_id(job_code):
+    return _uuid('job', job_code.strip())
+
+def skill_id(name):
+    return _uuid('skill', name.strip())
+
+def role_id(slug):
+    return _uuid('role', slug)
+
+def location_id(slug):
+    return _uuid('location', slug)
+
+def skill_slug(name):
+    # ASCII part of the name plus a short digest of the full name, so
+    # 'C#' / 'C++' / Japanese-only names still get distinct, stable slugs
+    digest = hashlib.sha1(name.strip().encode('utf-8')).hexdigest()[:8]
+    slug = re.sub(r'[^a-z0-9]', '-', name.lower())
+    slug = re.sub(r'-+', '-', slug).strip('-')
+    if not slug or len(slug) < 2:
+        return f"skill-{digest}"
+    return f"{slug[:40]}-{digest}"
@@ -0,0 +1,721 @@
+import asyncio
+import email.utils
+import gzip
+import http.client
+import json
+import math
+import os
+import queue
+import random
+import ssl
+import threading
+import time
+import urllib.parse
+
+# Shared PostgREST client for the Supabase import scripts.
+# Connections are kept alive in a small pool so that every batch reuses an
+# already-open TCP/TLS session instead of paying a fresh handshake.
+
+# --- Configuration & Env Loading ---
+
+def load_env(path='.env.local'):
+    env = {}
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'): continue
+                if '=' in line:
+                    key, val = line.split('=', 1)
+                    env[key.strip()] = val.strip().strip("'").strip('"')
+    except Exception:
+        pass
+    # Environment variables win, e.g. to point a run at scripts/postgrest_standin.py
+    for key in ('NEXT_PUBLIC_SUPABASE_URL', 'SUPABASE_SERVICE_ROLE_KEY'):
+        if os.environ.get(key):
+            env[key] = os.environ[key]
+    return env
+
+
+class APIError(Exception):
+    def __init__(self, code, url, body):
+        super().__init__(f"API Error [{code}] {url}: {body}")
+        self.code = code
+        self.url = url
+        self.body = body
+
+
+# Errors that mean a pooled keep-alive connection was closed by the server
+# while idle. The request is retried once on a fresh connection.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+def percentile(values, p):
+    # Nearest-rank percentile of an unsorted list
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+class WireStats:
+    # Bytes on the wire per table, so bulk-write savings are visible per run.
+    # Also keeps each request's latency and rows written for the JSON run
+    # summary (see run_metrics.py).
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tables = {}
+        self.latencies = {}
+
+    def record(self, table, sent, sent_raw, received, started=None, rows=0):
+        ended = time.monotonic()
+        with self._lock:
+            t = self._table(table)
+            t['requests'] += 1
+            t['sent'] += sent
+            t['sent_raw'] += sent_raw
+            t['received'] += received
+            t['rows'] += rows
+            if started is not None:
+                self.latencies.setdefault(table, []).append(ended - started)
+                if rows:
+                    # Active span of the writes only, for rows/sec
+                    t['first'] = started if t['first'] is None else min(t['first'], started)
+                    t['last'] = ended if t['last'] is None else max(t['last'], ended)
+
+    def _table(self, table):
+        return self.tables.setdefault(table, {'requests': 0, 'sent': 0, 'sent_raw': 0, 'received': 0, 'retries': 0,
+                                              'rows': 0, 'first': None, 'last': None})
+
+    def summary(self):
+        # -> {table: counters + latency percentiles (ms) + rows/sec over the
+        # table's active span}
+        out = {}
+        with self._lock:
+            for table, t in sorted(self.tables.items()):
+                lat = self.latencies.get(table, [])
+                span = (t['last'] - t['first']) if t['first'] is not None else 0.0
+                out[table] = {
+                    'requests': t['requests'],
+                    'retries': t['retries'],
+                    'rows': t['rows'],
+                    'bytes_sent': t['sent'],
+                    'bytes_uncompressed': t['sent_raw'],
+                    'bytes_received': t['received'],
+                    'latency_ms': {name: round(percentile(lat, p) * 1000, 1) if lat else None
+                                   for name, p in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))},
+                    'active_seconds': round(span, 3),
+                    'rows_per_sec': round(t['rows'] / span, 1) if span > 0 and t['rows'] else None,
+                }
+        return out
+
+    def record_retry(self, table):
+        with self._lock:
+            self._table(table)['retries'] += 1
+
+    def report(self):
+        if not self.tables:
+            return
+        width = max(14, max(len(table) + 2 for table in self.tables))
+        print("--- Wire Stats (bytes) ---")
+        print(f"  {'table':<{width}}{'requests':>9}{'sent':>12}{'uncompressed':>14}{'received':>12}{'retries':>9}")
+        for table, t in sorted(self.tables.items()):
+            print(f"  {table:<{width}}{t['requests']:>9}{t['sent']:>12}{t['sent_raw']:>14}{t['received']:>12}"
+                  f"{t['retries']:>9}")
+
+
+# --- Rate limiting: backoff + AIMD concurrency ---
+
+# Statuses that mean "slow down", not "bad request". The request was not
+# processed, so it is safe to resend even for POST.
+THROTTLE_STATUSES = (429, 503)
+MAX_RETRIES = 6
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+# Starting in-flight limit; AIMD raises it towards the pool size / max_in_flight
+INITIAL_IN_FLIGHT = 2
+
+def parse_retry_after(value):
+    # Retry-After is either delta-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_delay(attempt, retry_after=None):
+    # Server hint first, else exponential backoff with full jitter
+    hinted = parse_retry_after(retry_after)
+    if hinted is not None:
+        return min(hinted, BACKOFF_CAP)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class AIMDController:
+    # In-flight request limit tuned like TCP congestion control: +1 per
+    # window of successful responses, halved on a throttle response or a
+    # response slower than latency_target (at most once per cooldown, so one
+    # burst of 429s counts as one signal).
+    def __init__(self, initial, max_limit, min_limit=1, latency_target=5.0, cooldown=1.0):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self._last_decrease = 0.0
+        self.decreases = 0
+
+    @property
+    def slots(self):
+        return int(self.limit)
+
+    def on_success(self, latency):
+        if latency > self.latency_target:
+            self.on_congestion()
+            return
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def on_congestion(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit / 2)
+        self.decreases += 1
+
+
+class ConcurrencyLimiter:
+    # Blocking gate for threads sharing one SupabaseClient
+    def __init__(self, controller):
+        self.controller = controller
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.controller.slots:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency=None, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.controller.on_congestion()
+            elif latency is not None:
+                self.controller.on_success(latency)
+            self._cond.notify_all()
+
+
+class AsyncConcurrencyLimiter:
+    # ConcurrencyLimiter for AsyncSupabaseClient (one event loop)
+    def __init__(self, controller):
+        self.controller = controller
+        self.in_flight = 0
+        self._cond = None
+
+    async def acquire(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.controller.slots)
+            self.in_flight += 1
+
+    async def release(self, latency=None, throttled=False):
+        async with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.controller.on_congestion()
+            elif latency is not None:
+                self.controller.on_success(latency)
+            self._cond.notify_all()
+
+
+class ConnectionPool:
+    def __init__(self, base_url, pool_size=4, timeout=60, verify_ssl=True):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+
+        self.ssl_context = None
+        if self.scheme == 'https':
+            # Built once per pool, not per request
+            self.ssl_context = ssl.create_default_context()
+            if not verify_ssl:
+                self.ssl_context.check_hostname = False
+                self.ssl_context.verify_mode = ssl.CERT_NONE
+
+    def connect(self):
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self.connect(), False
+
+    def release(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def discard(self, conn):
+        conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def encode_json(data, compact=False):
+    if compact:
+        # Raw UTF-8 instead of \uXXXX escapes: Japanese text is ~1/3 the size
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return json.dumps(data).encode('utf-8')
+
+
+def rows_written(data):
+    if isinstance(data, list):
+        return len(data)
+    return 1 if data else 0
+
+def table_of(endpoint):
+    return endpoint.split('?', 1)[0]
+
+
+WRITE_METHODS = ('POST', 'PATCH', 'PUT', 'DELETE')
+
+# Bodies smaller than this are not worth the gzip header/CPU overhead
+GZIP_MIN_BYTES = 1024
+
+
+class SupabaseClient:
+    def __init__(self, supabase_url, service_key, pool_size=4, timeout=60, verify_ssl=True,
+                 prefer="return=representation", bulk_write=False, gzip_requests=False,
+                 max_retries=MAX_RETRIES, latency_target=5.0, initial_in_flight=INITIAL_IN_FLIGHT):
+        self.api_base = f"{supabase_url.rstrip('/')}/rest/v1"
+        self.headers = {
+            "apikey": service_key,
+            "Authorization": f"Bearer {service_key}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
+        }
+        self.prefer = prefer
+        # Bulk-write mode: compact UTF-8 JSON, return=minimal. gzip request
+        # bodies are opt-in: stock PostgREST/Supabase does not decompress
+        # them, only a gateway in front of it can
+        self.bulk_write = bulk_write
+        self.gzip_requests = gzip_requests
+        self.stats = WireStats()
+        self.pool = ConnectionPool(self.api_base, pool_size=pool_size, timeout=timeout, verify_ssl=verify_ssl)
+        # Starts at initial_in_flight and grows while responses stay fast, up
+        # to one request per pooled connection; backs off when the server
+        # pushes back
+        self.max_retries = max_retries
+        self.limiter = ConcurrencyLimiter(AIMDController(initial_in_flight, pool_size, latency_target=latency_target))
+
+    def _prefer_header(self, method, bulk):
+        prefs = [p.strip() for p in self.prefer.split(',') if p.strip()]
+        if bulk and method in WRITE_METHODS:
+            prefs = [p for p in prefs if not p.startswith('return=')]
+            prefs.append('return=minimal')
+        return ','.join(prefs)
+
+    def _encode_body(self, data, bulk, headers):
+        if data is None:
+            return None, 0
+        raw = encode_json(data, compact=bulk)
+        if bulk and self.gzip_requests and len(raw) >= GZIP_MIN_BYTES:
+            headers["Content-Encoding"] = "gzip"
+            return gzip.compress(raw, compresslevel=6), len(raw)
+        return raw, len(raw)
+
+    def _send(self, conn, method, path, body, headers):
+        conn.request(method, path, body=body, headers=headers)
+        res = conn.getresponse()
+        # Always drain the body so the connection can be reused
+        resp_body = res.read()
+        return res, resp_body
+
+    def _exchange(self, method, path, body, headers):
+        conn, reused = self.pool.acquire()
+        try:
+            res, resp_body = self._send(conn, method, path, body, headers)
+        except STALE_CONNECTION_ERRORS:
+            self.pool.discard(conn)
+            if not reused:
+                raise
+            conn = self.pool.connect()
+            try:
+                res, resp_body = self._send(conn, method, path, body, headers)
+            except Exception:
+                self.pool.discard(conn)
+                raise
+        except Exception:
+            self.pool.discard(conn)
+            raise
+
+        if res.will_close:
+            self.pool.discard(conn)
+        else:
+            self.pool.release(conn)
+        return res, resp_body
+
+    def request(self, endpoint, method="GET", data=None, params=None, headers=None, bulk=None):
+        if bulk is None:
+            bulk = self.bulk_write
+        path = f"{self.pool.base_path}/{endpoint}"
+        if params:
+            path += f"?{urllib.parse.urlencode(params)}"
+        url = f"{self.api_base}/{endpoint}"
+
+        req_headers = dict(self.headers)
+        prefer = self._prefer_header(method, bulk)
+        if prefer:
+            req_headers["Prefer"] = prefer
+        if headers:
+            req_headers.update(headers)
+
+        req_body, raw_len = self._encode_body(data, bulk, req_headers)
+
+        table = table_of(endpoint)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                res, resp_body = self._exchange(method, path, req_body, req_headers)
+            except Exception as e:
+                # A timeout is an overload signal too
+                self.limiter.release(throttled=isinstance(e, TimeoutError))
+                raise
+            throttled = res.status in THROTTLE_STATUSES
+            self.limiter.release(time.monotonic() - started, throttled=throttled)
+            retry = throttled and attempt < self.max_retries
+            # Rows count once, for the attempt that wrote them
+            written = rows_written(data) if res.status < 400 and not retry else 0
+            self.stats.record(table, len(req_body or b''), raw_len, len(resp_body), started, written)
+            if not retry:
+                break
+            delay = retry_delay(attempt, res.getheader('Retry-After'))
+            self.stats.record_retry(table)
+            print(f"  [{res.status}] {table}: retrying in {delay:.1f}s (concurrency {self.limiter.controller.slots})")
+            time.sleep(delay)
+
+        if res.getheader('Content-Encoding', '') == 'gzip' and resp_body:
+            resp_body = gzip.decompress(resp_body)
+
+        if res.status >= 400:
+            body = resp_body.decode('utf-8', errors='replace')
+            print(f"API Error [{res.status}] {url}: {body}")
+            raise APIError(res.status, url, body)
+
+        if res.status == 204 or not resp_body:
+            return None
+        return json.loads(resp_body)
+
+    def close(self):
+        self.pool.close()
+
+
+# --- PostgREST helpers (take any api_request-style callable) ---
+
+PAGE_SIZE = 1000
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i+size]
+
+# Write batches are cut by encoded size rather than row count: job rows range
+# from a few hundred bytes to tens of KB of markdown.
+BATCH_BYTES = 512 * 1024
+MAX_BATCH_ROWS = 1000
+
+def byte_batches(rows, max_bytes=BATCH_BYTES, max_rows=MAX_BATCH_ROWS):
+    # -> (start index, rows) with each batch's JSON body within max_bytes.
+    # Measured with the default (\uXXXX) encoding, the larger of the two, so
+    # the budget holds in --bulk mode too. An oversized row goes alone.
+    batch = []
+    size = 2
+    start = 0
+    for i, row in enumerate(rows):
+        row_bytes = len(encode_json(row)) + 1
+        if batch and (size + row_bytes > max_bytes or len(batch) >= max_rows):
+            yield start, batch
+            batch = []
+            size = 2
+            start = i
+        batch.append(row)
+        size += row_bytes
+    if batch:
+        yield start, batch
+
+def is_payload_error(e):
+    # The request was too large or too slow, not wrong: worth retrying smaller.
+    # 57014 is Postgres' statement_timeout cancel (nothing was committed). A
+    # client-side timeout is not one of these: the insert may have committed,
+    # and sending it again would duplicate the rows.
+    return isinstance(e, APIError) and (e.code == 413 or '57014' in e.body)
+
+def post_split(api_request, table, rows, params=None, headers=None):
+    # POST rows; on a payload error split the batch in half and retry each
+    # half, down to single rows.
+    try:
+        api_request(table, 'POST', data=rows, params=params, headers=headers)
+    except Exception as e:
+        if len(rows) < 2 or not is_payload_error(e):
+            raise
+        mid = len(rows) // 2
+        print(f"  {table}: batch of {len(rows)} rejected ({type(e).__name__}), retrying as {mid} + {len(rows) - mid}")
+        post_split(api_request, table, rows[:mid], params, headers)
+        post_split(api_request, table, rows[mid:], params, headers)
+
+async def post_split_async(request, table, rows, params=None, headers=None):
+    # post_split for AsyncSupabaseClient.request
+    try:
+        await request(table, 'POST', data=rows, params=params, headers=headers)
+    except Exception as e:
+        if len(rows) < 2 or not is_payload_error(e):
+            raise
+        mid = len(rows) // 2
+        print(f"  {table}: batch of {len(rows)} rejected ({type(e).__name__}), retrying as {mid} + {len(rows) - mid}")
+        await post_split_async(request, table, rows[:mid], params, headers)
+        await post_split_async(request, table, rows[mid:], params, headers)
+
+def in_filter(values):
+    # PostgREST in.(...) with every value double-quoted so commas etc. are safe
+    quoted = ['"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values]
+    return f"in.({','.join(quoted)})"
+
+def fetch_all(api_request, table, select, page_size=PAGE_SIZE, params=None):
+    # Paginated GET; PostgREST caps un-ranged responses at max-rows
+    rows = []
+    offset = 0
+    while True:
+        query = {'select': select, 'limit': page_size, 'offset': offset}
+        if params:
+            query.update(params)
+        page = api_request(table, 'GET', params=query) or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        offset += page_size
+
+async def fetch_all_async(request, table, select, page_size=PAGE_SIZE, params=None):
+    # fetch_all for AsyncSupabaseClient.request
+    rows = []
+    offset = 0
+    while True:
+        query = {'select': select, 'limit': page_size, 'offset': offset}
+        if params:
+            query.update(params)
+        page = await request(table, 'GET', params=query) or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        offset += page_size
+
+
+# --- Shared per-run client ---
+
+_CLIENT = None
+_CLIENT_ARGS = None
+_CLIENT_LOCK = threading.Lock()
+
+def get_client(supabase_url, service_key, **kwargs):
+    # One pool per process run; every importer calls this instead of
+    # constructing its own client. A later call asking for other settings
+    # would silently get the first client's, so it raises instead.
+    global _CLIENT, _CLIENT_ARGS
+    args = (supabase_url, service_key, kwargs)
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = SupabaseClient(supabase_url, service_key, **kwargs)
+            _CLIENT_ARGS = args
+        elif args != _CLIENT_ARGS:
+            raise ValueError(f"get_client: the shared client was already created with {_CLIENT_ARGS[2]}, "
+                             f"not {kwargs}")
+        return _CLIENT
+
+
+# --- asyncio client ---
+
+class AsyncSupabaseClient:
+    # Non-blocking HTTP/1.1 keep-alive client on asyncio streams. Speaks the
+    # same PostgREST subset as SupabaseClient; max_in_flight caps concurrent
+    # requests (and therefore open connections), and 429/503 responses back
+    # it off the same way as the sync client.
+    def __init__(self, supabase_url, service_key, max_in_flight=8, timeout=60, verify_ssl=True,
+                 prefer="return=representation", bulk_write=False, gzip_requests=False,
+                 max_retries=MAX_RETRIES, latency_target=5.0, initial_in_flight=INITIAL_IN_FLIGHT):
+        self.api_base = f"{supabase_url.rstrip('/')}/rest/v1"
+        parsed = urllib.parse.urlsplit(self.api_base)
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        self.base_path = parsed.path.rstrip('/')
+        self.ssl_context = None
+        if parsed.scheme == 'https':
+            self.ssl_context = ssl.create_default_context()
+            if not verify_ssl:
+                self.ssl_context.check_hostname = False
+                self.ssl_context.verify_mode = ssl.CERT_NONE
+        self.headers = {
+            "Host": parsed.netloc,
+            "apikey": service_key,
+            "Authorization": f"Bearer {service_key}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
+        }
+        self.prefer = prefer
+        self.bulk_write = bulk_write
+        self.gzip_requests = gzip_requests
+        self.timeout = timeout
+        self.stats = WireStats()
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        # AIMD-tuned from initial_in_flight, never above max_in_flight
+        self.limiter = AsyncConcurrencyLimiter(AIMDController(initial_in_flight, max_in_flight,
+                                                              latency_target=latency_target))
+        self._idle = []
+
+    # Reuse the sync client's header/body rules
+    _prefer_header = SupabaseClient._prefer_header
+    _encode_body = SupabaseClient._encode_body
+
+    async def _connect(self):
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl_context)
+
+    async def _read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, val = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = val.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b''.join(parts)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        elif status in (204, 304):
+            body = b''
+        else:
+            body = await reader.read()
+            headers['connection'] = 'close'
+        return status, headers, body
+
+    async def _send(self, method, path, body, headers, fresh=False):
+        reused = bool(self._idle) and not fresh
+        reader, writer = self._idle.pop() if reused else await self._connect()
+        lines = [f"{method} {path} HTTP/1.1"]
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        lines.append(f"Content-Length: {len(body or b'')}")
+        try:
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + (body or b''))
+            await writer.drain()
+            status, res_headers, resp_body = await asyncio.wait_for(self._read_response(reader), self.timeout)
+        except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+            writer.close()
+            if not reused:
+                raise
+            # Idle keep-alive socket was closed by the server. Others idle as
+            # long are likely stale too, so drop them and retry once fresh.
+            while self._idle:
+                self._idle.pop()[1].close()
+            return await self._send(method, path, body, headers, fresh=True)
+        except Exception:
+            writer.close()
+            raise
+
+        if res_headers.get('connection', '').lower() == 'close':
+            writer.close()
+        else:
+            self._idle.append((reader, writer))
+        return status, res_headers, resp_body
+
+    async def request(self, endpoint, method="GET", data=None, params=None, headers=None, bulk=None):
+        if bulk is None:
+            bulk = self.bulk_write
+        path = f"{self.base_path}/{endpoint}"
+        if params:
+            path += f"?{urllib.parse.urlencode(params)}"
+        url = f"{self.api_base}/{endpoint}"
+
+        req_headers = dict(self.headers)
+        prefer = self._prefer_header(method, bulk)
+        if prefer:
+            req_headers["Prefer"] = prefer
+        if headers:
+            req_headers.update(headers)
+        req_body, raw_len = self._encode_body(data, bulk, req_headers)
+
+        table = table_of(endpoint)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                status, res_headers, resp_body = await self._send(method, path, req_body, req_headers)
+            except Exception as e:
+                await self.limiter.release(throttled=isinstance(e, (TimeoutError, asyncio.TimeoutError)))
+                raise
+            throttled = status in THROTTLE_STATUSES
+            await self.limiter.release(time.monotonic() - started, throttled=throttled)
+            retry = throttled and attempt < self.max_retries
+            written = rows_written(data) if status < 400 and not retry else 0
+            self.stats.record(table, len(req_body or b''), raw_len, len(resp_body), started, written)
+            if not retry:
+                break
+            delay = retry_delay(attempt, res_headers.get('retry-after'))
+            self.stats.record_retry(table)
+            print(f"  [{status}] {table}: retrying in {delay:.1f}s (concurrency {self.limiter.controller.slots})")
+            await asyncio.sleep(delay)
+        if res_headers.get('content-encoding') == 'gzip' and resp_body:
+            resp_body = gzip.decompress(resp_body)
+
+        if status >= 400:
+            body = resp_body.decode('utf-8', errors='replace')
+            print(f"API Error [{status}] {url}: {body}")
+            raise APIError(status, url, body)
+        if status == 204 or not resp_body:
+            return None
+        return json.loads(resp_body)
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
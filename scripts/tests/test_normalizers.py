@@ -0,0 +1,160 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import normalize_cache
+import price_parser
+from aho_corasick import Automaton, on_token_boundary
+from normalize_cache import MEMOS, Memo, clear_cache, load_cache, save_cache
+from price_parser import parse_price, parse_prices
+from skill_normalizer import normalize_skills
+
+# Behaviour checks for the shared matching modules every importer relies on:
+# the Aho-Corasick automaton, the skill alias matcher, the normalization
+# cache and the price parser. Expected values are the results the importers
+# store today; a change here changes what gets uploaded.
+#
+# Usage:
+#   python -m unittest discover -s scripts/tests
+#   python -m pytest -q scripts/tests
+
+
+class AutomatonTest(unittest.TestCase):
+    def setUp(self):
+        self.automaton = Automaton([('he', 'HE'), ('she', 'SHE'), ('hers', 'HERS'), ('his', 'HIS')])
+
+    def test_reports_every_occurrence_by_end_position(self):
+        matches = [(start, end, value) for start, end, _, value in self.automaton.iter_matches('ushers')]
+        self.assertEqual(matches, [(1, 4, 'SHE'), (2, 4, 'HE'), (2, 6, 'HERS')])
+
+    def test_longest_match_wins(self):
+        self.assertEqual(self.automaton.longest('ushers'), 'HERS')
+        self.assertIsNone(self.automaton.longest('xyz'))
+
+    def test_longest_ties_go_to_the_earliest_then_the_first_added(self):
+        self.assertEqual(Automaton([('ab', 1), ('cd', 2)]).longest('cdab'), 2)
+        self.assertEqual(Automaton([('ab', 1), ('ab', 2)]).longest('ab'), 1)
+
+    def test_leftmost_longest_does_not_overlap(self):
+        self.assertEqual(self.automaton.leftmost_longest('ushers'), [(1, 4, 'SHE')])
+        places = Automaton([('東', 'E'), ('京都', 'KYOTO'), ('東京都', 'TOKYO')])
+        self.assertEqual(places.leftmost_longest('東京都港区'), [(0, 3, 'TOKYO')])
+        self.assertEqual(places.leftmost_longest('京都市'), [(0, 2, 'KYOTO')])
+
+    def test_token_boundary(self):
+        skills = Automaton([('go', 'Go'), ('ts', 'TS'), ('aws', 'AWS')])
+        found = skills.leftmost_longest('google tests aws構築 go', accept=on_token_boundary)
+        self.assertEqual([value for _, _, value in found], ['AWS', 'Go'])
+        self.assertIsNone(skills.longest('golang', on_token_boundary))
+
+
+class SkillAliasTest(unittest.TestCase):
+    def test_aliases_and_boundaries(self):
+        self.assertEqual(normalize_skills('Java(Spring), TS, React.js'), ['Java', 'TypeScript', 'React'])
+        self.assertEqual(normalize_skills('AWS構築、ＡＷＳ'), ['AWS'])
+        self.assertEqual(normalize_skills('google, tests'), ['google', 'tests'])
+
+    def test_unknown_tokens_are_kept_unless_too_long(self):
+        self.assertEqual(normalize_skills('Figma'), ['Figma'])
+        self.assertEqual(normalize_skills('とても長い説明文のスキル欄', max_unmatched_len=10), [])
+
+
+class NormalizeCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.saved = dict(MEMOS)
+        MEMOS.clear()
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+
+    def tearDown(self):
+        MEMOS.clear()
+        MEMOS.update(self.saved)
+        os.remove(self.path)
+
+    def memo(self, table, maxsize=normalize_cache.DEFAULT_MAXSIZE):
+        def fn(raw):
+            self.calls.append(raw)
+            return (raw.upper(), len(raw))
+        return Memo('test', fn, (table,), maxsize=maxsize)
+
+    def test_memoizes_and_evicts_least_recently_used(self):
+        memo = self.memo({'a': 1}, maxsize=2)
+        memo('x')
+        memo('y')
+        memo('x')
+        memo('z') # evicts 'y'
+        self.assertEqual(list(memo.entries), ['x', 'z'])
+        self.assertEqual(memo.stats(), {'hits': 1, 'misses': 3, 'size': 2})
+
+    def test_saved_entries_reload_as_tuples(self):
+        self.memo({'a': 1})('aws')
+        save_cache(self.path)
+        clear_cache()
+        self.assertEqual(load_cache(self.path), 1)
+        self.calls.clear()
+        self.assertEqual(MEMOS['test']('aws'), ('AWS', 3))
+        self.assertEqual(self.calls, [])
+
+    def test_changed_tables_drop_saved_entries(self):
+        self.memo({'a': 1})('aws')
+        save_cache(self.path)
+        self.memo({'a': 2}) # the mapping changed
+        self.assertEqual(load_cache(self.path), 0)
+
+    def test_other_cache_format_is_ignored(self):
+        self.memo({'a': 1})('aws')
+        save_cache(self.path)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data['format'] = normalize_cache.CACHE_FORMAT + 1
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        clear_cache()
+        self.assertEqual(load_cache(self.path), 0)
+
+
+class PriceParserTest(unittest.TestCase):
+    # raw -> (price_min, price_max, unit, confidence)
+    CASES = {
+        '60~70万円': (600000, 700000, 'month', 'high'),
+        '65万円～75万円': (650000, 750000, 'month', 'high'),
+        '80万円': (750000, 850000, 'month', 'medium'),
+        '800,000円': (750000, 850000, 'month', 'medium'),
+        '〜90万': (800000, 900000, 'month', 'medium'),
+        '〜 90万円/月': (800000, 900000, 'month', 'medium'),
+        '50万円以下': (400000, 500000, 'month', 'medium'),
+        '60万〜': (600000, 700000, 'month', 'medium'),
+        '70万円（精算140-180h）': (650000, 750000, 'month', 'medium'),
+        '時給3000円': (430000, 530000, 'hour', 'low'),
+        '日額5万円': (950000, 1050000, 'day', 'low'),
+        'スキル見合い': (0, 0, '', 'none'),
+        '': (0, 0, '', 'none'),
+    }
+
+    def test_single_values(self):
+        for raw, expected in self.CASES.items():
+            with self.subTest(raw=raw):
+                self.assertEqual(parse_price(raw), expected)
+
+    def test_column_matches_single_values(self):
+        column = list(self.CASES) * 3
+        prices = parse_prices(column)
+        for i, raw in enumerate(column):
+            row = tuple(prices[k][i] for k in price_parser.PRICE_FIELDS)
+            self.assertEqual(row, self.CASES[raw])
+
+    @unittest.skipIf(price_parser.np is None, "numpy not installed")
+    def test_numpy_and_list_bounds_agree(self):
+        parsed = [price_parser.read_price(raw) for raw in self.CASES]
+        args = ([p[0] for p in parsed], [p[1] for p in parsed], [p[2] for p in parsed],
+                [price_parser.UNIT_FACTORS[p[3]] for p in parsed])
+        self.assertEqual(price_parser._bounds_numpy(*args), price_parser._bounds_lists(*args))
+
+
+if __name__ == '__main__':
+    unittest.main()
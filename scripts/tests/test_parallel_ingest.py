@@ -0,0 +1,181 @@
+import csv
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parallel_ingest
+from job_normalizer import build_roles_registry, dedupe_job_code, normalize_row, price_column, read_csv_rows
+from parallel_ingest import parallel_normalize, read_chunk_rows, record_boundaries
+
+# --workers N must read the feed exactly as a serial run does: chunk
+# boundaries only on record ends, and the merged jobs, locations and
+# job_code renames equal to the serial loop in import_ver1_2.py.
+#
+# Usage:
+#   python -m unittest discover -s scripts/tests
+#   python -m pytest -q scripts/tests
+
+
+def reference_boundaries(data, parts):
+    # record_boundaries before quotes were counted per block: parity from
+    # the whole file at once
+    size = len(data)
+    if size == 0:
+        return []
+    bounds = [0]
+    if parts > 1 and data.count(b'"') % 2 == 0:
+        pos = 0
+        inside = False
+        for k in range(1, parts):
+            target = size * k // parts
+            if target <= pos:
+                continue
+            inside ^= bool(data[pos:target].count(b'"') % 2)
+            pos = target
+            while True:
+                nl = data.find(b'\n', pos)
+                if nl == -1:
+                    pos = size
+                    break
+                inside ^= bool(data[pos:nl].count(b'"') % 2)
+                pos = nl + 1
+                if not inside:
+                    break
+            if pos >= size:
+                break
+            bounds.append(pos)
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+def random_field(rnd, stray):
+    kind = rnd.random()
+    if kind < 0.25:
+        return 'line one\nline two' # quoted by the writer
+    if kind < 0.4:
+        return 'say "hi"' # escaped as ""
+    if stray and kind < 0.45:
+        return None # written raw below
+    return rnd.choice(['Java', 'AWS構築', '60~70万円', '東京都', '', 'x' * rnd.randint(1, 30)])
+
+def random_csv(rnd):
+    # -> (bytes, well_formed)
+    stray = rnd.random() < 0.3
+    well_formed = True
+    out = io.StringIO()
+    writer = csv.writer(out)
+    lines = []
+    for _ in range(rnd.randint(0, 40)):
+        fields = [random_field(rnd, stray) for _ in range(rnd.randint(1, 9))]
+        if None in fields:
+            # A quote inside an unquoted field: breaks parity
+            well_formed = False
+            lines.append(','.join('ab"c' if f is None else f.replace('\n', ' ').replace('"', '') for f in fields)
+                         + '\n')
+            continue
+        out.seek(0)
+        out.truncate()
+        writer.writerow(fields)
+        lines.append(out.getvalue())
+    return ''.join(lines).encode('utf-8'), well_formed
+
+
+class RecordBoundariesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    @mock.patch.object(parallel_ingest, 'QUOTE_BLOCK', 7)
+    def test_matches_whole_file_parity_on_generated_csvs(self):
+        rnd = random.Random(18)
+        path = os.path.join(self.dir, 'feed.csv')
+        for n in range(300):
+            data, well_formed = random_csv(rnd)
+            with open(path, 'wb') as f:
+                f.write(data)
+            for parts in (2, 3, 8):
+                with self.subTest(csv=n, parts=parts):
+                    ranges = record_boundaries(path, parts)
+                    self.assertEqual(ranges, reference_boundaries(data, parts))
+                    if well_formed:
+                        # Chunks hold whole records: read back, the rows are the file's
+                        rows = [row for start, end in ranges for row in read_chunk_rows(path, start, end)]
+                        self.assertEqual(rows, read_csv_rows(path))
+
+
+def feed_rows(rnd, n):
+    codes = [f"T{k:03d}" for k in range(n // 2)] # about half the codes repeat
+    rows = []
+    for i in range(n):
+        if i % 17 == 5:
+            rows.append(['7列の古い形式', 'Java', '60万', '東京都', '概要', '環境', '要件'])
+            continue
+        rows.append([
+            rnd.choice(codes),
+            rnd.choice(['Javaエンジニア', 'PMO支援', 'Webディレクター募集', 'インフラ構築']),
+            rnd.choice(['', 'PM', 'SE', 'インフラエンジニア']),
+            rnd.choice(['Java, AWS', 'TS, React.js', 'Python\nDjango', '']),
+            rnd.choice(['60~70万円', '〜90万', 'スキル見合い', '時給3000円']),
+            rnd.choice(['東京都港区 リモート', '大阪府', 'フルリモート', '福岡']),
+            'summary with "quotes"\nand a second line',
+            'env',
+            rnd.choice(['', 'フルリモート可']),
+        ])
+    return rows
+
+
+class ParallelNormalizeTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'feed.csv')
+        with open(self.path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['ID', '案件名', '職種', 'スキル', '単価', '場所', '概要', '環境', '条件'])
+            writer.writerows(feed_rows(random.Random(4), 200))
+
+    def serial(self):
+        # The loop import_ver1_2.py runs without --workers
+        rows = read_csv_rows(self.path)
+        registry = build_roles_registry()
+        locations = {}
+        prices = price_column(rows)
+        jobs = [normalize_row(i, row, registry, locations, prices[i]) for i, row in enumerate(rows)]
+        return len(rows), [job for job in jobs if job is not None], locations
+
+    def dedupe(self, jobs):
+        seen = {}
+        renames = []
+        for job in jobs:
+            code = job['job_code']
+            dedupe_job_code(job, seen)
+            if job['job_code'] != code:
+                renames.append((code, job['job_code']))
+        return renames
+
+    def comparable(self, jobs):
+        return [{k: v for k, v in job.items() if k != 'published_at'} for job in jobs]
+
+    def test_same_jobs_skills_and_renames_as_serial(self):
+        with redirect_stdout(io.StringIO()):
+            expected_count, expected_jobs, expected_locations = self.serial()
+            count, jobs, locations = parallel_normalize(self.path, 2)
+        self.assertGreater(len(record_boundaries(self.path, 2 * parallel_ingest.CHUNKS_PER_WORKER)), 1)
+        self.assertEqual(count, expected_count)
+        self.assertEqual(list(locations.items()), list(expected_locations.items()))
+        self.assertEqual([job['skills'] for job in jobs], [job['skills'] for job in expected_jobs])
+        renames = self.dedupe(jobs)
+        self.assertTrue(renames)
+        self.assertEqual(renames, self.dedupe(expected_jobs))
+        self.assertEqual(self.comparable(jobs), self.comparable(expected_jobs))
+
+
+if __name__ == '__main__':
+    unittest.main()
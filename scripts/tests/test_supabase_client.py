@@ -0,0 +1,76 @@
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import supabase_client
+from postgrest_standin import Faults, make_server
+from supabase_client import AIMDController, APIError, SupabaseClient
+
+# In-flight tuning of the shared HTTP client: the AIMD limit starts low,
+# rises while responses are fast and halves when the server answers 429/503.
+#
+# Usage:
+#   python -m unittest discover -s scripts/tests
+#   python -m pytest -q scripts/tests
+
+
+class AIMDControllerTest(unittest.TestCase):
+    def test_fast_responses_raise_the_limit_up_to_the_max(self):
+        aimd = AIMDController(2, 8, latency_target=1.0)
+        for _ in range(3): # about one window of 2
+            aimd.on_success(0.01)
+        self.assertEqual(aimd.slots, 3)
+        for _ in range(100):
+            aimd.on_success(0.01)
+        self.assertEqual(aimd.slots, 8)
+
+    def test_congestion_halves_once_per_cooldown(self):
+        aimd = AIMDController(8, 8, cooldown=60)
+        aimd.on_congestion()
+        aimd.on_congestion() # same burst
+        self.assertEqual((aimd.slots, aimd.decreases), (4, 1))
+
+    def test_slow_responses_count_as_congestion(self):
+        aimd = AIMDController(8, 8, latency_target=1.0)
+        aimd.on_success(2.0)
+        self.assertEqual(aimd.slots, 4)
+
+
+class ClientLimitTest(unittest.TestCase):
+    def serve(self, faults=None):
+        server = make_server(port=0, faults=faults)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address
+        client = SupabaseClient(f"http://{host}:{port}", 'local', pool_size=8, max_retries=0)
+        self.addCleanup(client.close)
+        return client
+
+    def test_starts_low_and_rises_under_fast_responses(self):
+        client = self.serve()
+        limiter = client.limiter
+        self.assertEqual(limiter.controller.slots, supabase_client.INITIAL_IN_FLIGHT)
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: client.request('skills'), range(60)))
+        self.assertEqual(limiter.controller.slots, 8)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_throttle_statuses_halve_the_limit(self):
+        for status in supabase_client.THROTTLE_STATUSES:
+            with self.subTest(status=status):
+                client = self.serve(Faults(error_rate=1.0, error_statuses=(status,)))
+                client.limiter.controller.limit = 8.0
+                with self.assertRaises(APIError), redirect_stdout(StringIO()):
+                    client.request('skills')
+                self.assertEqual(client.limiter.controller.slots, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from import_journal import ImportJournal, assign_run_ids
+from postgrest_standin import make_server
+from supabase_client import SupabaseClient
+from upload_scheduler import schedule_catalog_upload
+
+# Dependency handling of the catalog upload against an in-process stand-in
+# (postgrest_standin.py). With batch_bytes=1 every row is a batch of its
+# own, so one job batch can be made to fail (a location_id that does not
+# exist: a foreign-key error, as on Postgres) and the effect on the others
+# checked exactly.
+#
+# Usage:
+#   python -m unittest discover -s scripts/tests
+#   python -m pytest -q scripts/tests
+
+
+def job(n, location_id='loc-1'):
+    return {'id': f'job-{n}', 'job_code': f'J{n}', 'title': f'Job {n}', 'role_id': 'role-1',
+            'location_id': location_id, 'work_style': 'remote', 'price_min': 0, 'price_max': 0,
+            'description_md': '', 'requirements_md': '', 'status': 'published', 'is_active': True,
+            'published_at': None}
+
+LOCATIONS = [{'id': 'loc-1', 'region': '関東', 'name': '東京都', 'slug': 'tokyo'}]
+ROLES = [{'id': 'role-1', 'parent_id': None, 'name': 'Engineer', 'slug': 'engineer', 'sort_order': 0}]
+SKILLS = [{'id': 'skill-1', 'name': 'Python', 'slug': 'python', 'sort_order': 0}]
+JOBS = [job(0), job(1), job(2, location_id='no-such-location'), job(3)]
+JOB_SKILLS = [{'job_id': f'job-{n}', 'skill_id': 'skill-1'} for n in (0, 2, 3)]
+
+
+class CatalogUploadTest(unittest.TestCase):
+    def setUp(self):
+        self.server = make_server(port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.client = SupabaseClient(f"http://{host}:{port}", 'local', pool_size=2)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def upload(self, journal=None):
+        with redirect_stdout(StringIO()):
+            return schedule_catalog_upload(self.client.request, LOCATIONS, ROLES, SKILLS, JOBS, JOB_SKILLS,
+                                           concurrency=2, batch_bytes=1, journal=journal)
+
+    def rows(self, table, column):
+        return sorted(row[column] for row in self.client.request(table, params={'select': column}))
+
+    def statuses(self, scheduler):
+        return {task.name: task.status for task in scheduler.tasks}
+
+    def test_failed_job_batch_skips_only_its_relations(self):
+        scheduler = self.upload()
+        self.assertEqual(self.statuses(scheduler), {
+            'locations': 'done', 'roles': 'done', 'skills batch 0': 'done',
+            'job batch 0': 'done', 'job batch 1': 'done', 'job batch 2': 'failed', 'job batch 3': 'done',
+            'job_skills batch 0': 'done', 'job_skills batch 1': 'skipped', 'job_skills batch 2': 'done',
+        })
+        self.assertEqual([(t.name, t.status) for t in scheduler.failures()],
+                         [('job batch 2', 'failed'), ('job_skills batch 1', 'skipped')])
+        self.assertIn("job batch 2", str(scheduler.failures()[1].error))
+        self.assertEqual(self.rows('jobs', 'job_code'), ['J0', 'J1', 'J3'])
+        self.assertEqual(self.rows('job_skills', 'job_id'), ['job-0', 'job-3'])
+        self.assertEqual(self.server.RequestHandlerClass.counters['requests'], 11) # 9 batches sent, 2 selects
+
+    def test_journaled_batches_are_resumed_not_sent(self):
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        try:
+            journal = ImportJournal.start(path, 'feed', batch_bytes=1)
+            for name in ('locations', 'roles', 'skills batch 0'):
+                journal.mark_done(name)
+            # The masters are in from the earlier run
+            self.client.request('locations', 'POST', data=LOCATIONS)
+            self.client.request('roles', 'POST', data=ROLES)
+            self.client.request('skills', 'POST', data=SKILLS)
+            scheduler = self.upload(journal)
+        finally:
+            os.remove(path)
+        statuses = self.statuses(scheduler)
+        self.assertEqual([statuses[n] for n in ('locations', 'roles', 'skills batch 0')], ['resumed'] * 3)
+        self.assertEqual(self.client.stats.tables['locations']['rows'], 1) # only the setup insert
+        self.assertEqual(statuses['job batch 3'], 'done')
+        self.assertEqual(len(scheduler.failures()), 2)
+
+
+class RunIdsTest(unittest.TestCase):
+    def test_only_the_feeds_skills_are_journaled(self):
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        try:
+            journal = ImportJournal.start(path, 'feed')
+            jobs = [dict(job(0), skills=['Python'])]
+            skill_ids = assign_run_ids(journal, jobs, {'Python': 'skill-1', 'Cobol': 'skill-2'})
+            self.assertEqual(skill_ids, {'Python': 'skill-1'})
+            self.assertEqual(ImportJournal.load(path).ids['skills'], {'Python': 'skill-1'})
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from supabase_client import BATCH_BYTES, byte_batches, post_split
+
+# Dependency-aware batch uploader.
+# Batches that don't depend on each other are sent concurrently on a bounded
+# worker pool; a batch only starts after every batch it references has
+# committed. If a dependency fails, everything downstream of it is skipped
+# instead of being sent against missing foreign keys. Callers check
+# failures() and exit non-zero when any batch did not commit.
+
+COMMITTED = ('done', 'resumed')
+
+# --resume re-sends batches that may have committed unjournaled; rows already
+# in are skipped on this key (the primary key for the tables not listed)
+RESUME_CONFLICT_KEYS = {'jobs': 'job_code'}
+RESUME_HEADERS = {'Prefer': 'resolution=ignore-duplicates,return=minimal'}
+
+class UploadTask:
+    def __init__(self, task_id, name, fn, depends_on):
+        self.id = task_id
+        self.name = name
+        self.fn = fn
+        self.depends_on = set(depends_on)
+        self.dependents = []
+        self.status = 'pending' # pending -> running -> done / failed / skipped, or resumed
+        self.error = None
+
+
+class UploadScheduler:
+    def __init__(self, max_workers=4):
+        self.max_workers = max(1, max_workers)
+        self.tasks = []
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._remaining = 0
+
+    def add(self, name, fn, depends_on=(), done=False):
+        # done=True: already committed by an earlier run (--resume), never sent
+        task = UploadTask(len(self.tasks), name, fn, depends_on)
+        if done:
+            task.status = 'resumed'
+        for dep in task.depends_on:
+            self.tasks[dep].dependents.append(task.id)
+        self.tasks.append(task)
+        return task.id
+
+    def _ready(self, task):
+        return task.status == 'pending' and all(self.tasks[d].status in COMMITTED for d in task.depends_on)
+
+    def _skip(self, task, reason):
+        # Called with the lock held
+        task.status = 'skipped'
+        task.error = reason
+        self._remaining -= 1
+        for dep_id in task.dependents:
+            dep = self.tasks[dep_id]
+            if dep.status == 'pending':
+                self._skip(dep, f"dependency '{task.name}' not committed")
+
+    def _run(self, executor, task):
+        try:
+            task.fn()
+        except Exception as e:
+            print(f" Failed {task.name}: {e}")
+            with self._lock:
+                task.status = 'failed'
+                task.error = e
+                self._remaining -= 1
+                for dep_id in task.dependents:
+                    dep = self.tasks[dep_id]
+                    if dep.status == 'pending':
+                        self._skip(dep, f"dependency '{task.name}' failed")
+                if self._remaining == 0:
+                    self._finished.set()
+            return
+
+        with self._lock:
+            task.status = 'done'
+            self._remaining -= 1
+            for dep_id in task.dependents:
+                dep = self.tasks[dep_id]
+                if self._ready(dep):
+                    dep.status = 'running'
+                    executor.submit(self._run, executor, dep)
+            if self._remaining == 0:
+                self._finished.set()
+
+    def run(self):
+        if not self.tasks:
+            return self.summary()
+        self._remaining = sum(1 for t in self.tasks if t.status == 'pending')
+        if not self._remaining:
+            return self.summary()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            with self._lock:
+                for task in self.tasks:
+                    if self._ready(task):
+                        task.status = 'running'
+                        executor.submit(self._run, executor, task)
+            self._finished.wait()
+        return self.summary()
+
+    def summary(self):
+        counts = {}
+        for task in self.tasks:
+            counts[task.status] = counts.get(task.status, 0) + 1
+        return counts
+
+    def failures(self):
+        return [t for t in self.tasks if t.status in ('failed', 'skipped')]
+
+
+# --- Catalog upload plan (masters -> jobs -> job_skills) ---
+
+def schedule_catalog_upload(api_request, loc_payload, role_payload, skill_payload, job_payloads, js_payload,
+                            concurrency=4, batch_bytes=BATCH_BYTES, table_prefix='', journal=None):
+    # table_prefix='staging_' targets the staging copies (see catalog_staging.py)
+    # journal: batches it lists as done are skipped, new ones are recorded;
+    # raises ValueError when a resumed run's rows no longer match its batches
+    # Batches are cut by payload size (batch_bytes); one rejected as too
+    # large or too slow is split in half and retried.
+    scheduler = UploadScheduler(max_workers=concurrency)
+
+    def add(name, table, batch, label, depends_on=()):
+        def send():
+            if journal and journal.resumed:
+                params = {'on_conflict': RESUME_CONFLICT_KEYS[table]} if table in RESUME_CONFLICT_KEYS else None
+                post_split(api_request, table_prefix + table, batch, params=params, headers=RESUME_HEADERS)
+            else:
+                post_split(api_request, table_prefix + table, batch)
+            if journal:
+                journal.mark_done(name)
+            print(f"  Inserted {label}")
+        return scheduler.add(name, send, depends_on, done=bool(journal and journal.is_done(name)))
+
+    def batches(table, rows, key):
+        # Journaled runs keep their batch cut, so a task name is the same rows on --resume
+        if not rows:
+            return []
+        if journal:
+            return journal.batches(table, rows, batch_bytes, key)
+        return byte_batches(rows, batch_bytes)
+
+    # Masters: no dependencies between locations, roles and skills
+    master_ids = []
+    if loc_payload:
+        master_ids.append(add('locations', 'locations', loc_payload, f"{len(loc_payload)} locations"))
+    if role_payload:
+        master_ids.append(add('roles', 'roles', role_payload, f"{len(role_payload)} roles"))
+    skill_task_ids = []
+    for i, batch in batches('skills', skill_payload, lambda row: row['name']):
+        skill_task_ids.append(add(f"skills batch {i}", 'skills', batch, f"skills batch {i}"))
+
+    # Jobs reference roles/locations only
+    job_task_by_id = {}
+    for i, batch in batches('jobs', job_payloads, lambda row: row['job_code']):
+        tid = add(f"job batch {i}", 'jobs', batch, f"jobs batch {i} - {i+len(batch)}", depends_on=master_ids)
+        for job in batch:
+            job_task_by_id[job['id']] = tid
+
+    # Relations wait for skills and for exactly the job batches they reference
+    for i, batch in batches('job_skills', js_payload, lambda row: f"{row['job_id']}:{row['skill_id']}"):
+        deps = set(skill_task_ids)
+        deps.update(job_task_by_id[item['job_id']] for item in batch if item['job_id'] in job_task_by_id)
+        add(f"job_skills batch {i}", 'job_skills', batch, f"job_skills batch {i}", depends_on=deps)
+
+    counts = scheduler.run()
+    failures = scheduler.failures()
+    if failures:
+        print(f"  {len(failures)} batches not committed:")
+        for task in failures:
+            print(f"    {task.status} {task.name}: {task.error}")
+    print(f"  Upload summary: {counts}")
+    return scheduler
@@ -0,0 +1,7 @@
+-- Content hash for incremental job imports
+-- The importers' --sync mode stores a hash of each normalized job here and
+-- only re-sends jobs whose hash changed since the last run.
+
+ALTER TABLE public.jobs ADD COLUMN IF NOT EXISTS content_hash text;
+
+COMMENT ON COLUMN public.jobs.content_hash IS 'SHA-256 of the normalized CSV row (set by scripts/job_sync.py)';
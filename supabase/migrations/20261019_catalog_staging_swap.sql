@@ -0,0 +1,202 @@
+-- Staging tables + atomic swap for full catalog reloads
+-- The importers' --staging mode loads roles/locations/skills/jobs/job_skills
+-- into the staging_* tables below, then calls promote_catalog_staging() which
+-- checks the load and applies it to the live tables in one transaction.
+-- Readers keep seeing the previous catalog until that transaction commits.
+
+-- 1. Staging tables
+-- UNLOGGED: no WAL for the bulk load; their content is disposable.
+-- No FKs here, referential checks run once in promote_catalog_staging().
+CREATE UNLOGGED TABLE IF NOT EXISTS public.staging_roles (
+    id uuid PRIMARY KEY,
+    parent_id uuid,
+    name text NOT NULL,
+    slug text NOT NULL,
+    sort_order int DEFAULT 0
+);
+
+CREATE UNLOGGED TABLE IF NOT EXISTS public.staging_locations (
+    id uuid PRIMARY KEY,
+    region text NOT NULL,
+    name text NOT NULL,
+    slug text NOT NULL
+);
+
+CREATE UNLOGGED TABLE IF NOT EXISTS public.staging_skills (
+    id uuid PRIMARY KEY,
+    name text NOT NULL,
+    slug text NOT NULL,
+    sort_order int DEFAULT 0
+);
+
+CREATE UNLOGGED TABLE IF NOT EXISTS public.staging_jobs (
+    id uuid PRIMARY KEY,
+    job_code text,
+    title text NOT NULL,
+    role_id uuid,
+    location_id uuid,
+    work_style text,
+    price_min int,
+    price_max int,
+    description_md text,
+    requirements_md text,
+    status text,
+    is_active boolean DEFAULT true,
+    published_at timestamptz,
+    content_hash text
+);
+
+CREATE UNLOGGED TABLE IF NOT EXISTS public.staging_job_skills (
+    job_id uuid NOT NULL,
+    skill_id uuid NOT NULL,
+    PRIMARY KEY (job_id, skill_id)
+);
+
+-- RLS on with no policies: only the service role can read/write staging
+ALTER TABLE public.staging_roles ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.staging_locations ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.staging_skills ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.staging_jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.staging_job_skills ENABLE ROW LEVEL SECURITY;
+
+-- 2. Reset before a load
+CREATE OR REPLACE FUNCTION public.reset_catalog_staging()
+RETURNS void
+LANGUAGE sql
+AS $$
+    TRUNCATE public.staging_job_skills, public.staging_jobs, public.staging_skills,
+             public.staging_roles, public.staging_locations;
+$$;
+
+-- 3. Check + promote
+-- expected: {"roles": n, "locations": n, "skills": n, "jobs": n, "job_skills": n}
+-- as counted by the importer; any mismatch or dangling reference raises and
+-- nothing is applied.
+-- Masters are upserted by id (existing rows are kept as they are), jobs are
+-- upserted and jobs missing from the load are deleted, so job ids that
+-- survive the reload keep their job_badges. prune_masters also deletes
+-- roles/locations/skills that are not in the load (--reset-masters).
+CREATE OR REPLACE FUNCTION public.promote_catalog_staging(expected jsonb, prune_masters boolean DEFAULT false)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    actual jsonb;
+    bad int;
+    deleted_jobs int;
+BEGIN
+    -- Only one promote at a time; readers are not blocked
+    LOCK TABLE public.staging_jobs IN EXCLUSIVE MODE;
+
+    actual := jsonb_build_object(
+        'roles', (SELECT count(*) FROM public.staging_roles),
+        'locations', (SELECT count(*) FROM public.staging_locations),
+        'skills', (SELECT count(*) FROM public.staging_skills),
+        'jobs', (SELECT count(*) FROM public.staging_jobs),
+        'job_skills', (SELECT count(*) FROM public.staging_job_skills)
+    );
+    IF (actual->>'jobs')::int = 0 THEN
+        RAISE EXCEPTION 'staging_jobs is empty, refusing to promote';
+    END IF;
+    IF actual <> expected THEN
+        RAISE EXCEPTION 'staging row counts % do not match expected %', actual, expected;
+    END IF;
+
+    -- Referential checks against staging + live masters
+    SELECT count(*) INTO bad FROM public.staging_roles r
+    WHERE r.parent_id IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM public.staging_roles p WHERE p.id = r.parent_id)
+      AND NOT EXISTS (SELECT 1 FROM public.roles p WHERE p.id = r.parent_id);
+    IF bad > 0 THEN
+        RAISE EXCEPTION '% staged roles reference an unknown parent_id', bad;
+    END IF;
+
+    SELECT count(*) INTO bad FROM public.staging_jobs j
+    WHERE (j.role_id IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM public.staging_roles r WHERE r.id = j.role_id)
+           AND NOT EXISTS (SELECT 1 FROM public.roles r WHERE r.id = j.role_id))
+       OR (j.location_id IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM public.staging_locations l WHERE l.id = j.location_id)
+           AND NOT EXISTS (SELECT 1 FROM public.locations l WHERE l.id = j.location_id));
+    IF bad > 0 THEN
+        RAISE EXCEPTION '% staged jobs reference an unknown role_id/location_id', bad;
+    END IF;
+
+    SELECT count(*) INTO bad FROM public.staging_job_skills js
+    WHERE NOT EXISTS (SELECT 1 FROM public.staging_jobs j WHERE j.id = js.job_id)
+       OR (NOT EXISTS (SELECT 1 FROM public.staging_skills s WHERE s.id = js.skill_id)
+           AND NOT EXISTS (SELECT 1 FROM public.skills s WHERE s.id = js.skill_id));
+    IF bad > 0 THEN
+        RAISE EXCEPTION '% staged job_skills reference an unknown job_id/skill_id', bad;
+    END IF;
+
+    -- Masters
+    INSERT INTO public.roles (id, parent_id, name, slug, sort_order)
+    SELECT id, parent_id, name, slug, sort_order FROM public.staging_roles
+    ON CONFLICT (id) DO NOTHING;
+    INSERT INTO public.locations (id, region, name, slug)
+    SELECT id, region, name, slug FROM public.staging_locations
+    ON CONFLICT (id) DO NOTHING;
+    INSERT INTO public.skills (id, name, slug, sort_order)
+    SELECT id, name, slug, sort_order FROM public.staging_skills
+    ON CONFLICT (id) DO NOTHING;
+
+    -- Jobs: drop the ones not in the load first so their job_codes are free
+    DELETE FROM public.jobs j
+    WHERE NOT EXISTS (SELECT 1 FROM public.staging_jobs s WHERE s.id = j.id);
+    GET DIAGNOSTICS deleted_jobs = ROW_COUNT;
+
+    INSERT INTO public.jobs (id, job_code, title, role_id, location_id, work_style, price_min, price_max,
+                             description_md, requirements_md, status, is_active, published_at, content_hash)
+    SELECT id, job_code, title, role_id, location_id, work_style, price_min, price_max,
+           description_md, requirements_md, status, is_active, published_at, content_hash
+    FROM public.staging_jobs
+    ON CONFLICT (id) DO UPDATE SET
+        job_code = EXCLUDED.job_code,
+        title = EXCLUDED.title,
+        role_id = EXCLUDED.role_id,
+        location_id = EXCLUDED.location_id,
+        work_style = EXCLUDED.work_style,
+        price_min = EXCLUDED.price_min,
+        price_max = EXCLUDED.price_max,
+        description_md = EXCLUDED.description_md,
+        requirements_md = EXCLUDED.requirements_md,
+        status = EXCLUDED.status,
+        is_active = EXCLUDED.is_active,
+        published_at = EXCLUDED.published_at,
+        content_hash = EXCLUDED.content_hash,
+        updated_at = now();
+
+    -- Relations: exact replacement of the pair set
+    DELETE FROM public.job_skills js
+    WHERE NOT EXISTS (SELECT 1 FROM public.staging_job_skills s
+                      WHERE s.job_id = js.job_id AND s.skill_id = js.skill_id);
+    INSERT INTO public.job_skills (job_id, skill_id)
+    SELECT job_id, skill_id FROM public.staging_job_skills
+    ON CONFLICT DO NOTHING;
+
+    IF prune_masters THEN
+        DELETE FROM public.skills s
+        WHERE NOT EXISTS (SELECT 1 FROM public.staging_skills t WHERE t.id = s.id)
+          AND NOT EXISTS (SELECT 1 FROM public.job_skills js WHERE js.skill_id = s.id);
+        DELETE FROM public.locations l
+        WHERE NOT EXISTS (SELECT 1 FROM public.staging_locations t WHERE t.id = l.id)
+          AND NOT EXISTS (SELECT 1 FROM public.jobs j WHERE j.location_id = l.id);
+        DELETE FROM public.roles r
+        WHERE NOT EXISTS (SELECT 1 FROM public.staging_roles t WHERE t.id = r.id)
+          AND NOT EXISTS (SELECT 1 FROM public.jobs j WHERE j.role_id = r.id)
+          AND NOT EXISTS (SELECT 1 FROM public.roles c WHERE c.parent_id = r.id);
+    END IF;
+
+    TRUNCATE public.staging_job_skills, public.staging_jobs, public.staging_skills,
+             public.staging_roles, public.staging_locations;
+
+    RETURN actual || jsonb_build_object('deleted_jobs', deleted_jobs);
+END;
+$$;
+
+-- Importer-only: not callable through the anon/authenticated API roles
+REVOKE EXECUTE ON FUNCTION public.reset_catalog_staging() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.promote_catalog_staging(jsonb, boolean) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.reset_catalog_staging() TO service_role;
+GRANT EXECUTE ON FUNCTION public.promote_catalog_staging(jsonb, boolean) TO service_role;
@@ -0,0 +1,79 @@
+-- Whole-catalog import as a single RPC call
+-- The importers' --rpc mode posts the complete normalized catalog as jsonb:
+--   {"roles": [...], "locations": [...], "skills": [...], "jobs": [...], "job_skills": [...]}
+-- Each array holds rows shaped like the matching staging_* table
+-- (see 20261019_catalog_staging_swap.sql). import_catalog() stages the payload
+-- set-wise and promotes it with promote_catalog_staging(), all in the one
+-- transaction of the request: the import either fully commits or fully
+-- rolls back.
+
+-- 1. Append one payload (or one chunk of it) to the staging tables
+-- Masters may repeat across chunks and are deduplicated by id; duplicate
+-- jobs/job_skills are dropped here and then fail the promote's count check.
+CREATE OR REPLACE FUNCTION public.stage_catalog(payload jsonb)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    staged jsonb := '{}'::jsonb;
+    n int;
+BEGIN
+    INSERT INTO public.staging_roles
+    SELECT * FROM jsonb_populate_recordset(NULL::public.staging_roles, coalesce(payload->'roles', '[]'::jsonb))
+    ON CONFLICT (id) DO NOTHING;
+    GET DIAGNOSTICS n = ROW_COUNT;
+    staged := staged || jsonb_build_object('roles', n);
+
+    INSERT INTO public.staging_locations
+    SELECT * FROM jsonb_populate_recordset(NULL::public.staging_locations, coalesce(payload->'locations', '[]'::jsonb))
+    ON CONFLICT (id) DO NOTHING;
+    GET DIAGNOSTICS n = ROW_COUNT;
+    staged := staged || jsonb_build_object('locations', n);
+
+    INSERT INTO public.staging_skills
+    SELECT * FROM jsonb_populate_recordset(NULL::public.staging_skills, coalesce(payload->'skills', '[]'::jsonb))
+    ON CONFLICT (id) DO NOTHING;
+    GET DIAGNOSTICS n = ROW_COUNT;
+    staged := staged || jsonb_build_object('skills', n);
+
+    INSERT INTO public.staging_jobs
+    SELECT * FROM jsonb_populate_recordset(NULL::public.staging_jobs, coalesce(payload->'jobs', '[]'::jsonb))
+    ON CONFLICT (id) DO NOTHING;
+    GET DIAGNOSTICS n = ROW_COUNT;
+    staged := staged || jsonb_build_object('jobs', n);
+
+    INSERT INTO public.staging_job_skills
+    SELECT * FROM jsonb_populate_recordset(NULL::public.staging_job_skills, coalesce(payload->'job_skills', '[]'::jsonb))
+    ON CONFLICT DO NOTHING;
+    GET DIAGNOSTICS n = ROW_COUNT;
+    staged := staged || jsonb_build_object('job_skills', n);
+
+    RETURN staged;
+END;
+$$;
+
+-- 2. One-shot import: reset + stage + check + promote in one transaction
+CREATE OR REPLACE FUNCTION public.import_catalog(payload jsonb, prune_masters boolean DEFAULT false)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    expected jsonb;
+BEGIN
+    expected := jsonb_build_object(
+        'roles', jsonb_array_length(coalesce(payload->'roles', '[]'::jsonb)),
+        'locations', jsonb_array_length(coalesce(payload->'locations', '[]'::jsonb)),
+        'skills', jsonb_array_length(coalesce(payload->'skills', '[]'::jsonb)),
+        'jobs', jsonb_array_length(coalesce(payload->'jobs', '[]'::jsonb)),
+        'job_skills', jsonb_array_length(coalesce(payload->'job_skills', '[]'::jsonb))
+    );
+    PERFORM public.reset_catalog_staging();
+    PERFORM public.stage_catalog(payload);
+    RETURN public.promote_catalog_staging(expected, prune_masters);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.stage_catalog(jsonb) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.import_catalog(jsonb, boolean) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.stage_catalog(jsonb) TO service_role;
+GRANT EXECUTE ON FUNCTION public.import_catalog(jsonb, boolean) TO service_role;
@@ -101,6 +101,7 @@ export interface Database {
                     requirements_md: string | null
                     nice_to_have_md: string | null
                     is_active: boolean
+                    content_hash: string | null
                     status: 'draft' | 'published'
                     published_at: string | null
                     created_at: string
@@ -122,6 +123,7 @@ export interface Database {
                     requirements_md?: string | null
                     nice_to_have_md?: string | null
                     is_active?: boolean
+                    content_hash?: string | null
                     status?: 'draft' | 'published'
                     published_at?: string | null
                     created_at?: string
@@ -143,6 +145,7 @@ export interface Database {
                     requirements_md?: string | null
                     nice_to_have_md?: string | null
                     is_active?: boolean
+                    content_hash?: string | null
                     status?: 'draft' | 'published'
                     published_at?: string | null
                     created_at?: string